@@ -1,9 +1,10 @@
 from fastapi import APIRouter
 
-from app.api.v1 import anime, assrt, bangumi, health, magnet, notifications, piratebay, system, tasks, tmdb, users
+from app.api.v1 import anime, assrt, bangumi, database, health, magnet, notifications, piratebay, system, tasks, tmdb, users
 
 # 聚合所有 v1 子路由
 api_router = APIRouter()
+api_router.include_router(database.router, prefix="/database", tags=["Database"])
 api_router.include_router(health.router, prefix="/health", tags=["Health"])
 api_router.include_router(magnet.router, prefix="/magnet", tags=["Magnet"])
 api_router.include_router(notifications.router, prefix="/notifications", tags=["Notifications"])
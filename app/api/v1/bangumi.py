@@ -1,11 +1,11 @@
 from typing import List, Literal
 
-from fastapi import APIRouter, Path, Query
+from fastapi import APIRouter, Path, Query, Request, Response
 from fastapi.concurrency import run_in_threadpool
 
-from app.schemas.bangumi import BangumiCalendarDay, BangumiSubjectDetail
+from app.schemas.bangumi import BangumiCalendarDay, BangumiSubjectBatch, BangumiSubjectDetail
 from app.schemas.base import BaseResponse, ErrorCode
-from app.services.bangumi_service import bangumi_service
+from app.services.bangumi_service import MAX_BATCH_SUBJECTS, bangumi_service
 
 router = APIRouter()
 
@@ -14,17 +14,47 @@ SeasonName = Literal["winter", "spring", "summer", "autumn"]
 
 @router.get(
     "/calendar",
-    response_model=BaseResponse[List[BangumiCalendarDay]],
+    response_class=Response,
+    responses={
+        200: {
+            "model": BaseResponse[List[BangumiCalendarDay]],
+            "description": "周历快照加载时预先序列化的响应体，按原样返回，不再经 response_model 校验",
+        },
+        304: {"description": "If-None-Match 与当前周历的 ETag 一致"},
+    },
     operation_id="bangumiCalendar",
     summary="每日放送（本周新番周历）",
 )
-async def bangumi_calendar():
-    """调用 Bangumi /calendar，返回按周一到周日分组的正在放送番剧。"""
+async def bangumi_calendar(request: Request):
+    """
+    调用 Bangumi /calendar，返回按周一到周日分组的正在放送番剧。
+    响应体是周历快照中预先序列化的字节（结构同 BaseResponse[List[BangumiCalendarDay]]，加载快照时已按该模型生成），
+    此处不再校验与序列化；带 ETag，客户端 If-None-Match 命中时返回 304。
+    """
     try:
-        data = await run_in_threadpool(bangumi_service.get_calendar)
-        return BaseResponse.success(data=data)
+        snapshot = await run_in_threadpool(bangumi_service.get_calendar_snapshot)
     except Exception:
         return BaseResponse.fail(code=ErrorCode.SYSTEM_ERROR, message="获取番剧周历失败")
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == snapshot.etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
+
+@router.post(
+    "/calendar/refresh",
+    response_model=BaseResponse[List[BangumiCalendarDay]],
+    operation_id="bangumiCalendarRefresh",
+    summary="立即刷新每日放送",
+)
+async def bangumi_calendar_refresh(response: Response):
+    """立即重新请求 Bangumi /calendar（上游未变化时沿用缓存），返回刷新后的周历；ETag 与 /calendar 一致。"""
+    try:
+        snapshot = await run_in_threadpool(bangumi_service.refresh_calendar)
+    except Exception:
+        return BaseResponse.fail(code=ErrorCode.SYSTEM_ERROR, message="刷新番剧周历失败")
+    response.headers["ETag"] = snapshot.etag
+    return BaseResponse.success(data=snapshot.data)
 
 
 @router.get(
@@ -47,6 +77,25 @@ async def bangumi_season(
         return BaseResponse.fail(code=ErrorCode.SYSTEM_ERROR, message="获取季度新番失败")
 
 
+@router.get(
+    "/subjects",
+    response_model=BaseResponse[BangumiSubjectBatch],
+    operation_id="bangumiSubjects",
+    summary="批量番剧条目详情",
+)
+async def bangumi_subjects(
+    ids: List[int] = Query(..., description=f"Bangumi 条目 ID（可重复传入，最多 {MAX_BATCH_SUBJECTS} 个）"),
+):
+    """一次获取多个条目详情：已缓存的直接返回，其余并发请求 Bangumi；获取失败的 ID 放在 failed 中。"""
+    try:
+        items, failed = await run_in_threadpool(bangumi_service.get_subjects, ids)
+        return BaseResponse.success(data={"items": items, "failed": failed})
+    except ValueError as e:
+        return BaseResponse.fail(code=ErrorCode.PARAMS_ERROR, message=str(e))
+    except Exception:
+        return BaseResponse.fail(code=ErrorCode.SYSTEM_ERROR, message="获取番剧详情失败")
+
+
 @router.get(
     "/subject/{subject_id}",
     response_model=BaseResponse[BangumiSubjectDetail],
@@ -0,0 +1,44 @@
+import asyncio
+
+from fastapi import APIRouter
+
+from app.core.db import db
+from app.core.db_backup import BackupInProgressError
+from app.core.db_profiler import profiler
+from app.schemas.base import BaseResponse, ErrorCode
+
+router = APIRouter()
+
+
+@router.get("/stats", response_model=BaseResponse, summary="数据库查询统计")
+async def stats():
+    """
+    各查询的调用次数、耗时分位数与直方图，以及最近的慢查询（含 SQL 与执行计划）
+    需在配置中开启 sqlite.profiling；同时返回读连接池状态
+    """
+    data = profiler.snapshot()
+    data["pool"] = await asyncio.to_thread(db.pool.stats)
+    return BaseResponse.success(data=data)
+
+
+@router.post("/stats/reset", response_model=BaseResponse, summary="清空数据库查询统计")
+async def reset_stats():
+    profiler.reset()
+    return BaseResponse.success(message="统计已清空")
+
+
+@router.post("/backup", response_model=BaseResponse, summary="立即备份数据库")
+async def backup():
+    """
+    在线备份到数据库所在目录的 backups/，分步复制期间服务照常读写；完成后按 sqlite.backup_keep 轮换旧备份
+    """
+    try:
+        data = await asyncio.to_thread(db.backup)
+    except BackupInProgressError as e:
+        return BaseResponse.fail(code=ErrorCode.OPERATION_ERROR, message=str(e))
+    return BaseResponse.success(data=data, message="备份完成")
+
+
+@router.get("/backups", response_model=BaseResponse, summary="已有数据库备份")
+async def list_backups():
+    return BaseResponse.success(data=await asyncio.to_thread(db.list_backups))
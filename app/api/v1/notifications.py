@@ -1,9 +1,10 @@
 import asyncio
+from typing import Optional
 
 from fastapi import APIRouter, Query
 
-from app.core.db import db
-from app.schemas.base import BaseResponse
+from app.core.db import db, encode_cursor
+from app.schemas.base import BaseResponse, ErrorCode
 from app.schemas.notification import NotificationPage
 
 router = APIRouter()
@@ -13,11 +14,21 @@ router = APIRouter()
 async def get_notifications(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    is_read: bool = Query(None)
+    is_read: bool = Query(None),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    with_total: bool = Query(True, description="是否返回总数")
 ):
-    """获取通知列表"""
-    notifications, total = await asyncio.to_thread(db.get_notifications, page, page_size, is_read)
-    return BaseResponse.success(data=NotificationPage(items=notifications, total=total))
+    """获取通知列表：第一页或传 cursor 时走游标分页，不传 cursor 且 page > 1 时兼容页码分页"""
+    if cursor is None and page > 1:
+        notifications, total = await asyncio.to_thread(db.get_notifications, page, page_size, is_read)
+        next_cursor = encode_cursor(notifications[-1]) if notifications and page * page_size < total else None
+        return BaseResponse.success(data=NotificationPage(items=notifications, total=total, next_cursor=next_cursor))
+    try:
+        notifications, next_cursor = await asyncio.to_thread(db.get_notifications_by_cursor, cursor, page_size, is_read)
+    except ValueError:
+        return BaseResponse.fail(code=ErrorCode.PARAMS_ERROR, message="无效的分页游标")
+    total = await asyncio.to_thread(db.count_notifications, is_read) if with_total else None
+    return BaseResponse.success(data=NotificationPage(items=notifications, total=total, next_cursor=next_cursor))
 
 
 @router.get("/unread_count", response_model=BaseResponse[int])
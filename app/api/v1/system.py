@@ -10,6 +10,7 @@ from typing import Any, Dict, List
 from fastapi import APIRouter, Body, HTTPException
 
 from app.core.config import config
+from app.core.db_profiler import profiler
 from app.core.security import hash_password, is_hashed
 from app.schemas.base import BaseResponse
 from app.services.assrt_service import assrt_service
@@ -145,6 +146,7 @@ async def save_config(body: Dict[str, Any] = Body(..., embed=False)):
                     tmdb[key] = _strip_protocol(val)
         config.save_file_config(safe_body)
         # 部分服务启动时会缓存配置，这里主动刷新，确保"保存后立即生效"
+        profiler.reload_config()
         tmdb_service.reload_config()
         assrt_service.reload_config()
         magnet_service.reload_config()
@@ -1,9 +1,17 @@
 import asyncio
+from typing import Dict, Optional
 
 from fastapi import APIRouter, Body, Query
 
-from app.core.db import get_download_tasks
-from app.schemas.base import BaseResponse
+from app.core.db import (
+    count_download_tasks,
+    encode_cursor,
+    get_download_tasks,
+    get_download_tasks_by_cursor,
+    get_task_status_counts,
+    search_tasks,
+)
+from app.schemas.base import BaseResponse, ErrorCode
 from app.schemas.task import AddTaskRequest, TaskListResponse
 from app.services.task_service import task_service
 
@@ -23,14 +31,53 @@ async def add_task(request: AddTaskRequest = Body(...)):
 
 @router.get("/list", response_model=BaseResponse[TaskListResponse], summary="获取任务列表")
 async def list_tasks(
+    page: int = Query(1, ge=1, description="页码（传 cursor 时忽略）"),
+    page_size: int = Query(10, ge=1, le=100, description="每页数量"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor，用于无限滚动"),
+    with_total: bool = Query(True, description="是否返回总数（需额外 COUNT，无限滚动可关闭）"),
+    include_history: bool = Query(False, description="是否包含已归档的历史任务"),
+):
+    """
+    获取下载任务列表，支持分页
+    - 第一页或传 cursor：按 (createTime, id) 游标分页，任意深度耗时恒定
+    - 不传 cursor 且 page > 1：兼容旧的页码分页
+    - include_history=true 时合并归档表中的任务（archived=true），翻页时须保持该参数一致
+    """
+    if cursor is None and page > 1:
+        tasks, total = await asyncio.to_thread(get_download_tasks, page, page_size, include_history)
+        next_cursor = encode_cursor(tasks[-1]) if tasks and page * page_size < total else None
+        return BaseResponse.success(data=TaskListResponse(total=total, items=tasks, next_cursor=next_cursor))
+    try:
+        tasks, next_cursor = await asyncio.to_thread(get_download_tasks_by_cursor, cursor, page_size, include_history)
+    except ValueError:
+        return BaseResponse.fail(code=ErrorCode.PARAMS_ERROR, message="无效的分页游标")
+    total = await asyncio.to_thread(count_download_tasks, include_history) if with_total else None
+    return BaseResponse.success(data=TaskListResponse(total=total, items=tasks, next_cursor=next_cursor))
+
+
+@router.get("/search", response_model=BaseResponse[TaskListResponse], summary="搜索任务")
+async def search(
+    q: str = Query(..., min_length=1, max_length=200, description="搜索词，空格分隔的多个词需同时命中"),
     page: int = Query(1, ge=1, description="页码"),
-    page_size: int = Query(10, ge=1, le=100, description="每页数量")
+    page_size: int = Query(10, ge=1, le=100, description="每页数量"),
 ):
-    """获取下载任务列表，支持分页"""
-    tasks, total = await asyncio.to_thread(get_download_tasks, page, page_size)
+    """
+    按任务名、描述与重命名后的文件名全文搜索历史任务（FTS5 trigram，中英文子串/前缀均可）
+    结果按相关度排序，任务名命中优先；已归档的任务同样可搜到（archived=true）
+    """
+    if not q.strip():
+        return BaseResponse.fail(code=ErrorCode.PARAMS_ERROR, message="搜索词不能为空")
+    tasks, total = await asyncio.to_thread(search_tasks, q, page, page_size)
     return BaseResponse.success(data=TaskListResponse(total=total, items=tasks))
 
 
+@router.get("/status_counts", response_model=BaseResponse[Dict[str, int]], summary="各状态任务数")
+async def status_counts():
+    """各状态的任务数量（计数表按主键读取，不随历史任务增长变慢）"""
+    counts = await asyncio.to_thread(get_task_status_counts)
+    return BaseResponse.success(data=counts)
+
+
 @router.post("/cancel/{task_id}", summary="取消任务")
 async def cancel_task(task_id: int):
     """
@@ -1,6 +1,6 @@
 from typing import Any, List
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Request
 from fastapi.concurrency import run_in_threadpool
 
 from app.schemas.base import BaseResponse
@@ -14,6 +14,7 @@ from app.schemas.tmdb import (
     TMDBSuggestionResponse,
     TMDBEnglishTitleResponse,
 )
+from app.services.suggestion_service import suggestion_service
 from app.services.tmdb_service import tmdb_service
 
 router = APIRouter()
@@ -26,6 +27,8 @@ async def search_movie(
 ):
     """根据关键词搜索电影"""
     results, total = await run_in_threadpool(tmdb_service.search_movies_with_total, query, page)
+    if total:
+        suggestion_service.record_search(query, "movie")
     items = [_convert_result(r) for r in results]
     return BaseResponse.success(data=TMDBMovieListResponse(total=total, items=items))
 
@@ -37,6 +40,8 @@ async def search_tv(
 ):
     """根据关键词搜索电视剧或番剧"""
     results, total = await run_in_threadpool(tmdb_service.search_tv_shows_with_total, query, page)
+    if total:
+        suggestion_service.record_search(query, "tv")
     items = [_convert_result(r) for r in results]
     return BaseResponse.success(data=TMDBTVListResponse(total=total, items=items))
 
@@ -105,12 +110,17 @@ async def get_top_rated_anime(page: int = Query(1, description="页码")):
 
 @router.get("/suggestions", response_model=BaseResponse[TMDBSuggestionResponse], summary="搜索提示补全")
 async def get_suggestions(
+    request: Request,
     query: str = Query(..., description="搜索关键词"),
     limit: int = Query(10, description="返回数量限制"),
-    type: str = Query("", description="媒体类型: movie / tv，为空则混合搜索"),
+    type: str = Query("", description="媒体类型: movie / tv，为空则不限类型"),
+    session: str = Query("", max_length=64, description="输入框会话 ID（前端为每个输入框生成），同一会话的新输入取代旧输入；为空不取代"),
 ):
-    """根据输入返回搜索建议（标题补全）"""
-    suggestions = await run_in_threadpool(tmdb_service.get_search_suggestions, query, limit, media_type=type)
+    """根据输入返回搜索建议（标题补全）：先查本地前缀索引，不足时再请求 TMDB；同一输入框会话的旧输入会被新输入取代"""
+    # 反向代理/NAT 后多个用户共用同一地址，只按客户端上报的会话 ID 取代；拼上地址避免不同客户端的 ID 相撞
+    host = request.client.host if request.client else ""
+    client = f"{host}:{session}" if session else ""
+    suggestions = await run_in_threadpool(suggestion_service.suggest, query, limit, type, client)
     return BaseResponse.success(data={"suggestions": suggestions})
 
 
@@ -151,7 +161,7 @@ async def get_tv_english_title(tv_id: int):
 
 
 def _convert_result(result: Any) -> dict:
-    """将 TMDB 对象转换为字典，过滤私有属性"""
+    """将 TMDB 结果转换为字典，过滤私有属性"""
     if isinstance(result, dict):
         return result
     if hasattr(result, "__dict__"):
@@ -160,12 +170,5 @@ def _convert_result(result: Any) -> dict:
 
 
 def _to_plain(result: Any) -> Any:
-    """将 tmdbv3api 的 AsObj 详情对象转换为完整的原始 dict（含嵌套结构）。
-
-    AsObj 会把接口返回的原始 JSON 保存在 ``_json``，直接取用可保留
-    genres / networks / spoken_languages 等嵌套字段，供详情响应模型解析。
-    """
-    raw = getattr(result, "_json", None)
-    if isinstance(raw, dict):
-        return raw
+    """详情结果已是接口返回的原始 dict（含 genres / networks / spoken_languages 等嵌套字段），原样交给响应模型解析"""
     return _convert_result(result)
@@ -0,0 +1,77 @@
+"""
+并发数取自配置的线程池
+- 首次提交任务时才按配置创建线程池；之后每次提交都重新读取配置，并发数变化时换用新线程池
+- 旧线程池不再接收新任务，已提交的任务照常执行完毕后线程退出
+- 新旧线程池共用一个计数闸门：换池后旧线程池中仍在执行的任务照样计入并发数，
+  新任务要等总执行数低于当前配置值才开始，修改配置期间也不会超出上限
+用于限制对某个外部站点的并发请求数（如 bangumi.max_concurrency），修改配置后无需重启
+"""
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from app.core.config import config
+
+
+class ConfigExecutor:
+    """按配置项 config_key 决定 max_workers 的线程池（线程安全）"""
+
+    def __init__(self, config_key: str, default: int, thread_name_prefix: str = ""):
+        self.config_key = config_key
+        self.default = default
+        self.thread_name_prefix = thread_name_prefix
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._size = 0
+        # 正在执行的任务数（含已被换下的旧线程池中的任务）
+        self._slots = threading.Condition()
+        self._active = 0
+
+    def configured_size(self) -> int:
+        try:
+            return max(1, int(config.get(self.config_key, self.default)))
+        except (TypeError, ValueError):
+            return self.default
+
+    def _executor_locked(self) -> ThreadPoolExecutor:
+        """持有 _lock 时调用：并发数与配置不一致时换用新线程池"""
+        size = self.configured_size()
+        if self._pool is None or size != self._size:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False)
+            self._pool = ThreadPoolExecutor(max_workers=size, thread_name_prefix=self.thread_name_prefix)
+            self._size = size
+            # 上限调大时唤醒等待中的任务
+            with self._slots:
+                self._slots.notify_all()
+        return self._pool
+
+    def _run_limited(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """在线程池线程内执行：等到执行中的任务数低于当前配置值再开始"""
+        with self._slots:
+            while self._active >= self.configured_size():
+                self._slots.wait()
+            self._active += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._slots:
+                self._active -= 1
+                self._slots.notify_all()
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        # 在锁内提交：避免取到线程池后、提交前被另一线程换掉并关闭
+        with self._lock:
+            return self._executor_locked().submit(self._run_limited, fn, *args, **kwargs)
+
+    def map(self, fn: Callable[..., Any], *iterables: Iterable[Any]) -> Iterator[Any]:
+        """与 ThreadPoolExecutor.map 相同：任务立即全部提交，按输入顺序返回结果"""
+        with self._lock:
+            return self._executor_locked().map(functools.partial(self._run_limited, fn), *iterables)
+
+    @property
+    def max_workers(self) -> int:
+        """当前线程池的并发数（尚未创建时为配置值）"""
+        with self._lock:
+            return self._size if self._pool is not None else self.configured_size()
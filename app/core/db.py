@@ -1,53 +1,166 @@
+import base64
+import json
 import logging
 import os
 import sqlite3
-import threading
 import time
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+from typing import Any, ContextManager, Dict, List, Optional, Tuple
 
+from app.core import db_backup, migrations
 from app.core.config import config
+from app.core.db_pool import ConnectionPool
+from app.core.db_profiler import profile_queries, profiler
+from app.core.db_writer import DbWriter, WriteOp
+from app.core.info_hash import extract_info_hash
+from app.core.migrations import (
+    ACTIVE_TASK_FILTER,
+    ARCHIVE_TASK_FILTER,
+    COUNTER_NOTIFICATION_TOTAL,
+    COUNTER_NOTIFICATION_UNREAD,
+    COUNTER_TASK_ARCHIVED,
+    COUNTER_TASK_STATUS_PREFIX,
+    COUNTER_TASK_TOTAL,
+    FILE_TASK_COLUMNS,
+    TASK_COLUMNS,
+)
 from app.schemas.notification import NotificationType
 
 logger = logging.getLogger(__name__)
 
 
+def encode_cursor(row: Dict[str, Any]) -> str:
+    """由一页最后一行的 (createTime, id) 生成不透明游标（URL 安全的 base64）"""
+    raw = json.dumps([row.get("createTime"), row["id"]], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """解析游标为 (createTime, id)，格式不合法时抛出 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        create_time, row_id = json.loads(raw)
+    except Exception as e:
+        raise ValueError(f"无效的分页游标: {cursor}") from e
+    if not isinstance(create_time, str) or not isinstance(row_id, int):
+        raise ValueError(f"无效的分页游标: {cursor}")
+    return create_time, row_id
+
+
+def format_progress(progress: float) -> str:
+    """进度写入 taskInfo 时的格式（如 50.0%），监控据此判断进度是否变化"""
+    return f"{progress:.1f}%"
+
+
+def notification_key(task_id: int, kind: str) -> str:
+    """任务通知的折叠键：同一任务的同一类事件共用一条通知（如 task:12:retry）"""
+    return f"task:{task_id}:{kind}"
+
+
+@profile_queries
 class Database:
     """
     数据库管理类 (SQLite)
     负责数据库连接、初始化以及所有的数据 CRUD 操作。
-    使用线程本地连接，避免多请求共用同一连接导致的串行等待，API 之间互不阻塞。
+    读：有上限的只读连接池（sqlite.pool_size），通过 read_conn() 借出、用完归还。
+    写：统一交给单写线程（DbWriter）串行执行，短时间内到达的写合并为一个事务提交；
+    写方法都接受可选的 conn 参数，传入时直接在该连接（即 run_write 回调拿到的写连接）上执行，
+    用于把多条写入组合进同一个原子操作。
+    公开方法经 profile_queries 包装，开启 sqlite.profiling 时按方法名统计耗时并记录慢查询。
     """
 
-    def __init__(self):
-        # 与当前 config.yml 同目录（如 Docker 下 config/ZongziBay.db），不在设置页可改
-        self.db_path = config.get_database_file_path()
+    def __init__(self, db_path: Optional[str] = None, pool_size: Optional[int] = None):
+        # 与当前 config.yml 同目录（如 Docker 下 config/ZongziBay.db），不在设置页可改；测试可显式传入临时路径
+        self.db_path = db_path or config.get_database_file_path()
         root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
         self.schema_path = os.path.join(root_dir, "sql", "main.sql")
         if not os.path.exists(self.schema_path):
             self.schema_path = os.path.join(root_dir, "sql", "create_table.sql")
-        self._local = threading.local()
+        self.pool = ConnectionPool(
+            self._connect,
+            size=pool_size or config.get("sqlite.pool_size", 4),
+            timeout=config.get("sqlite.pool_timeout", 10.0),
+        )
+        self.writer = DbWriter(self._connect)
+        profiler.reload_config()
+
+    def _connect(self) -> sqlite3.Connection:
+        busy_timeout_ms = int(config.get("sqlite.busy_timeout_ms", 5000))
+        conn = sqlite3.connect(self.db_path, timeout=busy_timeout_ms / 1000, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {busy_timeout_ms}")
+        # WAL 模式下 NORMAL 只在检查点时 fsync，掉电最多丢失最近提交的事务，不会损坏数据库
+        conn.execute("PRAGMA synchronous = NORMAL")
+        if profiler.enabled:
+            conn.set_trace_callback(profiler.trace)
+        return conn
+
+    def read_conn(self) -> ContextManager[sqlite3.Connection]:
+        """借出一条只读连接（with 块结束自动归还）；写请走 run_write"""
+        return self.pool.connection()
+
+    def run_write(self, op: WriteOp, timeout: Optional[float] = None) -> Any:
+        """
+        在写线程上执行写操作并等待其所在批次提交，返回 op(conn) 的结果
+        op 内的多条写入是原子的（单独的 SAVEPOINT），抛出异常时只回滚 op 自身并原样抛给调用方
+        """
+        return self.writer.run(profiler.bind(op), timeout=timeout)
+
+    def _write(self, op: WriteOp, conn: Optional[sqlite3.Connection]) -> Any:
+        """已处于写操作内（传入了写连接）时直接执行，否则提交给写线程"""
+        if conn is not None:
+            return op(conn)
+        return self.run_write(op)
 
-    def get_conn(self) -> sqlite3.Connection:
-        """获取当前线程的数据库连接（每线程一个，避免多请求互相阻塞）"""
-        if not hasattr(self._local, "conn") or self._local.conn is None:
-            self._local.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            self._local.conn.row_factory = sqlite3.Row
-        return self._local.conn
+    def explain_query_plan(self, sql: str) -> List[str]:
+        """sql（已展开参数）的 EXPLAIN QUERY PLAN 各步骤描述"""
+        with self.read_conn() as conn:
+            return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()]
+
+    def backup(self, keep: Optional[int] = None) -> Dict[str, Any]:
+        """
+        在线备份到数据库所在目录的 backups/（分步复制，不阻塞写线程），并按 sqlite.backup_keep 轮换
+        已有备份进行中时抛出 db_backup.BackupInProgressError
+        """
+        return db_backup.create_backup(
+            self.db_path,
+            pages=int(config.get("sqlite.backup_pages_per_step", 256)),
+            sleep=float(config.get("sqlite.backup_step_sleep_ms", 20)) / 1000,
+            keep=int(config.get("sqlite.backup_keep", 7)) if keep is None else keep,
+        )
+
+    def list_backups(self) -> List[Dict[str, Any]]:
+        """已有备份（新的在前）"""
+        return db_backup.list_backups(self.db_path)
+
+    def close(self) -> None:
+        """停止写线程（处理完已排队的写操作）并关闭读连接池"""
+        self.writer.stop()
+        self.pool.close()
 
     def init_db(self) -> None:
         """
         初始化数据库
-        如果表不存在，则从 create_table.sql 创建
+        新库从建表脚本创建完整结构并标记为最新版本；已有库按 PRAGMA user_version 执行未应用的迁移
+        使用独立的一次性连接，不占用读连接池与写线程
         """
-        conn = self.get_conn()
-        cur = conn.cursor()
+        conn = self._connect()
         try:
-            cur.execute("SELECT 1 FROM download_task LIMIT 1")
-            return
-        except sqlite3.OperationalError:
-            pass
+            cur = conn.cursor()
+            try:
+                cur.execute("SELECT 1 FROM download_task LIMIT 1").fetchall()
+            except sqlite3.OperationalError:
+                if self._create_schema(conn):
+                    migrations.set_schema_version(conn, migrations.LATEST_VERSION)
+                    conn.commit()
+            conn.commit()
+            migrations.migrate(conn)
+        finally:
+            conn.close()
 
+    def _create_schema(self, conn: sqlite3.Connection) -> bool:
+        """执行建表脚本（已是最新完整结构），成功返回 True"""
+        cur = conn.cursor()
         if os.path.exists(self.schema_path):
             try:
                 start = time.perf_counter()
@@ -60,7 +173,16 @@ class Database:
 
                 # sqlite_sequence 是 SQLite 内置表（AUTOINCREMENT 才会出现），不能被 DROP/CREATE。
                 # 一些导出的 schema 会包含 sqlite_sequence 的 DDL/DML，这里统一跳过，避免初始化失败。
-                raw_statements = [s.strip() for s in sql_text.split(";")]
+                # 按分号切分后再用 sqlite3.complete_statement 拼回完整语句（触发器 BEGIN...END 内部含分号）
+                raw_statements: List[str] = []
+                buffer = ""
+                for part in sql_text.split(";"):
+                    buffer += part + ";"
+                    if sqlite3.complete_statement(buffer):
+                        raw_statements.append(buffer.strip().rstrip(";").strip())
+                        buffer = ""
+                if buffer.strip(" \n\r\t;"):
+                    raw_statements.append(buffer.strip().rstrip(";").strip())
                 statements: List[str] = []
                 skipped = 0
                 for s in raw_statements:
@@ -84,11 +206,13 @@ class Database:
                 conn.commit()
                 elapsed_ms = int((time.perf_counter() - start) * 1000)
                 logger.info(f"数据库初始化成功（耗时 {elapsed_ms}ms）")
+                return True
             except Exception as e:
                 conn.rollback()
                 logger.exception(f"数据库初始化失败: {e}")
         else:
             logger.error(f"未找到数据库初始化脚本: {self.schema_path}")
+        return False
 
     def insert_download_task(
         self, 
@@ -98,108 +222,258 @@ class Database:
         sourcePath: str, 
         targetPath: str, 
         taskStatus: str, 
-        commit: bool = True
+        infoHash: Optional[str] = None,
+        conn: Optional[sqlite3.Connection] = None
     ) -> int:
         """
         插入新的下载任务
+        infoHash 未传入时从 sourceUrl/taskName 解析（非种子任务为 NULL）
         """
+        if infoHash is None:
+            infoHash = extract_info_hash(taskName, sourceUrl)
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        conn = self.get_conn()
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO download_task (taskName, taskInfo, sourceUrl, sourcePath, targetPath, taskStatus, createTime, updateTime, isDelete) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)",
-            (taskName, taskInfo, sourceUrl, sourcePath, targetPath, taskStatus, now, now),
-        )
-        if commit:
-            conn.commit()
-        return cur.lastrowid
 
-    def get_download_tasks(self, page: int = 1, page_size: int = 10) -> Tuple[List[Dict[str, Any]], int]:
+        def op(conn: sqlite3.Connection) -> int:
+            cur = conn.execute(
+                "INSERT INTO download_task (taskName, taskInfo, sourceUrl, sourcePath, targetPath, taskStatus, createTime, updateTime, isDelete, infoHash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0, ?)",
+                (taskName, taskInfo, sourceUrl, sourcePath, targetPath, taskStatus, now, now, infoHash),
+            )
+            return cur.lastrowid
+        return self._write(op, conn)
+
+    def get_download_tasks(
+        self, page: int = 1, page_size: int = 10, include_history: bool = False
+    ) -> Tuple[List[Dict[str, Any]], int]:
         """
-        分页获取下载任务列表
+        分页获取下载任务列表（OFFSET 分页，深页需扫描并丢弃前面的行，大数据量请用 get_download_tasks_by_cursor）
+        include_history: 同时包含已归档的任务（带 archived = 1 标记）
         Returns: (tasks, total_count)
         """
         offset = (page - 1) * page_size
-        conn = self.get_conn()
-        cur = conn.cursor()
-        
-        # Count total
-        cur.execute("SELECT COUNT(*) FROM download_task WHERE isDelete = 0")
-        total = cur.fetchone()[0]
-        cur.execute(
-            "SELECT * FROM download_task WHERE isDelete = 0 ORDER BY createTime DESC LIMIT ? OFFSET ?",
-            (page_size, offset)
-        )
-        rows = cur.fetchall()
-        tasks = [dict(row) for row in rows]
-        for task in tasks:
-            cur.execute("SELECT * FROM file_task WHERE downloadTaskId = ?", (task['id'],))
-            ft_rows = cur.fetchall()
-            task['file_tasks'] = [dict(r) for r in ft_rows]
+        with self.read_conn() as conn:
+            cur = conn.cursor()
+            total = self.count_download_tasks(include_history)
+            tasks = self._select_task_page(cur, "isDelete = 0", [], page_size, offset, include_history)
+            self._attach_file_tasks(cur, tasks)
+            return tasks, total
+
+    def get_download_tasks_by_cursor(
+        self, cursor: Optional[str] = None, page_size: int = 10, include_history: bool = False
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        游标分页获取下载任务列表，按 (createTime, id) 倒序；任意深度都只在 idx_task_list 上定位后读取一页
+        cursor 为上一页返回的 next_cursor，None 表示第一页；include_history 同 get_download_tasks
+        Returns: (tasks, next_cursor)，没有更多数据时 next_cursor 为 None
+        """
+        with self.read_conn() as conn:
+            cur = conn.cursor()
+            where_clause = "isDelete = 0"
+            params: List[Any] = []
+            if cursor:
+                where_clause += " AND (createTime, id) < (?, ?)"
+                params.extend(decode_cursor(cursor))
+            # 多取一行用于判断是否还有下一页
+            tasks = self._select_task_page(cur, where_clause, params, page_size + 1, 0, include_history)
+            next_cursor = None
+            if len(tasks) > page_size:
+                tasks = tasks[:page_size]
+                next_cursor = encode_cursor(tasks[-1])
+            self._attach_file_tasks(cur, tasks)
+            return tasks, next_cursor
+
+    @staticmethod
+    def _select_task_page(
+        cur: sqlite3.Cursor, where_clause: str, params: List[Any], limit: int, offset: int, include_history: bool
+    ) -> List[Dict[str, Any]]:
+        """
+        按 (createTime, id) 倒序取一页任务
+        含历史时热表与归档表各自在索引上取前 offset + limit 行再合并排序，不会扫描整张归档表
+        """
+        order_by = "ORDER BY createTime DESC, id DESC"
+        if not include_history:
+            cur.execute(
+                f"SELECT * FROM download_task WHERE {where_clause} {order_by} LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            )
+        else:
+            cur.execute(
+                f"SELECT * FROM (SELECT {TASK_COLUMNS}, 0 AS archived FROM download_task "
+                f"WHERE {where_clause} {order_by} LIMIT ?) "
+                f"UNION ALL SELECT * FROM (SELECT {TASK_COLUMNS}, 1 AS archived FROM download_task_archive "
+                f"WHERE {where_clause} {order_by} LIMIT ?) "
+                f"{order_by} LIMIT ? OFFSET ?",
+                params + [offset + limit] + params + [offset + limit, limit, offset]
+            )
+        return [dict(row) for row in cur.fetchall()]
 
-        return tasks, total
+    def search_tasks(self, keyword: str, page: int = 1, page_size: int = 10) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        按任务名 / 描述 / 重命名文件名全文搜索未删除的任务（task_fts，trigram 子串匹配，不区分大小写）
+        空白分隔的多个词需同时命中；结果按相关度（任务名权重最高）排序，相关度相同时新任务在前
+        Returns: (tasks, total_count)
+        """
+        where_clause, params = self._task_search_filter(keyword)
+        if not where_clause:
+            return [], 0
+        # 全部为 3 字以上的词时才有 MATCH，可按 bm25 排序；短词只能走 LIKE，按时间倒序
+        order_by = "bm25(task_fts, 10.0, 1.0, 5.0), rowid DESC" if "MATCH" in where_clause else "rowid DESC"
+        offset = (page - 1) * page_size
+        with self.read_conn() as conn:
+            cur = conn.cursor()
+            total = cur.execute(f"SELECT COUNT(*) FROM task_fts WHERE {where_clause}", params).fetchone()[0]
+            ids = [row[0] for row in cur.execute(
+                f"SELECT rowid FROM task_fts WHERE {where_clause} ORDER BY {order_by} LIMIT ? OFFSET ?",
+                params + [page_size, offset]
+            ).fetchall()]
+            if not ids:
+                return [], total
+            # 已归档的任务也在索引中（id 与热表不重叠），按主键回两张表取行后恢复相关度顺序
+            placeholders = ",".join("?" * len(ids))
+            cur.execute(
+                f"SELECT {TASK_COLUMNS}, 0 AS archived FROM download_task WHERE id IN ({placeholders}) "
+                f"UNION ALL SELECT {TASK_COLUMNS}, 1 AS archived FROM download_task_archive WHERE id IN ({placeholders})",
+                ids + ids
+            )
+            by_id = {row["id"]: dict(row) for row in cur.fetchall()}
+            tasks = [by_id[i] for i in ids if i in by_id]
+            self._attach_file_tasks(cur, tasks)
+            return tasks, total
+
+    @staticmethod
+    def _task_search_filter(keyword: str) -> Tuple[str, List[Any]]:
+        """
+        把搜索词转为 task_fts 上的 WHERE 子句与参数
+        trigram 分词下 MATCH 只能匹配 3 个字符及以上的词；更短的词（如两字中文片名）改用 LIKE，
+        LIKE 仍在 task_fts 自身上执行，不回表扫描 download_task
+        """
+        terms = keyword.split()
+        long_terms = [t for t in terms if len(t) >= 3]
+        short_terms = [t for t in terms if len(t) < 3]
+        conditions: List[str] = []
+        params: List[Any] = []
+        if long_terms:
+            # 每个词作为 FTS5 字符串字面量（双引号转义），避免用户输入被解析为查询语法
+            conditions.append("task_fts MATCH ?")
+            params.append(" ".join('"' + t.replace('"', '""') + '"' for t in long_terms))
+        for term in short_terms:
+            pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            conditions.append(
+                "(task_fts.taskName LIKE ? ESCAPE '\\' OR task_fts.taskInfo LIKE ? ESCAPE '\\' "
+                "OR task_fts.fileNames LIKE ? ESCAPE '\\')"
+            )
+            params.extend([pattern] * 3)
+        return " AND ".join(conditions), params
+
+    def count_download_tasks(self, include_history: bool = False) -> int:
+        """未删除的下载任务总数（读触发器维护的计数），include_history 时加上已归档的任务数"""
+        total = self._get_counter(COUNTER_TASK_TOTAL)
+        if include_history:
+            total += self._get_counter(COUNTER_TASK_ARCHIVED)
+        return total
+
+    def get_task_status_counts(self) -> Dict[str, int]:
+        """各状态的未删除任务数，如 {"downloading": 3, "seeding": 12}（计数为 0 的状态不返回）"""
+        prefix = COUNTER_TASK_STATUS_PREFIX
+        with self.read_conn() as conn:
+            # 主键范围扫描：'task.status:' <= name < 'task.status;'
+            rows = conn.execute(
+                "SELECT name, value FROM stat_counter WHERE name >= ? AND name < ? AND value > 0",
+                (prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)),
+            ).fetchall()
+        return {row[0][len(prefix):]: row[1] for row in rows}
+
+    def _get_counter(self, name: str) -> int:
+        """按主键读取 stat_counter 中的单个计数"""
+        with self.read_conn() as conn:
+            row = conn.execute("SELECT value FROM stat_counter WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    @staticmethod
+    def _attach_file_tasks(cur: sqlite3.Cursor, tasks: List[Dict[str, Any]]) -> None:
+        """为每个下载任务附加 file_tasks 列表（已归档的任务从 file_task_archive 取）"""
+        for task in tasks:
+            table = "file_task_archive" if task.get("archived") else "file_task"
+            cur.execute(f"SELECT {FILE_TASK_COLUMNS} FROM {table} WHERE downloadTaskId = ?", (task['id'],))
+            task['file_tasks'] = [dict(r) for r in cur.fetchall()]
 
     def get_download_task_by_id(self, task_id: int) -> Optional[Dict[str, Any]]:
         """根据 ID 获取下载任务"""
-        conn = self.get_conn()
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM download_task WHERE id = ? AND isDelete = 0", (task_id,))
-        row = cur.fetchone()
-        if row:
-            return dict(row)
-        return None
-
-    def update_download_task_status(self, task_id: int, status: str) -> bool:
+        with self.read_conn() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT * FROM download_task WHERE id = ? AND isDelete = 0", (task_id,))
+            row = cur.fetchone()
+            if row:
+                return dict(row)
+            return None
+
+    def update_download_task_status(self, task_id: int, status: str, conn: Optional[sqlite3.Connection] = None) -> bool:
         """更新下载任务状态"""
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        conn = self.get_conn()
-        cur = conn.cursor()
-        cur.execute(
-            "UPDATE download_task SET taskStatus = ?, updateTime = ? WHERE id = ?",
-            (status, now, task_id)
-        )
-        conn.commit()
-        return cur.rowcount > 0
+
+        def op(conn: sqlite3.Connection) -> bool:
+            cur = conn.execute(
+                "UPDATE download_task SET taskStatus = ?, updateTime = ? WHERE id = ?",
+                (status, now, task_id)
+            )
+            return cur.rowcount > 0
+        return self._write(op, conn)
         
     def get_tasks_by_hash(self, torrent_hash: str) -> List[Dict[str, Any]]:
-        """根据 Hash 获取所有相关的任务"""
-        conn = self.get_conn()
-        cur = conn.cursor()
-        # 匹配 taskName (可能存的是 Hash) 或 sourceUrl 中的 Hash
-        cur.execute(
-            "SELECT * FROM download_task WHERE isDelete = 0 AND (taskName = ? OR sourceUrl LIKE ?)",
-            (torrent_hash, f"%{torrent_hash}%")
-        )
-        rows = cur.fetchall()
-        return [dict(row) for row in rows]
+        """根据 Hash 获取所有相关的任务（走 infoHash 索引，torrent_hash 需已规范化为 40 位小写 hex）"""
+        with self.read_conn() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT * FROM download_task WHERE isDelete = 0 AND infoHash = ?",
+                (torrent_hash,)
+            )
+            rows = cur.fetchall()
+            return [dict(row) for row in rows]
         
     def get_active_tasks(self) -> List[Dict[str, Any]]:
         """获取所有未完成的任务 (downloading, moving, seeding 等)"""
-        conn = self.get_conn()
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT * FROM download_task WHERE isDelete = 0 AND taskStatus NOT IN ('completed', 'error', 'paused', 'cancelled', 'fetching_metadata_failed')"
-        )
-        rows = cur.fetchall()
-        return [dict(row) for row in rows]
-
-    def update_task_status(self, task_id: int, status: str, progress: float = None) -> None:
+        with self.read_conn() as conn:
+            cur = conn.cursor()
+            cur.execute(f"SELECT * FROM download_task WHERE {ACTIVE_TASK_FILTER}")
+            rows = cur.fetchall()
+            return [dict(row) for row in rows]
+
+    def update_task_status(
+        self, task_id: int, status: str, progress: float = None, conn: Optional[sqlite3.Connection] = None
+    ) -> None:
         """更新任务状态和进度"""
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        conn = self.get_conn()
-        cur = conn.cursor()
-        
-        if progress is not None:
-             cur.execute(
-                "UPDATE download_task SET taskStatus = ?, taskInfo = ?, updateTime = ? WHERE id = ?",
-                (status, f"{progress:.1f}%", now, task_id),
-            )
-        else:
-            cur.execute(
-                "UPDATE download_task SET taskStatus = ?, updateTime = ? WHERE id = ?",
-                (status, now, task_id),
-            )
-        conn.commit()
+
+        def op(conn: sqlite3.Connection) -> None:
+            if progress is not None:
+                conn.execute(
+                    "UPDATE download_task SET taskStatus = ?, taskInfo = ?, updateTime = ? WHERE id = ?",
+                    (status, format_progress(progress), now, task_id),
+                )
+            else:
+                conn.execute(
+                    "UPDATE download_task SET taskStatus = ?, updateTime = ? WHERE id = ?",
+                    (status, now, task_id),
+                )
+        self._write(op, conn)
+
+    def update_task_statuses(self, updates: List[Tuple[int, str, float, str]]) -> int:
+        """
+        批量更新任务状态与进度（监控每轮汇总后一次性写入，单个事务、executemany）
+        updates: (task_id, status, progress, expected_status)；仅当行的当前状态仍为 expected_status 时才更新，
+        避免覆盖本轮期间被取消、被做种检查标记完成等其他写入
+        返回实际更新的行数
+        """
+        if not updates:
+            return 0
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        params = [
+            (status, format_progress(progress), now, task_id, expected_status)
+            for task_id, status, progress, expected_status in updates
+        ]
+        return self.run_write(lambda conn: conn.executemany(
+            "UPDATE download_task SET taskStatus = ?, taskInfo = ?, updateTime = ? WHERE id = ? AND taskStatus = ?",
+            params,
+        ).rowcount)
 
     def insert_file_task(
         self, 
@@ -208,169 +482,380 @@ class Database:
         targetPath: str, 
         file_rename: str, 
         file_status: str = 'pending', 
-        commit: bool = True
+        conn: Optional[sqlite3.Connection] = None
     ) -> int:
         """
         插入文件操作任务
         """
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        conn = self.get_conn()
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO file_task (downloadTaskId, sourcePath, targetPath, file_rename, file_status, createTime, updateTime) VALUES (?, ?, ?, ?, ?, ?, ?)",
-            (downloadTaskId, sourcePath, targetPath, file_rename, file_status, now, now)
-        )
-        if commit:
-            conn.commit()
-        return cur.lastrowid
+
+        def op(conn: sqlite3.Connection) -> int:
+            cur = conn.execute(
+                "INSERT INTO file_task (downloadTaskId, sourcePath, targetPath, file_rename, file_status, createTime, updateTime) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (downloadTaskId, sourcePath, targetPath, file_rename, file_status, now, now)
+            )
+            return cur.lastrowid
+        return self._write(op, conn)
 
     def get_file_tasks(self, download_task_id: int) -> List[Dict[str, Any]]:
         """获取指定下载任务关联的文件任务"""
-        conn = self.get_conn()
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT * FROM file_task WHERE downloadTaskId = ?",
-            (download_task_id,)
-        )
-        rows = cur.fetchall()
-        return [dict(row) for row in rows]
+        with self.read_conn() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT * FROM file_task WHERE downloadTaskId = ?",
+                (download_task_id,)
+            )
+            rows = cur.fetchall()
+            return [dict(row) for row in rows]
 
-    def update_file_task_status(self, task_id: int, status: str, error_message: str = None) -> None:
+    def update_file_task_status(
+        self, task_id: int, status: str, error_message: str = None, conn: Optional[sqlite3.Connection] = None
+    ) -> None:
         """更新文件任务状态"""
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        conn = self.get_conn()
-        cur = conn.cursor()
-        if error_message:
-            cur.execute(
-                "UPDATE file_task SET file_status = ?, errorMessage = ?, updateTime = ? WHERE id = ?",
-                (status, error_message, now, task_id),
-            )
-        else:
-            cur.execute(
-                "UPDATE file_task SET file_status = ?, updateTime = ? WHERE id = ?",
-                (status, now, task_id),
-            )
-        conn.commit()
 
-    def update_file_task_source_path(self, file_task_id: int, source_path: str) -> None:
+        def op(conn: sqlite3.Connection) -> None:
+            if error_message:
+                conn.execute(
+                    "UPDATE file_task SET file_status = ?, errorMessage = ?, updateTime = ? WHERE id = ?",
+                    (status, error_message, now, task_id),
+                )
+            else:
+                conn.execute(
+                    "UPDATE file_task SET file_status = ?, updateTime = ? WHERE id = ?",
+                    (status, now, task_id),
+                )
+        self._write(op, conn)
+
+    def update_file_task_source_path(
+        self, file_task_id: int, source_path: str, conn: Optional[sqlite3.Connection] = None
+    ) -> None:
         """更新文件任务的源路径（用于字幕后台下载完成后回填文件名）"""
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        conn = self.get_conn()
-        cur = conn.cursor()
-        cur.execute(
-            "UPDATE file_task SET sourcePath = ?, updateTime = ? WHERE id = ?",
-            (source_path, now, file_task_id),
-        )
-        conn.commit()
+
+        def op(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                "UPDATE file_task SET sourcePath = ?, updateTime = ? WHERE id = ?",
+                (source_path, now, file_task_id),
+            )
+        self._write(op, conn)
 
     def update_download_task_name_and_status(
-        self, task_id: int, task_name: str, status: str, task_info: Optional[str] = None
+        self,
+        task_id: int,
+        task_name: str,
+        status: str,
+        task_info: Optional[str] = None,
+        conn: Optional[sqlite3.Connection] = None,
     ) -> None:
         """更新下载任务名称、状态，可选更新任务信息（用于字幕后台下载完成后）"""
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        conn = self.get_conn()
-        cur = conn.cursor()
-        if task_info is not None:
-            cur.execute(
-                "UPDATE download_task SET taskName = ?, taskInfo = ?, taskStatus = ?, updateTime = ? WHERE id = ?",
-                (task_name, task_info, status, now, task_id),
-            )
-        else:
-            cur.execute(
-                "UPDATE download_task SET taskName = ?, taskStatus = ?, updateTime = ? WHERE id = ?",
-                (task_name, status, now, task_id),
-            )
-        conn.commit()
 
-    def update_file_tasks_by_download_task_id(self, download_task_id: int, status: str) -> None:
+        def op(conn: sqlite3.Connection) -> None:
+            if task_info is not None:
+                conn.execute(
+                    "UPDATE download_task SET taskName = ?, taskInfo = ?, taskStatus = ?, updateTime = ? WHERE id = ?",
+                    (task_name, task_info, status, now, task_id),
+                )
+            else:
+                conn.execute(
+                    "UPDATE download_task SET taskName = ?, taskStatus = ?, updateTime = ? WHERE id = ?",
+                    (task_name, status, now, task_id),
+                )
+        self._write(op, conn)
+
+    def update_file_tasks_by_download_task_id(
+        self, download_task_id: int, status: str, conn: Optional[sqlite3.Connection] = None
+    ) -> None:
         """批量更新指定下载任务关联的所有文件任务状态"""
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        conn = self.get_conn()
-        cur = conn.cursor()
-        cur.execute(
-            "UPDATE file_task SET file_status = ?, updateTime = ? WHERE downloadTaskId = ?",
-            (status, now, download_task_id)
-        )
-        conn.commit()
+
+        def op(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                "UPDATE file_task SET file_status = ?, updateTime = ? WHERE downloadTaskId = ?",
+                (status, now, download_task_id)
+            )
+        self._write(op, conn)
 
     def insert_notification(
         self,
         title: str,
         content: str = None,
-        type: str = NotificationType.INFO.value
+        type: str = NotificationType.INFO.value,
+        collapse_key: Optional[str] = None,
+        conn: Optional[sqlite3.Connection] = None
     ) -> int:
-        """插入新通知"""
+        """
+        插入新通知
+        collapse_key: 折叠键（见 notification_key）。已有同键的未删除通知时不再新增，
+        而是更新其标题/内容/时间、repeatCount + 1 并重新置为未读，返回该通知 id
+        """
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        conn = self.get_conn()
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO notification (title, content, type, isRead, createTime, isDelete) VALUES (?, ?, ?, 0, ?, 0)",
-            (title, content, type, now)
-        )
-        conn.commit()
-        return cur.lastrowid
+
+        def op(conn: sqlite3.Connection) -> int:
+            if collapse_key:
+                row = conn.execute(
+                    "SELECT id FROM notification WHERE collapseKey = ? AND isDelete = 0", (collapse_key,)
+                ).fetchone()
+                if row:
+                    conn.execute(
+                        "UPDATE notification SET title = ?, content = ?, type = ?, isRead = 0, createTime = ?, "
+                        "repeatCount = repeatCount + 1 WHERE id = ?",
+                        (title, content, type, now, row[0])
+                    )
+                    return row[0]
+            cur = conn.execute(
+                "INSERT INTO notification (title, content, type, isRead, createTime, isDelete, collapseKey, repeatCount) "
+                "VALUES (?, ?, ?, 0, ?, 0, ?, 1)",
+                (title, content, type, now, collapse_key)
+            )
+            return cur.lastrowid
+        return self._write(op, conn)
 
     def get_notifications(self, page: int = 1, page_size: int = 20, is_read: bool = None) -> Tuple[List[Dict[str, Any]], int]:
-        """分页获取通知"""
+        """分页获取通知（OFFSET 分页，大数据量请用 get_notifications_by_cursor）"""
         offset = (page - 1) * page_size
-        conn = self.get_conn()
-        cur = conn.cursor()
-        
+        with self.read_conn() as conn:
+            cur = conn.cursor()
+            where_clause, params = self._notification_filter(is_read)
+            total = self.count_notifications(is_read)
+            cur.execute(
+                f"SELECT * FROM notification WHERE {where_clause} ORDER BY createTime DESC, id DESC LIMIT ? OFFSET ?",
+                params + [page_size, offset]
+            )
+            rows = cur.fetchall()
+            return [dict(row) for row in rows], total
+
+    def get_notifications_by_cursor(
+        self, cursor: Optional[str] = None, page_size: int = 20, is_read: bool = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        游标分页获取通知，按 (createTime, id) 倒序，耗时与翻页深度无关
+        Returns: (notifications, next_cursor)，没有更多数据时 next_cursor 为 None
+        """
+        with self.read_conn() as conn:
+            cur = conn.cursor()
+            where_clause, params = self._notification_filter(is_read)
+            if cursor:
+                where_clause += " AND (createTime, id) < (?, ?)"
+                params.extend(decode_cursor(cursor))
+            cur.execute(
+                f"SELECT * FROM notification WHERE {where_clause} ORDER BY createTime DESC, id DESC LIMIT ?",
+                params + [page_size + 1]
+            )
+            notifications = [dict(row) for row in cur.fetchall()]
+            next_cursor = None
+            if len(notifications) > page_size:
+                notifications = notifications[:page_size]
+                next_cursor = encode_cursor(notifications[-1])
+            return notifications, next_cursor
+
+    def count_notifications(self, is_read: bool = None) -> int:
+        """未删除的通知总数，可按已读状态筛选（读触发器维护的计数）"""
+        if is_read is None:
+            return self._get_counter(COUNTER_NOTIFICATION_TOTAL)
+        unread = self._get_counter(COUNTER_NOTIFICATION_UNREAD)
+        if is_read:
+            return self._get_counter(COUNTER_NOTIFICATION_TOTAL) - unread
+        return unread
+
+    @staticmethod
+    def _notification_filter(is_read: bool = None) -> Tuple[str, List[Any]]:
+        """通知列表的 WHERE 子句与参数"""
         where_clause = "isDelete = 0"
-        params = []
+        params: List[Any] = []
         if is_read is not None:
             where_clause += " AND isRead = ?"
             params.append(1 if is_read else 0)
-        cur.execute(f"SELECT COUNT(*) FROM notification WHERE {where_clause}", params)
-        total = cur.fetchone()[0]
-        cur.execute(
-            f"SELECT * FROM notification WHERE {where_clause} ORDER BY createTime DESC LIMIT ? OFFSET ?",
-            params + [page_size, offset]
-        )
-        rows = cur.fetchall()
-        return [dict(row) for row in rows], total
+        return where_clause, params
 
     def mark_notification_read(self, notification_id: int) -> bool:
         """标记单个通知为已读"""
-        conn = self.get_conn()
-        cur = conn.cursor()
-        cur.execute("UPDATE notification SET isRead = 1 WHERE id = ?", (notification_id,))
-        conn.commit()
-        return cur.rowcount > 0
+        return self.run_write(
+            lambda conn: conn.execute("UPDATE notification SET isRead = 1 WHERE id = ?", (notification_id,)).rowcount > 0
+        )
 
     def mark_all_notifications_read(self) -> int:
         """标记所有通知为已读"""
-        conn = self.get_conn()
-        cur = conn.cursor()
-        cur.execute("UPDATE notification SET isRead = 1 WHERE isRead = 0 AND isDelete = 0")
-        conn.commit()
-        return cur.rowcount
+        return self.run_write(
+            lambda conn: conn.execute("UPDATE notification SET isRead = 1 WHERE isRead = 0 AND isDelete = 0").rowcount
+        )
 
     def get_unread_count(self) -> int:
-        """获取未读通知数量"""
-        conn = self.get_conn()
-        cur = conn.cursor()
-        cur.execute("SELECT COUNT(*) FROM notification WHERE isRead = 0 AND isDelete = 0")
-        return cur.fetchone()[0]
+        """获取未读通知数量（读触发器维护的计数）"""
+        return self._get_counter(COUNTER_NOTIFICATION_UNREAD)
 
     def delete_notification(self, notification_id: int) -> bool:
         """逻辑删除通知"""
-        conn = self.get_conn()
-        cur = conn.cursor()
-        cur.execute("UPDATE notification SET isDelete = 1 WHERE id = ?", (notification_id,))
-        conn.commit()
-        return cur.rowcount > 0
+        return self.run_write(
+            lambda conn: conn.execute("UPDATE notification SET isDelete = 1 WHERE id = ?", (notification_id,)).rowcount > 0
+        )
+
+    def get_tmdb_title(self, media_type: str, tmdb_id: int) -> Optional[Dict[str, Any]]:
+        """按主键读取 TMDB 英文标题映射（altTitles 解码为列表），不存在返回 None"""
+        with self.read_conn() as conn:
+            row = conn.execute(
+                "SELECT englishTitle, altTitles FROM tmdb_title WHERE mediaType = ? AND tmdbId = ?",
+                (media_type, tmdb_id),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"englishTitle": row[0], "altTitles": json.loads(row[1] or "[]")}
+
+    def upsert_tmdb_titles(self, rows: List[Tuple[str, int, Optional[str], List[str]]], overwrite: bool = True) -> int:
+        """
+        批量写入 TMDB 英文标题映射（单个事务、executemany）
+        rows: (media_type, tmdb_id, english_title, alt_titles)；overwrite=False 时已有记录保持不变（列表批量回填用）
+        返回实际写入的行数
+        """
+        if not rows:
+            return 0
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        params = [
+            (media_type, tmdb_id, english_title, json.dumps(alt_titles or [], ensure_ascii=False), now)
+            for media_type, tmdb_id, english_title, alt_titles in rows
+        ]
+        conflict = (
+            "DO UPDATE SET englishTitle = excluded.englishTitle, altTitles = excluded.altTitles, updateTime = excluded.updateTime"
+            if overwrite else "DO NOTHING"
+        )
+        return self.run_write(lambda conn: conn.executemany(
+            "INSERT INTO tmdb_title (mediaType, tmdbId, englishTitle, altTitles, updateTime) VALUES (?, ?, ?, ?, ?) "
+            f"ON CONFLICT(mediaType, tmdbId) {conflict}",
+            params,
+        ).rowcount)
+
+    def get_bangumi_season(self, year: int, season: str) -> Optional[List[Dict[str, Any]]]:
+        """读取已保存的历史季度番剧表，不存在返回 None"""
+        with self.read_conn() as conn:
+            row = conn.execute(
+                "SELECT data FROM bangumi_season WHERE year = ? AND season = ?", (year, season)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_bangumi_season(self, year: int, season: str, data: List[Dict[str, Any]]) -> None:
+        """保存（覆盖）历史季度番剧表"""
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        self.run_write(lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO bangumi_season (year, season, data, updateTime) VALUES (?, ?, ?, ?)",
+            (year, season, text, now),
+        ))
+
+    def archive_finished_tasks(self, days: int, batch_size: int = 200) -> int:
+        """
+        把结束（completed / cancelled）超过 days 天的任务连同文件任务搬入归档表，返回归档的任务数
+        每批一个写操作：复制到归档表、删除热表行、补回全文索引、累加归档计数在同一事务内完成；
+        days <= 0 表示不归档
+        """
+        if days <= 0:
+            return 0
+        cutoff = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+
+        def op(conn: sqlite3.Connection) -> int:
+            # 走部分索引 idx_task_archivable：只访问可归档的行，不随热表中其他任务增多而变慢
+            ids = [row[0] for row in conn.execute(
+                f"SELECT id FROM download_task WHERE {ARCHIVE_TASK_FILTER} AND updateTime < ? "
+                f"ORDER BY updateTime LIMIT ?",
+                (cutoff, batch_size)
+            ).fetchall()]
+            if not ids:
+                return 0
+            placeholders = ",".join("?" * len(ids))
+            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            conn.execute(
+                f"INSERT INTO download_task_archive ({TASK_COLUMNS}, archiveTime) "
+                f"SELECT {TASK_COLUMNS}, ? FROM download_task WHERE id IN ({placeholders})",
+                [now] + ids
+            )
+            conn.execute(
+                f"INSERT INTO file_task_archive ({FILE_TASK_COLUMNS}) "
+                f"SELECT {FILE_TASK_COLUMNS} FROM file_task WHERE downloadTaskId IN ({placeholders})",
+                ids
+            )
+            conn.execute(f"DELETE FROM file_task WHERE downloadTaskId IN ({placeholders})", ids)
+            # 删除热表行时触发器会同步扣减计数并移除全文索引，随后按归档表补回索引
+            conn.execute(f"DELETE FROM download_task WHERE id IN ({placeholders})", ids)
+            migrations.index_tasks_fts(
+                conn, "download_task_archive", "file_task_archive", f"d.id IN ({placeholders})", tuple(ids)
+            )
+            conn.execute(
+                f"INSERT INTO stat_counter (name, value) "
+                f"SELECT ?, COUNT(*) FROM download_task_archive WHERE isDelete = 0 AND id IN ({placeholders}) "
+                f"ON CONFLICT(name) DO UPDATE SET value = stat_counter.value + excluded.value",
+                [COUNTER_TASK_ARCHIVED] + ids
+            )
+            return len(ids)
+
+        total = 0
+        while True:
+            archived = self.run_write(op)
+            total += archived
+            if archived < batch_size:
+                break
+        if total:
+            logger.info(f"已归档结束超过 {days} 天的任务 {total} 个")
+        return total
+
+    def purge_notifications(self, retention_days: int, batch_size: int = 500) -> int:
+        """
+        物理删除 retention_days 天前的已读通知与已逻辑删除的通知，返回删除条数
+        分批删除（每批一个写操作），避免长时间占用写线程；retention_days <= 0 表示不清理
+        """
+        if retention_days <= 0:
+            return 0
+        cutoff = (datetime.now() - timedelta(days=retention_days)).strftime("%Y-%m-%d %H:%M:%S")
+        # 两个条件分别命中 idx_notif_list / idx_notif_read_list
+        conditions = (
+            "isDelete = 1 AND createTime < ?",
+            "isDelete = 0 AND isRead = 1 AND createTime < ?",
+        )
+        total = 0
+        for condition in conditions:
+            while True:
+                deleted = self.run_write(
+                    lambda conn: conn.execute(
+                        f"DELETE FROM notification WHERE id IN (SELECT id FROM notification WHERE {condition} LIMIT ?)",
+                        (cutoff, batch_size)
+                    ).rowcount
+                )
+                total += deleted
+                if deleted < batch_size:
+                    break
+        return total
+
+    def incremental_vacuum(self, max_pages: int = 500) -> int:
+        """
+        归还至多 max_pages 个空闲页给文件系统（需 auto_vacuum = INCREMENTAL），返回实际归还的页数
+        incremental_vacuum 每执行一步释放一页，而 sqlite3 模块对无结果集的语句只执行一步，故逐页执行
+        """
+        def op(conn: sqlite3.Connection) -> int:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                return 0
+            before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            for _ in range(min(before, max_pages)):
+                conn.execute("PRAGMA incremental_vacuum(1)")
+            return before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return self.run_write(op)
 
 
 db = Database()
 
 init_db = db.init_db
+close_db = db.close
+run_write = db.run_write
 insert_download_task = db.insert_download_task
 insert_file_task = db.insert_file_task
 get_download_tasks = db.get_download_tasks
+get_download_tasks_by_cursor = db.get_download_tasks_by_cursor
+count_download_tasks = db.count_download_tasks
+search_tasks = db.search_tasks
+archive_finished_tasks = db.archive_finished_tasks
+get_task_status_counts = db.get_task_status_counts
 get_download_task_by_id = db.get_download_task_by_id
 get_active_tasks = db.get_active_tasks
 update_task_status = db.update_task_status
+update_task_statuses = db.update_task_statuses
 get_file_tasks = db.get_file_tasks
 update_file_task_status = db.update_file_task_status
 update_file_task_source_path = db.update_file_task_source_path
@@ -379,7 +864,17 @@ update_file_tasks_by_download_task_id = db.update_file_tasks_by_download_task_id
 
 insert_notification = db.insert_notification
 get_notifications = db.get_notifications
+get_notifications_by_cursor = db.get_notifications_by_cursor
+count_notifications = db.count_notifications
 mark_notification_read = db.mark_notification_read
 mark_all_notifications_read = db.mark_all_notifications_read
 get_unread_count = db.get_unread_count
 delete_notification = db.delete_notification
+purge_notifications = db.purge_notifications
+get_tmdb_title = db.get_tmdb_title
+upsert_tmdb_titles = db.upsert_tmdb_titles
+get_bangumi_season = db.get_bangumi_season
+save_bangumi_season = db.save_bangumi_season
+incremental_vacuum = db.incremental_vacuum
+backup = db.backup
+list_backups = db.list_backups
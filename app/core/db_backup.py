@@ -0,0 +1,163 @@
+"""
+SQLite 在线备份
+- 使用 sqlite3.Connection.backup 分步复制：每步只复制 pages 页、持有读锁的时间很短，步与步之间 sleep，
+  写线程的提交最多等待一步的时间，服务无需停止
+- 其他连接（包括本进程的写线程）在备份期间提交写入会使复制从头开始；连续重启超过 max_restarts 次后
+  改为一步复制完剩余部分，保证持续写入时备份也能结束
+- 先写入 .part 临时文件，quick_check 通过后再原子改名，备份目录中不会出现半截文件
+- 备份文件位于数据库所在目录（即配置目录）的 backups/ 下，按时间命名并只保留最近 keep 份
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BACKUP_DIR_NAME = "backups"
+_PART_SUFFIX = ".part"
+
+# 同一进程内同时只允许一个备份（定时与手动触发可能重叠）
+_backup_lock = threading.Lock()
+
+
+class BackupInProgressError(RuntimeError):
+    """已有备份正在进行"""
+
+
+class _TooManyRestarts(Exception):
+    """分步备份被写入打断次数过多"""
+
+
+def default_backup_dir(db_path: str) -> str:
+    """数据库所在目录下的 backups/"""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), BACKUP_DIR_NAME)
+
+
+def _backup_prefix(db_path: str) -> str:
+    return os.path.splitext(os.path.basename(db_path))[0] + "-"
+
+
+def create_backup(
+    db_path: str,
+    backup_dir: Optional[str] = None,
+    pages: int = 256,
+    sleep: float = 0.02,
+    keep: int = 0,
+    max_restarts: int = 3,
+) -> Dict[str, Any]:
+    """
+    在线备份 db_path 到 backup_dir，返回 {name, path, size, pages, restarts, elapsed_ms}
+    pages: 每步复制的页数（<= 0 表示一步复制完，期间写入会被阻塞，不建议）
+    sleep: 两步之间的休眠秒数
+    keep: 备份完成后只保留最近 keep 份，<= 0 表示不清理
+    max_restarts: 分步复制因写入而重启的次数上限，超过后一步复制完
+    """
+    if not _backup_lock.acquire(blocking=False):
+        raise BackupInProgressError("已有备份正在进行，请稍后再试")
+    try:
+        backup_dir = backup_dir or default_backup_dir(db_path)
+        os.makedirs(backup_dir, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        name = f"{_backup_prefix(db_path)}{stamp}.db"
+        suffix = 1
+        while os.path.exists(os.path.join(backup_dir, name)):
+            name = f"{_backup_prefix(db_path)}{stamp}-{suffix}.db"
+            suffix += 1
+        path = os.path.join(backup_dir, name)
+        part_path = path + _PART_SUFFIX
+
+        start = time.perf_counter()
+        steps = [0]
+        total_pages = [0]
+        restarts = [0]
+        last_remaining = [None]
+
+        def progress(status: int, remaining: int, total: int) -> None:
+            steps[0] += 1
+            total_pages[0] = total
+            # 剩余页数变多说明源库被其他连接修改、复制已从头开始
+            if last_remaining[0] is not None and remaining > last_remaining[0]:
+                restarts[0] += 1
+                if restarts[0] > max_restarts:
+                    raise _TooManyRestarts()
+            last_remaining[0] = remaining
+
+        source = sqlite3.connect(db_path)
+        target = sqlite3.connect(part_path)
+        try:
+            try:
+                source.backup(target, pages=pages, progress=progress, sleep=sleep)
+            except _TooManyRestarts:
+                logger.info(f"备份被写入打断 {restarts[0]} 次，改为一步复制")
+                source.backup(target)
+            check = target.execute("PRAGMA quick_check").fetchone()[0]
+            if check != "ok":
+                raise sqlite3.DatabaseError(f"备份校验失败: {check}")
+        except BaseException:
+            target.close()
+            _remove_quietly(part_path)
+            raise
+        finally:
+            source.close()
+        target.close()
+        os.replace(part_path, path)
+
+        elapsed_ms = int((time.perf_counter() - start) * 1000)
+        size = os.path.getsize(path)
+        logger.info(f"数据库备份完成: {path}（{total_pages[0]} 页，{steps[0]} 步，重启 {restarts[0]} 次，耗时 {elapsed_ms}ms）")
+        if keep > 0:
+            rotate_backups(db_path, backup_dir, keep)
+        return {
+            "name": name, "path": path, "size": size, "pages": total_pages[0],
+            "restarts": restarts[0], "elapsed_ms": elapsed_ms,
+        }
+    finally:
+        _backup_lock.release()
+
+
+def list_backups(db_path: str, backup_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """已有备份，按时间倒序：[{name, path, size, time}]"""
+    backup_dir = backup_dir or default_backup_dir(db_path)
+    if not os.path.isdir(backup_dir):
+        return []
+    prefix = _backup_prefix(db_path)
+    backups = []
+    for entry in os.scandir(backup_dir):
+        if entry.is_file() and entry.name.startswith(prefix) and entry.name.endswith(".db"):
+            stat = entry.stat()
+            backups.append({
+                "name": entry.name,
+                "path": entry.path,
+                "size": stat.st_size,
+                "time": datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d %H:%M:%S"),
+                "_mtime": stat.st_mtime,
+            })
+    # 同一秒内的备份带 -N 后缀，按名称长度再按名称排序保证与创建顺序一致
+    backups.sort(key=lambda b: (b["_mtime"], len(b["name"]), b["name"]), reverse=True)
+    for b in backups:
+        b.pop("_mtime")
+    return backups
+
+
+def rotate_backups(db_path: str, backup_dir: Optional[str], keep: int) -> List[str]:
+    """只保留最近 keep 份备份，返回被删除的文件名"""
+    removed = []
+    for backup in list_backups(db_path, backup_dir)[keep:]:
+        if _remove_quietly(backup["path"]):
+            removed.append(backup["name"])
+    if removed:
+        logger.info(f"已清理旧备份 {len(removed)} 份: {', '.join(removed)}")
+    return removed
+
+
+def _remove_quietly(path: str) -> bool:
+    try:
+        os.remove(path)
+        return True
+    except OSError as e:
+        logger.warning(f"删除备份文件失败: {path}: {e}")
+        return False
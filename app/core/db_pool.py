@@ -0,0 +1,151 @@
+"""
+SQLite 只读连接池
+- 连接数有上限（超出时等待归还），不再随 anyio 线程池的线程数无限增长
+- 池中连接以 PRAGMA query_only 打开，写入只能走单写线程（DbWriter）
+- 取出时做健康检查：残留事务先回滚，空闲超过 health_check_interval 的连接执行 SELECT 1，失败则重建
+- 同一线程嵌套取连接时复用已取出的那条，避免池容量为 1 时自己等自己
+"""
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PoolClosedError(RuntimeError):
+    """连接池已关闭"""
+
+
+class ConnectionPool:
+    """固定上限的只读连接池"""
+
+    def __init__(
+        self,
+        connect: Callable[[], sqlite3.Connection],
+        size: int = 4,
+        timeout: float = 10.0,
+        health_check_interval: float = 30.0,
+    ):
+        """
+        connect: 创建连接的工厂（池会在其上设置 query_only）
+        size: 最大连接数
+        timeout: 池满时等待归还的最长秒数，超时抛出 TimeoutError
+        health_check_interval: 空闲超过该秒数的连接在取出前做一次探活
+        """
+        self._connect = connect
+        self.size = max(1, int(size))
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._idle: Deque[Tuple[sqlite3.Connection, float]] = deque()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._created = 0
+        self._closed = False
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """借出一条只读连接，退出上下文时归还"""
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._acquire()
+        self._local.conn = conn
+        self._local.depth = 1
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._local.depth = 0
+            self._release(conn)
+
+    def stats(self) -> dict:
+        """当前池状态（监控/测试用）"""
+        with self._lock:
+            return {"size": self.size, "open": self._created, "idle": len(self._idle)}
+
+    def close(self) -> None:
+        """关闭池：立即关闭空闲连接，借出中的连接在归还时关闭"""
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._created -= len(idle)
+        for conn, _ in idle:
+            self._close_quietly(conn)
+        logger.info("数据库读连接池已关闭")
+
+    def _acquire(self) -> sqlite3.Connection:
+        if self._closed:
+            raise PoolClosedError("数据库连接池已关闭")
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"等待数据库连接超时（{self.timeout}s，池大小 {self.size}）")
+        try:
+            while True:
+                with self._lock:
+                    item = self._idle.pop() if self._idle else None
+                if item is None:
+                    return self._open()
+                conn, idle_since = item
+                if self._healthy(conn, idle_since):
+                    return conn
+                logger.warning("数据库读连接健康检查失败，已丢弃并重建")
+                self._discard(conn)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            self._slots.release()
+            return
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._idle.append((conn, time.monotonic()))
+        if closed:
+            self._discard(conn)
+        self._slots.release()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = self._connect()
+        conn.execute("PRAGMA query_only = ON")
+        with self._lock:
+            self._created += 1
+        return conn
+
+    def _healthy(self, conn: sqlite3.Connection, idle_since: float) -> bool:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            if time.monotonic() - idle_since >= self.health_check_interval:
+                conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            self._created -= 1
+        self._close_quietly(conn)
+
+    @staticmethod
+    def _close_quietly(conn: sqlite3.Connection) -> None:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
@@ -0,0 +1,194 @@
+"""
+数据库慢查询分析（可选，sqlite.profiling 开启）
+- Database 的每个公开方法作为一个具名查询，记录调用次数与耗时直方图
+- 耗时超过 sqlite.slow_query_ms 的调用记录其执行的 SQL（trace 回调）与 EXPLAIN QUERY PLAN，写日志并保留最近若干条
+- 写操作在写线程上执行，通过 bind 把写线程内执行的 SQL 也归到发起调用的查询名下
+关闭时包装层只做一次布尔判断，连接上也不挂 trace 回调
+"""
+import functools
+import inspect
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List
+
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+# 直方图桶上界（毫秒），最后一个桶收录超过 2500ms 的调用
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+# 每次慢查询最多解析执行计划的语句数
+_MAX_PLANNED_STATEMENTS = 5
+_PLANNABLE_PREFIXES = ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT")
+
+
+class _QueryStats:
+    """单个具名查询的累计统计"""
+
+    __slots__ = ("count", "total_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.buckets[bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+
+    def percentile(self, q: float) -> float:
+        """按桶估算分位数（返回所在桶的上界，落在溢出桶时返回最大值）"""
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS_MS, self.buckets):
+            seen += n
+            if seen >= target:
+                return float(min(bound, self.max_ms))
+        return round(self.max_ms, 2)
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"<={b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "histogram": {label: n for label, n in zip(labels, self.buckets) if n},
+        }
+
+
+class QueryProfiler:
+    """按查询名汇总耗时并记录慢查询"""
+
+    def __init__(self, max_slow_queries: int = 50):
+        self.enabled = False
+        self.slow_ms = 200.0
+        self._lock = threading.Lock()
+        self._stats: Dict[str, _QueryStats] = {}
+        self._slow: Deque[Dict[str, Any]] = deque(maxlen=max_slow_queries)
+        self._local = threading.local()
+
+    def reload_config(self) -> None:
+        """读取 sqlite.profiling / sqlite.slow_query_ms（SQL 采集只对之后新建的连接生效）"""
+        self.enabled = bool(config.get("sqlite.profiling", False))
+        self.slow_ms = float(config.get("sqlite.slow_query_ms", 200))
+
+    def trace(self, sql: str) -> None:
+        """连接的 trace 回调：当前线程处于某次被统计的调用中时收集其 SQL"""
+        statements = getattr(self._local, "statements", None)
+        if statements is not None:
+            statements.append(sql)
+
+    def bind(self, op: Callable) -> Callable:
+        """把写操作在写线程内执行的 SQL 归到当前线程正在统计的调用下；未在统计中时原样返回"""
+        statements = getattr(self._local, "statements", None)
+        if statements is None:
+            return op
+
+        def bound(conn):
+            previous = getattr(self._local, "statements", None)
+            self._local.statements = statements
+            try:
+                return op(conn)
+            finally:
+                self._local.statements = previous
+        return bound
+
+    def call(self, name: str, fn: Callable[[], Any], explain: Callable[[str], List[str]]) -> Any:
+        """执行并统计一次具名查询；嵌套调用各自计时，SQL 归最外层"""
+        outermost = getattr(self._local, "statements", None) is None
+        if outermost:
+            self._local.statements = []
+        start = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            statements = self._local.statements
+            if outermost:
+                self._local.statements = None
+            self.record(name, elapsed_ms)
+            if outermost and elapsed_ms >= self.slow_ms:
+                self._report_slow(name, elapsed_ms, statements, explain)
+
+    def record(self, name: str, elapsed_ms: float) -> None:
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = _QueryStats()
+            stats.add(elapsed_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """当前统计（管理接口用），查询按累计耗时倒序"""
+        with self._lock:
+            ordered = sorted(self._stats.items(), key=lambda kv: kv[1].total_ms, reverse=True)
+            return {
+                "enabled": self.enabled,
+                "slow_query_ms": self.slow_ms,
+                "queries": {name: stats.to_dict() for name, stats in ordered},
+                "slow_queries": list(self._slow),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._slow.clear()
+
+    def _report_slow(
+        self, name: str, elapsed_ms: float, statements: List[str], explain: Callable[[str], List[str]]
+    ) -> None:
+        planned = []
+        seen = set()
+        for sql in statements:
+            if sql in seen or not sql.lstrip().upper().startswith(_PLANNABLE_PREFIXES):
+                continue
+            seen.add(sql)
+            try:
+                plan = explain(sql)
+            except Exception as e:
+                plan = [f"(执行计划获取失败: {e})"]
+            planned.append({"sql": sql, "plan": plan})
+            if len(planned) >= _MAX_PLANNED_STATEMENTS:
+                break
+        entry = {
+            "name": name,
+            "elapsed_ms": round(elapsed_ms, 2),
+            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "statements": planned,
+        }
+        with self._lock:
+            self._slow.append(entry)
+        details = "\n".join(f"  {p['sql']}\n    " + "\n    ".join(p["plan"]) for p in planned)
+        logger.warning(f"慢查询 {name} 耗时 {elapsed_ms:.1f}ms（阈值 {self.slow_ms:.0f}ms）\n{details}")
+
+
+profiler = QueryProfiler()
+
+# 连接/生命周期与备份方法不作为具名查询统计
+_UNPROFILED = {"init_db", "close", "read_conn", "run_write", "explain_query_plan", "backup", "list_backups"}
+
+
+def profile_queries(cls):
+    """类装饰器：把公开方法包装为具名查询（profiler 关闭时直接调用原方法）"""
+    for name, attr in list(vars(cls).items()):
+        if name.startswith("_") or name in _UNPROFILED or not inspect.isfunction(attr):
+            continue
+        setattr(cls, name, _profiled(name, attr))
+    return cls
+
+
+def _profiled(name: str, fn: Callable) -> Callable:
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        if not profiler.enabled:
+            return fn(self, *args, **kwargs)
+        return profiler.call(name, functools.partial(fn, self, *args, **kwargs), self.explain_query_plan)
+    return wrapper
@@ -0,0 +1,230 @@
+"""
+单写线程：所有写操作经队列交给一个专用线程、一条专用连接执行
+- 几毫秒内到达的写操作合并为一个事务，提交一次（fsync 从每条语句一次降为每批一次）
+- 每个操作在批事务内包一层 SAVEPOINT，单个操作失败只回滚自身，不影响同批其他操作
+- 调用方拿到 Future；结果在整批提交成功后才设置，因此调用方随后的读取一定能看到写入
+- 写线程内（写操作回调中）再次提交写操作时直接在当前事务内执行，避免自己等自己死锁
+- 开启或提交事务时数据库被其他连接锁定（SQLITE_BUSY，如另一进程或维护任务持有写锁）时，
+  回滚后整批退避重试，不让一次锁冲突使同批无关的写入全部失败
+- 写线程打开连接失败时，队列中等待的操作全部以该异常失败，下次提交时重新启动写线程
+"""
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 写操作：接收写连接，返回任意结果；不得自行 commit/rollback
+WriteOp = Callable[[sqlite3.Connection], T]
+
+_BUSY_CODES = (getattr(sqlite3, "SQLITE_BUSY", 5), getattr(sqlite3, "SQLITE_LOCKED", 6))
+
+
+def _is_busy(e: BaseException) -> bool:
+    """是否为数据库被锁定（SQLITE_BUSY / SQLITE_LOCKED）"""
+    if not isinstance(e, sqlite3.OperationalError):
+        return False
+    code = getattr(e, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xFF in _BUSY_CODES
+    return "locked" in str(e) or "busy" in str(e)
+
+
+class DbWriter:
+    """串行化并批量提交 SQLite 写操作的后台线程"""
+
+    def __init__(
+        self,
+        connect: Callable[[], sqlite3.Connection],
+        batch_window: float = 0.005,
+        max_batch: int = 200,
+        busy_retries: int = 3,
+        busy_backoff: float = 0.1,
+    ):
+        """
+        connect: 创建写连接的工厂（在写线程内调用）
+        batch_window: 收到第一个操作后继续等待同批操作的时间（秒）
+        max_batch: 单个事务最多合并的操作数
+        busy_retries: 数据库被锁定时整批重试的次数（每次等待 busy_backoff 秒的倍增）
+        """
+        self._connect = connect
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.busy_retries = busy_retries
+        self.busy_backoff = busy_backoff
+        self._queue: "queue.Queue[Optional[Tuple[WriteOp, Future]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def start(self) -> None:
+        """启动写线程（重复调用无副作用）"""
+        with self._lock:
+            self._start_locked()
+
+    def _start_locked(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+        logger.info("数据库写线程已启动")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """处理完队列中已提交的操作后停止写线程"""
+        with self._lock:
+            thread = self._thread
+            if not thread or not thread.is_alive():
+                return
+            self._queue.put(None)
+        thread.join(timeout=timeout)
+        with self._lock:
+            self._thread = None
+        logger.info("数据库写线程已停止")
+
+    def in_writer_thread(self) -> bool:
+        """当前是否运行在写线程内"""
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, op: WriteOp) -> "Future[T]":
+        """提交写操作，返回 Future；写线程未启动时自动启动"""
+        future: Future = Future()
+        if self.in_writer_thread():
+            # 嵌套写：直接在当前批事务内执行
+            try:
+                future.set_result(op(self._conn))
+            except BaseException as e:
+                future.set_exception(e)
+            return future
+        # 在锁内启动并入队：写线程打开连接失败时会在锁内清空队列，之后入队的操作由新启动的线程处理
+        with self._lock:
+            self._start_locked()
+            self._queue.put((op, future))
+        return future
+
+    def run(self, op: WriteOp, timeout: Optional[float] = None) -> T:
+        """提交写操作并等待提交完成，返回操作结果（异常原样抛出）"""
+        return self.submit(op).result(timeout=timeout)
+
+    def _run(self) -> None:
+        try:
+            self._conn = self._connect()
+            # 显式管理事务，避免 sqlite3 模块在 DML 前隐式 BEGIN
+            self._conn.isolation_level = None
+        except Exception as e:
+            logger.error(f"数据库写线程无法打开连接: {e}")
+            self._fail_pending(e)
+            return
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                batch = [item]
+                stopping = self._collect(batch)
+                self._execute(batch)
+                if stopping:
+                    break
+            # 停止信号之后仍可能有操作入队（停止与提交并发），一并执行，避免调用方永远等待
+            leftover = []
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    leftover.append(item)
+            if leftover:
+                self._execute(leftover)
+        finally:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _fail_pending(self, error: BaseException) -> None:
+        """写线程无法工作时退出：清空队列并让所有等待中的操作以 error 失败（下次提交时重新启动写线程）"""
+        with self._lock:
+            self._thread = None
+            pending = []
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    pending.append(item)
+        # 在锁外设置结果：Future 回调中可能再次提交写操作
+        for _, future in pending:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(error)
+
+    def _collect(self, batch: List[Tuple[WriteOp, Future]]) -> bool:
+        """在批窗口内继续收集操作；收到停止信号返回 True"""
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                return False
+            if item is None:
+                return True
+            batch.append(item)
+        return False
+
+    def _execute(self, batch: List[Tuple[WriteOp, Future]]) -> None:
+        """在一个事务内依次执行整批操作，提交后再设置各 Future 的结果；数据库被锁定时整批退避重试"""
+        batch = [(op, future) for op, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        attempt = 0
+        while True:
+            try:
+                outcomes = self._execute_once(batch)
+                break
+            except Exception as e:
+                if _is_busy(e) and attempt < self.busy_retries:
+                    delay = self.busy_backoff * (2 ** attempt)
+                    attempt += 1
+                    logger.warning(f"数据库被锁定，{delay:.2f}s 后整批重试 {len(batch)} 个写操作（第 {attempt} 次）: {e}")
+                    time.sleep(delay)
+                    continue
+                logger.error(f"写事务失败，整批 {len(batch)} 个操作回滚: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                return
+        for future, ok, value in outcomes:
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def _execute_once(self, batch: List[Tuple[WriteOp, Future]]) -> List[Tuple[Future, bool, object]]:
+        """执行一次整批事务并提交；开启/提交失败时回滚并抛出（各操作自身的异常记入结果）"""
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        outcomes: List[Tuple[Future, bool, object]] = []
+        try:
+            for op, future in batch:
+                conn.execute("SAVEPOINT write_op")
+                try:
+                    result = op(conn)
+                    conn.execute("RELEASE write_op")
+                    outcomes.append((future, True, result))
+                except BaseException as e:
+                    conn.execute("ROLLBACK TO write_op")
+                    conn.execute("RELEASE write_op")
+                    outcomes.append((future, False, e))
+            conn.execute("COMMIT")
+        except BaseException:
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+            raise
+        return outcomes
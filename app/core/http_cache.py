@@ -0,0 +1,271 @@
+"""
+外部元数据 HTTP 持久缓存（TMDB / Bangumi / Anime Garden / ASSRT 共用）
+- 响应体与 ETag / Last-Modified 一起存入配置目录下的独立 SQLite 文件（http_cache.db），重启后仍然有效
+- 在 Cache-Control max-age 内直接返回缓存；过期后带 If-None-Match / If-Modified-Since 重新验证，
+  上游返回 304 时沿用缓存的响应体，只消耗一次空响应
+- 总大小超过 cache.http_cache_mb 时按最近访问时间淘汰（LRU）
+- 缓存键为完整 URL（含查询参数）的 SHA-256，文件中不保存 URL 本身，避免 api_key / token 落盘
+只缓存 GET 的 200 响应，且响应须带校验器或 max-age；带 no-store 的响应不缓存
+缓存文件读写失败（被其他进程锁定、文件损坏、磁盘已满）时记录警告并直接请求上游，不影响业务请求
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+HTTP_CACHE_FILENAME = "http_cache.db"
+
+# 单条响应超过总容量的该比例时不缓存，避免一条大响应挤掉全部缓存
+_MAX_ENTRY_FRACTION = 0.1
+# 只保存这些响应头（响应体已由 requests 解压，Content-Encoding / Content-Length 不再适用）
+_KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Cache-Control", "Date")
+_MAX_AGE_RE = re.compile(r"max-age\s*=\s*(\d+)", re.IGNORECASE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS http_cache (
+    key TEXT PRIMARY KEY,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    etag TEXT,
+    lastModified TEXT,
+    freshUntil REAL NOT NULL,
+    lastAccess REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_http_cache_lastAccess ON http_cache(lastAccess);
+"""
+
+
+def cache_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _freshness_seconds(headers) -> Optional[int]:
+    """Cache-Control 允许缓存的秒数；no-store 返回 None，无 max-age / no-cache 返回 0（每次重新验证）"""
+    cache_control = headers.get("Cache-Control") or ""
+    if "no-store" in cache_control.lower():
+        return None
+    if "no-cache" in cache_control.lower():
+        return 0
+    match = _MAX_AGE_RE.search(cache_control)
+    return int(match.group(1)) if match else 0
+
+
+class HttpCache:
+    """SQLite 存储的 HTTP 响应缓存（单连接 + 锁，线程安全）"""
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT headers, body, etag, lastModified, freshUntil FROM http_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"headers": row[0], "body": row[1], "etag": row[2], "last_modified": row[3], "fresh_until": row[4]}
+
+    def touch(self, key: str, fresh_until: Optional[float] = None) -> None:
+        """记录访问时间（LRU），重新验证后同时延长新鲜期"""
+        now = time.time()
+        with self._lock:
+            if fresh_until is None:
+                self._conn.execute("UPDATE http_cache SET lastAccess = ? WHERE key = ?", (now, key))
+            else:
+                self._conn.execute(
+                    "UPDATE http_cache SET lastAccess = ?, freshUntil = ? WHERE key = ?", (now, fresh_until, key)
+                )
+
+    def store(
+        self, key: str, headers: Dict[str, str], body: bytes,
+        etag: Optional[str], last_modified: Optional[str], fresh_until: float,
+    ) -> bool:
+        """写入一条响应，超过单条上限时不写入；写入后按 LRU 淘汰到容量以内"""
+        header_text = json.dumps(headers, ensure_ascii=False)
+        size = len(body) + len(header_text)
+        if size > self.max_bytes * _MAX_ENTRY_FRACTION:
+            return False
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM http_cache WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO http_cache (key, headers, body, etag, lastModified, freshUntil, lastAccess, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, header_text, body, etag, last_modified, fresh_until, now, size),
+            )
+            self._total += size - (old[0] if old else 0)
+            if self._total > self.max_bytes:
+                self._evict_locked()
+        return True
+
+    def _evict_locked(self) -> None:
+        """按最近访问时间从旧到新删除，直到总大小降到容量的 90%（留出余量避免每次写入都淘汰）"""
+        target = self.max_bytes * 0.9
+        removed = 0
+        for key, size in self._conn.execute("SELECT key, size FROM http_cache ORDER BY lastAccess").fetchall():
+            if self._total <= target:
+                break
+            self._conn.execute("DELETE FROM http_cache WHERE key = ?", (key,))
+            self._total -= size
+            removed += 1
+        if removed:
+            logger.debug(f"HTTP 缓存淘汰 {removed} 条，当前 {self._total} 字节")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM http_cache")
+            self._total = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM http_cache").fetchone()[0]
+        return {
+            "entries": count,
+            "bytes": self._total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def fetch(self, send: Callable[..., requests.Response], url: str, params=None, headers=None, **kwargs) -> requests.Response:
+        """
+        经缓存发送 GET：send 为实际发请求的函数（requests.get 或 Session.request 的 GET 包装），
+        签名同 requests.get(url, params=..., headers=..., **kwargs)
+        """
+        full_url = requests.Request("GET", url, params=params).prepare().url
+        key = cache_key(full_url)
+        try:
+            entry = self.lookup(key)
+        except sqlite3.Error as e:
+            logger.warning(f"读取 HTTP 缓存失败，本次直接请求: {e}")
+            return send(url, params=params, headers=headers, **kwargs)
+        now = time.time()
+        if entry is not None and entry["fresh_until"] > now:
+            self.hits += 1
+            self._touch_quietly(key)
+            return _cached_response(entry, full_url)
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry["etag"]:
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+        resp = send(url, params=params, headers=request_headers, **kwargs)
+
+        if entry is not None and resp.status_code == 304:
+            self.revalidated += 1
+            max_age = _freshness_seconds(resp.headers) or 0
+            self._touch_quietly(key, now + max_age)
+            return _cached_response(entry, full_url)
+        self.misses += 1
+        if resp.status_code == 200:
+            self._maybe_store(key, resp, now)
+        return resp
+
+    def _touch_quietly(self, key: str, fresh_until: Optional[float] = None) -> None:
+        """更新访问时间失败只影响 LRU 顺序/新鲜期，不影响本次返回缓存的响应"""
+        try:
+            self.touch(key, fresh_until)
+        except sqlite3.Error as e:
+            logger.warning(f"更新 HTTP 缓存访问时间失败: {e}")
+
+    def _maybe_store(self, key: str, resp: requests.Response, now: float) -> None:
+        max_age = _freshness_seconds(resp.headers)
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        if max_age is None or not (etag or last_modified or max_age > 0):
+            return
+        body = resp.content
+        if not isinstance(body, bytes):
+            return
+        kept = {name: resp.headers[name] for name in _KEPT_HEADERS if resp.headers.get(name)}
+        try:
+            self.store(key, kept, body, etag, last_modified, now + max_age)
+        except sqlite3.Error as e:
+            logger.warning(f"写入 HTTP 缓存失败: {e}")
+
+
+def _cached_response(entry: Dict[str, Any], url: str) -> requests.Response:
+    """由缓存条目构造 requests.Response（from_cache=True）"""
+    resp = requests.Response()
+    resp.status_code = 200
+    resp.reason = "OK"
+    resp.url = url
+    resp.headers = CaseInsensitiveDict(json.loads(entry["headers"]))
+    resp._content = bytes(entry["body"])
+    resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+    resp.from_cache = True
+    return resp
+
+
+_cache: Optional[HttpCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> Optional[HttpCache]:
+    """进程内共用的缓存实例；cache.http_cache_mb 为 0 时返回 None（不缓存）"""
+    global _cache
+    max_mb = float(config.get("cache.http_cache_mb", 100) or 0)
+    if max_mb <= 0:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            path = os.path.join(os.path.dirname(config.get_database_file_path()), HTTP_CACHE_FILENAME)
+            try:
+                _cache = HttpCache(path, int(max_mb * 1024 * 1024))
+            except sqlite3.Error as e:
+                logger.warning(f"打开 HTTP 缓存失败，本次不使用缓存: {e}")
+                return None
+        else:
+            _cache.max_bytes = int(max_mb * 1024 * 1024)
+        return _cache
+
+
+def cached_get(url: str, params=None, headers=None, **kwargs) -> requests.Response:
+    """替代 requests.get：经持久缓存与条件请求获取（缓存关闭时直接请求）"""
+    cache = get_http_cache()
+    if cache is None:
+        return requests.get(url, params=params, headers=headers, **kwargs)
+    return cache.fetch(lambda u, **kw: requests.get(u, **kw), url, params=params, headers=headers, **kwargs)
+
+
+class CachedSession(requests.Session):
+    """GET 请求经持久缓存的 Session（TMDBClient 等基于 Session 连接池的客户端使用）"""
+
+    def request(self, method, url, params=None, headers=None, **kwargs):
+        cache = get_http_cache() if str(method).upper() == "GET" else None
+        if cache is None or kwargs.get("stream"):
+            return super().request(method, url, params=params, headers=headers, **kwargs)
+        return cache.fetch(
+            lambda u, **kw: super(CachedSession, self).request("GET", u, **kw),
+            url, params=params, headers=headers, **kwargs,
+        )
@@ -0,0 +1,32 @@
+"""
+种子 info_hash 解析与规范化
+数据库层（插入任务、迁移回填）与服务层（磁链解析、任务监控）共用，统一为 40 位小写 hex
+"""
+import base64
+import re
+from typing import Optional
+
+
+def normalize_info_hash(raw_hash: str) -> str:
+    """将 info_hash 统一为 40 位小写 hex（兼容 Base32）"""
+    h = raw_hash.strip()
+    if len(h) == 40:
+        return h.lower()
+    if len(h) == 32:
+        try:
+            return base64.b32decode(h.upper()).hex()
+        except Exception:
+            pass
+    return h.lower()
+
+
+def extract_info_hash(task_name: str, source_url: str) -> Optional[str]:
+    """从任务名或磁力链接中提取 info_hash，统一为 40 位小写 hex；无法识别返回 None"""
+    name = (task_name or "").strip()
+    if re.match(r'^[a-fA-F0-9]{40}$', name):
+        return name.lower()
+    if source_url and source_url.startswith("magnet:"):
+        match = re.search(r'xt=urn:btih:([a-zA-Z0-9]+)', source_url)
+        if match:
+            return normalize_info_hash(match.group(1))
+    return None
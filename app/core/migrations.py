@@ -0,0 +1,518 @@
+"""
+数据库版本化迁移
+- schema 版本记录在 PRAGMA user_version（0 表示引入迁移机制之前的旧库）
+- 新库直接执行完整建表脚本并标记为最新版本；旧库按版本号顺序逐个执行未应用的迁移
+- 每个迁移的结构/数据变更在一个事务内完成；大表索引在事务提交后逐条单独创建，
+  每条只短暂持有写锁，期间监控线程与 API 的写入可以穿插进行
+- apply 必须可重入（IF NOT EXISTS / 先检查列是否存在），中途崩溃后下次启动可安全重跑
+"""
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+from app.core.info_hash import extract_info_hash
+
+logger = logging.getLogger(__name__)
+
+# 活跃任务过滤条件：Database.get_active_tasks 与部分索引 idx_task_active 必须逐字一致，SQLite 才会选用该部分索引
+ACTIVE_TASK_FILTER = (
+    "isDelete = 0 AND taskStatus NOT IN ('completed', 'error', 'paused', 'cancelled', 'fetching_metadata_failed')"
+)
+
+# stat_counter 中的计数项：由触发器在增删改时维护，列表总数/未读数直接按主键读取
+COUNTER_TASK_TOTAL = "task.total"
+COUNTER_TASK_STATUS_PREFIX = "task.status:"
+COUNTER_NOTIFICATION_TOTAL = "notification.total"
+COUNTER_NOTIFICATION_UNREAD = "notification.unread"
+# 已归档（未删除）的任务数：不由触发器维护，归档时与搬移在同一事务内累加
+COUNTER_TASK_ARCHIVED = "task.archived"
+
+# 已结束的任务超过 sqlite.archive_after_days 天后整体搬入 *_archive 冷表（保留原 id）
+ARCHIVE_TASK_STATUSES = ("completed", "cancelled")
+# 可归档任务过滤条件：Database.archive_finished_tasks 与部分索引 idx_task_archivable 必须逐字一致
+# （状态以字面量写出，绑定参数时 SQLite 无法判断查询条件蕴含索引条件）
+ARCHIVE_TASK_FILTER = "taskStatus IN (" + ", ".join(f"'{s}'" for s in ARCHIVE_TASK_STATUSES) + ")"
+TASK_COLUMNS = (
+    "id, taskName, taskInfo, sourceUrl, sourcePath, targetPath, taskStatus, createTime, updateTime, isDelete, infoHash"
+)
+FILE_TASK_COLUMNS = (
+    "id, downloadTaskId, sourcePath, targetPath, file_rename, file_status, errorMessage, createTime, updateTime"
+)
+
+# 触发器与 sql/*.sql 中的定义保持一致；UPSERT 使计数行不存在时自动创建
+_COUNTER_UPSERT = "ON CONFLICT(name) DO UPDATE SET value = stat_counter.value + excluded.value"
+COUNTER_TRIGGERS: Tuple[str, ...] = (
+    f"""CREATE TRIGGER IF NOT EXISTS trg_task_counter_insert AFTER INSERT ON download_task
+WHEN NEW.isDelete = 0
+BEGIN
+    INSERT INTO stat_counter (name, value)
+        VALUES ('{COUNTER_TASK_TOTAL}', 1), ('{COUNTER_TASK_STATUS_PREFIX}' || IFNULL(NEW.taskStatus, ''), 1)
+        {_COUNTER_UPSERT};
+END""",
+    # 进度更新也会 SET taskStatus，WHEN 条件保证只有状态/删除标记真正变化时才改计数
+    f"""CREATE TRIGGER IF NOT EXISTS trg_task_counter_update AFTER UPDATE OF taskStatus, isDelete ON download_task
+WHEN OLD.taskStatus IS NOT NEW.taskStatus OR OLD.isDelete IS NOT NEW.isDelete
+BEGIN
+    INSERT INTO stat_counter (name, value)
+        SELECT '{COUNTER_TASK_TOTAL}', (NEW.isDelete = 0) - (OLD.isDelete = 0) WHERE 1
+        UNION ALL SELECT '{COUNTER_TASK_STATUS_PREFIX}' || IFNULL(OLD.taskStatus, ''), -1 WHERE OLD.isDelete = 0
+        UNION ALL SELECT '{COUNTER_TASK_STATUS_PREFIX}' || IFNULL(NEW.taskStatus, ''), 1 WHERE NEW.isDelete = 0
+        {_COUNTER_UPSERT};
+END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_task_counter_delete AFTER DELETE ON download_task
+WHEN OLD.isDelete = 0
+BEGIN
+    UPDATE stat_counter SET value = value - 1
+        WHERE name IN ('{COUNTER_TASK_TOTAL}', '{COUNTER_TASK_STATUS_PREFIX}' || IFNULL(OLD.taskStatus, ''));
+END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_notification_counter_insert AFTER INSERT ON notification
+WHEN NEW.isDelete = 0
+BEGIN
+    INSERT INTO stat_counter (name, value)
+        SELECT '{COUNTER_NOTIFICATION_TOTAL}', 1 WHERE 1
+        UNION ALL SELECT '{COUNTER_NOTIFICATION_UNREAD}', 1 WHERE NEW.isRead = 0
+        {_COUNTER_UPSERT};
+END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_notification_counter_update AFTER UPDATE OF isRead, isDelete ON notification
+WHEN OLD.isRead IS NOT NEW.isRead OR OLD.isDelete IS NOT NEW.isDelete
+BEGIN
+    INSERT INTO stat_counter (name, value)
+        SELECT '{COUNTER_NOTIFICATION_TOTAL}', (NEW.isDelete = 0) - (OLD.isDelete = 0) WHERE 1
+        UNION ALL SELECT '{COUNTER_NOTIFICATION_UNREAD}',
+            (NEW.isDelete = 0 AND NEW.isRead = 0) - (OLD.isDelete = 0 AND OLD.isRead = 0) WHERE 1
+        {_COUNTER_UPSERT};
+END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_notification_counter_delete AFTER DELETE ON notification
+WHEN OLD.isDelete = 0
+BEGIN
+    UPDATE stat_counter SET value = value - (CASE WHEN name = '{COUNTER_NOTIFICATION_UNREAD}' THEN OLD.isRead = 0 ELSE 1 END)
+        WHERE name IN ('{COUNTER_NOTIFICATION_TOTAL}', '{COUNTER_NOTIFICATION_UNREAD}');
+END""",
+)
+
+# 任务全文索引：trigram 分词，任意 3 个字符以上的子串（含中文）都可命中；rowid 即 download_task.id
+TASK_FTS_TABLE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS task_fts USING fts5(taskName, taskInfo, fileNames, tokenize = 'trigram')"
+)
+# 监控写入的进度（format_progress，如 50.0%）也存在 taskInfo 中：不入索引，进度更新也不触发索引改写
+_FTS_TASK_INFO = "CASE WHEN {0}.taskInfo GLOB '[0-9]*%' THEN NULL ELSE {0}.taskInfo END"
+_FTS_FILE_NAMES = "(SELECT group_concat(file_rename, ' ') FROM file_task WHERE downloadTaskId = {0})"
+TASK_FTS_TRIGGERS: Tuple[str, ...] = (
+    f"""CREATE TRIGGER IF NOT EXISTS trg_task_fts_insert AFTER INSERT ON download_task
+WHEN NEW.isDelete = 0
+BEGIN
+    INSERT INTO task_fts (rowid, taskName, taskInfo, fileNames)
+        VALUES (NEW.id, NEW.taskName, {_FTS_TASK_INFO.format("NEW")}, {_FTS_FILE_NAMES.format("NEW.id")});
+END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_task_fts_rename AFTER UPDATE OF taskName ON download_task
+WHEN OLD.taskName IS NOT NEW.taskName
+BEGIN
+    UPDATE task_fts SET taskName = NEW.taskName WHERE rowid = NEW.id;
+END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_task_fts_info AFTER UPDATE OF taskInfo ON download_task
+WHEN OLD.taskInfo IS NOT NEW.taskInfo AND IFNULL(NEW.taskInfo, '') NOT GLOB '[0-9]*%'
+BEGIN
+    UPDATE task_fts SET taskInfo = NEW.taskInfo WHERE rowid = NEW.id;
+END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_task_fts_visibility AFTER UPDATE OF isDelete ON download_task
+WHEN OLD.isDelete IS NOT NEW.isDelete
+BEGIN
+    DELETE FROM task_fts WHERE rowid = OLD.id;
+    INSERT INTO task_fts (rowid, taskName, taskInfo, fileNames)
+        SELECT NEW.id, NEW.taskName, {_FTS_TASK_INFO.format("NEW")}, {_FTS_FILE_NAMES.format("NEW.id")}
+        WHERE NEW.isDelete = 0;
+END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_task_fts_delete AFTER DELETE ON download_task
+BEGIN
+    DELETE FROM task_fts WHERE rowid = OLD.id;
+END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_file_fts_insert AFTER INSERT ON file_task
+BEGIN
+    UPDATE task_fts SET fileNames = {_FTS_FILE_NAMES.format("NEW.downloadTaskId")} WHERE rowid = NEW.downloadTaskId;
+END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_file_fts_update AFTER UPDATE OF file_rename, downloadTaskId ON file_task
+WHEN OLD.file_rename IS NOT NEW.file_rename OR OLD.downloadTaskId IS NOT NEW.downloadTaskId
+BEGIN
+    UPDATE task_fts SET fileNames = {_FTS_FILE_NAMES.format("OLD.downloadTaskId")} WHERE rowid = OLD.downloadTaskId;
+    UPDATE task_fts SET fileNames = {_FTS_FILE_NAMES.format("NEW.downloadTaskId")} WHERE rowid = NEW.downloadTaskId;
+END""",
+    f"""CREATE TRIGGER IF NOT EXISTS trg_file_fts_delete AFTER DELETE ON file_task
+BEGIN
+    UPDATE task_fts SET fileNames = {_FTS_FILE_NAMES.format("OLD.downloadTaskId")} WHERE rowid = OLD.downloadTaskId;
+END""",
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    """单个迁移：版本号严格递增，发布后不可修改"""
+    version: int
+    description: str
+    apply: Optional[Callable[[sqlite3.Connection], None]] = None
+    # 需要在线创建的索引（CREATE INDEX IF NOT EXISTS ...），apply 提交后逐条执行
+    indexes: Tuple[str, ...] = ()
+    # PRAGMA journal_mode / VACUUM 等不能在事务内执行的变更置为 False
+    transactional: bool = True
+
+
+def _create_base_tables(conn: sqlite3.Connection) -> None:
+    """v1：引入迁移机制前的基础表结构（旧库已存在时为空操作）"""
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS download_task ("
+        " id INTEGER PRIMARY KEY AUTOINCREMENT, taskName TEXT NOT NULL, taskInfo TEXT, sourceUrl TEXT,"
+        " sourcePath TEXT, targetPath TEXT, taskStatus TEXT, createTime DATETIME, updateTime DATETIME,"
+        " isDelete INTEGER NOT NULL DEFAULT 0)"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS file_task ("
+        " id INTEGER PRIMARY KEY AUTOINCREMENT, downloadTaskId INTEGER, sourcePath TEXT NOT NULL,"
+        " targetPath TEXT NOT NULL, file_rename TEXT NOT NULL, file_status TEXT NOT NULL DEFAULT 'pending',"
+        " errorMessage TEXT, createTime DATETIME, updateTime DATETIME,"
+        " FOREIGN KEY (downloadTaskId) REFERENCES download_task(id))"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS notification ("
+        " id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, content TEXT,"
+        " type TEXT NOT NULL DEFAULT 'info', isRead INTEGER NOT NULL DEFAULT 0, createTime DATETIME,"
+        " isDelete INTEGER NOT NULL DEFAULT 0)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_taskName ON download_task(taskName)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_fileOpStatus ON file_task(file_status)")
+
+
+def _drop_superseded_notification_index(conn: sqlite3.Connection) -> None:
+    """v2：idx_notif_isRead 已被 idx_notif_read_list 覆盖，删除以减少写放大"""
+    conn.execute("DROP INDEX IF EXISTS idx_notif_isRead")
+
+
+def _add_info_hash(conn: sqlite3.Connection) -> None:
+    """
+    v3：为 download_task 增加规范化的 infoHash 列，并从 sourceUrl/taskName 一次性回填。
+    旧数据中同一 Hash 可能有多个活跃任务（监控只处理最早一条）：保留最早一条，其余标记为 error
+    （保留 infoHash，仍可按 Hash 查到），以便随后创建活跃任务唯一索引。
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(download_task)")}
+    if "infoHash" not in columns:
+        conn.execute("ALTER TABLE download_task ADD COLUMN infoHash TEXT")
+    rows = conn.execute("SELECT id, taskName, sourceUrl FROM download_task WHERE infoHash IS NULL").fetchall()
+    updates = []
+    for row in rows:
+        info_hash = extract_info_hash(row[1], row[2])
+        if info_hash:
+            updates.append((info_hash, row[0]))
+    if updates:
+        conn.executemany("UPDATE download_task SET infoHash = ? WHERE id = ?", updates)
+        logger.info(f"已回填 infoHash: {len(updates)} 条")
+    kept = {}
+    duplicates = []
+    for row in conn.execute(
+        f"SELECT id, infoHash, taskName FROM download_task WHERE infoHash IS NOT NULL AND {ACTIVE_TASK_FILTER} ORDER BY id"
+    ).fetchall():
+        if row[1] in kept:
+            logger.warning(
+                f"任务 {row[0]}（{row[2]}）与任务 {kept[row[1]]} 是同一 Hash 的重复活跃任务，标记为 error: {row[1]}"
+            )
+            duplicates.append((row[0],))
+        else:
+            kept[row[1]] = row[0]
+    if duplicates:
+        conn.executemany(
+            "UPDATE download_task SET taskStatus = 'error', updateTime = datetime('now', 'localtime') WHERE id = ?",
+            duplicates,
+        )
+
+
+def _table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone() is not None
+
+
+def rebuild_counters(conn: sqlite3.Connection) -> None:
+    """按当前数据重新计算 stat_counter（迁移回填；计数与实际不符时也可手动调用修复）"""
+    conn.execute("DELETE FROM stat_counter")
+    conn.execute(
+        "INSERT INTO stat_counter (name, value) "
+        "SELECT ?, COUNT(*) FROM download_task WHERE isDelete = 0 "
+        "UNION ALL SELECT ?, COUNT(*) FROM notification WHERE isDelete = 0 "
+        "UNION ALL SELECT ?, COUNT(*) FROM notification WHERE isDelete = 0 AND isRead = 0",
+        (COUNTER_TASK_TOTAL, COUNTER_NOTIFICATION_TOTAL, COUNTER_NOTIFICATION_UNREAD),
+    )
+    conn.execute(
+        "INSERT INTO stat_counter (name, value) "
+        "SELECT ? || IFNULL(taskStatus, ''), COUNT(*) FROM download_task WHERE isDelete = 0 "
+        "GROUP BY IFNULL(taskStatus, '')",
+        (COUNTER_TASK_STATUS_PREFIX,),
+    )
+    # 早期迁移（v4）执行时归档表尚不存在
+    if _table_exists(conn, "download_task_archive"):
+        conn.execute(
+            "INSERT INTO stat_counter (name, value) SELECT ?, COUNT(*) FROM download_task_archive WHERE isDelete = 0",
+            (COUNTER_TASK_ARCHIVED,),
+        )
+
+
+def _add_stat_counters(conn: sqlite3.Connection) -> None:
+    """v4：触发器维护的计数表，替代未读数与列表总数的 COUNT(*)"""
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS stat_counter ("
+        " name TEXT PRIMARY KEY NOT NULL, value INTEGER NOT NULL DEFAULT 0) WITHOUT ROWID"
+    )
+    for ddl in COUNTER_TRIGGERS:
+        conn.execute(ddl)
+    rebuild_counters(conn)
+
+
+def _add_notification_collapse(conn: sqlite3.Connection) -> None:
+    """v5：通知折叠键与重复计数，同一任务的同类事件重复发生时更新已有通知而不是再插一行"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(notification)")}
+    if "collapseKey" not in columns:
+        conn.execute("ALTER TABLE notification ADD COLUMN collapseKey TEXT")
+    if "repeatCount" not in columns:
+        conn.execute("ALTER TABLE notification ADD COLUMN repeatCount INTEGER NOT NULL DEFAULT 1")
+
+
+def _enable_incremental_vacuum(conn: sqlite3.Connection) -> None:
+    """
+    v6：auto_vacuum 切换为 INCREMENTAL，之后由定时维护执行 PRAGMA incremental_vacuum 归还空闲页。
+    已有库切换模式必须整库 VACUUM 一次（耗时与库大小成正比，只在升级时发生一次）
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return
+    conn.commit()
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    start = time.perf_counter()
+    conn.execute("VACUUM")
+    elapsed_ms = int((time.perf_counter() - start) * 1000)
+    logger.info(f"已切换为增量 VACUUM 模式（整库 VACUUM 耗时 {elapsed_ms}ms）")
+
+
+def _enable_wal(conn: sqlite3.Connection) -> None:
+    """
+    v11：切换为 WAL 日志模式（持久保存在库文件中）。读连接不再阻塞写线程提交，写入也不阻塞读；
+    synchronous = NORMAL 为连接级设置，见 Database._connect
+    """
+    conn.commit()
+    mode = conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+    if str(mode).lower() != "wal":
+        logger.warning(f"切换 WAL 日志模式失败，当前模式: {mode}")
+
+
+# 旧数据缺失创建时间时的回填值：排在所有有时间的行之后，与 NULL 在倒序列表中的位置一致
+_MISSING_CREATE_TIME = "1970-01-01 00:00:00"
+
+
+def _backfill_create_time(conn: sqlite3.Connection) -> None:
+    """
+    v13：回填 createTime 为 NULL 的旧行（任务取 updateTime）。游标分页按 (createTime, id) 比较，
+    NULL 既无法编码进游标，也永远不满足行值比较，这些行翻页时会被跳过
+    """
+    for table in ("download_task", "download_task_archive"):
+        conn.execute(
+            f"UPDATE {table} SET createTime = COALESCE(updateTime, ?) WHERE createTime IS NULL",
+            (_MISSING_CREATE_TIME,),
+        )
+    conn.execute("UPDATE notification SET createTime = ? WHERE createTime IS NULL", (_MISSING_CREATE_TIME,))
+
+
+def index_tasks_fts(
+    conn: sqlite3.Connection, task_table: str, file_table: str, where: str = "1", params: tuple = ()
+) -> None:
+    """把 task_table 中满足 where 的未删除任务写入 task_fts（文件名取自 file_table）"""
+    conn.execute(
+        "INSERT INTO task_fts (rowid, taskName, taskInfo, fileNames) "
+        f"SELECT d.id, d.taskName, {_FTS_TASK_INFO.format('d')}, "
+        f"(SELECT group_concat(file_rename, ' ') FROM {file_table} WHERE downloadTaskId = d.id) "
+        f"FROM {task_table} d WHERE d.isDelete = 0 AND {where}",
+        params,
+    )
+
+
+def rebuild_task_fts(conn: sqlite3.Connection) -> None:
+    """按当前数据重建任务全文索引（迁移回填；索引与数据不符时也可手动调用修复），已归档任务同样可搜索"""
+    conn.execute("DELETE FROM task_fts")
+    index_tasks_fts(conn, "download_task", "file_task")
+    if _table_exists(conn, "download_task_archive"):
+        index_tasks_fts(conn, "download_task_archive", "file_task_archive")
+
+
+def _add_task_fts(conn: sqlite3.Connection) -> None:
+    """v7：任务名/描述/重命名文件名的 FTS5 全文索引与同步触发器"""
+    conn.execute(TASK_FTS_TABLE)
+    for ddl in TASK_FTS_TRIGGERS:
+        conn.execute(ddl)
+    rebuild_task_fts(conn)
+
+
+def _add_archive_tables(conn: sqlite3.Connection) -> None:
+    """v8：已结束任务的冷归档表，列与热表一致（保留原 id）并多一列归档时间"""
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS download_task_archive ("
+        " id INTEGER PRIMARY KEY, taskName TEXT NOT NULL, taskInfo TEXT, sourceUrl TEXT, sourcePath TEXT,"
+        " targetPath TEXT, taskStatus TEXT, createTime DATETIME, updateTime DATETIME,"
+        " isDelete INTEGER NOT NULL DEFAULT 0, infoHash TEXT, archiveTime DATETIME)"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS file_task_archive ("
+        " id INTEGER PRIMARY KEY, downloadTaskId INTEGER, sourcePath TEXT NOT NULL, targetPath TEXT NOT NULL,"
+        " file_rename TEXT NOT NULL, file_status TEXT NOT NULL DEFAULT 'pending', errorMessage TEXT,"
+        " createTime DATETIME, updateTime DATETIME)"
+    )
+
+
+def _add_tmdb_title(conn: sqlite3.Connection) -> None:
+    """v9：TMDB id → 英文标题 / 别名映射，海盗湾英文搜索按主键读取，不再每次请求 TMDB"""
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS tmdb_title ("
+        " mediaType TEXT NOT NULL, tmdbId INTEGER NOT NULL, englishTitle TEXT, altTitles TEXT,"
+        " updateTime DATETIME, PRIMARY KEY (mediaType, tmdbId)) WITHOUT ROWID"
+    )
+
+
+def _add_bangumi_season(conn: sqlite3.Connection) -> None:
+    """v10：已结束季度的 Bangumi 番剧表（整理后的 JSON），历史季度只请求一次"""
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS bangumi_season ("
+        " year INTEGER NOT NULL, season TEXT NOT NULL, data TEXT NOT NULL, updateTime DATETIME,"
+        " PRIMARY KEY (year, season)) WITHOUT ROWID"
+    )
+
+
+MIGRATIONS: Tuple[Migration, ...] = (
+    Migration(1, "基础表结构", _create_base_tables),
+    Migration(
+        2,
+        "热点查询索引",
+        _drop_superseded_notification_index,
+        indexes=(
+            # get_active_tasks：监控每轮执行，部分索引只收录未完成任务，历史任务再多也不影响
+            f"CREATE INDEX IF NOT EXISTS idx_task_active ON download_task(isDelete) WHERE {ACTIVE_TASK_FILTER}",
+            # get_download_tasks：COUNT 走覆盖索引，ORDER BY createTime DESC 免排序；
+            # 索引隐含 rowid(id) 作尾列，游标分页的 (createTime, id) 条件可直接定位
+            "CREATE INDEX IF NOT EXISTS idx_task_list ON download_task(isDelete, createTime)",
+            # get_file_tasks / update_file_tasks_by_download_task_id
+            "CREATE INDEX IF NOT EXISTS idx_fileTask_downloadTaskId ON file_task(downloadTaskId)",
+            # get_notifications（不筛已读状态）
+            "CREATE INDEX IF NOT EXISTS idx_notif_list ON notification(isDelete, createTime)",
+            # get_notifications(is_read=...) / get_unread_count / mark_all_notifications_read
+            "CREATE INDEX IF NOT EXISTS idx_notif_read_list ON notification(isDelete, isRead, createTime)",
+        ),
+    ),
+    Migration(
+        3,
+        "infoHash 列与回填",
+        _add_info_hash,
+        indexes=(
+            # get_tasks_by_hash：添加任务查重、取消任务
+            "CREATE INDEX IF NOT EXISTS idx_task_infoHash ON download_task(infoHash)",
+            # 同一 Hash 至多一个活跃任务（已完成/已取消的历史任务允许重复下载）
+            f"CREATE UNIQUE INDEX IF NOT EXISTS uq_task_infoHash_active ON download_task(infoHash) "
+            f"WHERE infoHash IS NOT NULL AND {ACTIVE_TASK_FILTER}",
+        ),
+    ),
+    Migration(4, "计数表与维护触发器", _add_stat_counters),
+    Migration(
+        5,
+        "通知折叠键",
+        _add_notification_collapse,
+        indexes=(
+            # 同一折叠键至多一条未删除通知；insert_notification(collapse_key=...) 据此定位待更新的行
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_notif_collapseKey ON notification(collapseKey) "
+            "WHERE collapseKey IS NOT NULL AND isDelete = 0",
+        ),
+    ),
+    Migration(6, "增量 VACUUM", _enable_incremental_vacuum, transactional=False),
+    Migration(7, "任务全文索引", _add_task_fts),
+    Migration(
+        8,
+        "已结束任务归档表",
+        _add_archive_tables,
+        indexes=(
+            # 含历史的任务列表：与 idx_task_list 相同的排序/游标定位方式
+            "CREATE INDEX IF NOT EXISTS idx_task_archive_list ON download_task_archive(isDelete, createTime)",
+            "CREATE INDEX IF NOT EXISTS idx_fileTaskArchive_downloadTaskId ON file_task_archive(downloadTaskId)",
+        ),
+    ),
+    Migration(9, "TMDB 英文标题表", _add_tmdb_title),
+    Migration(10, "Bangumi 历史季度缓存表", _add_bangumi_season),
+    Migration(11, "WAL 日志模式", _enable_wal, transactional=False),
+    Migration(
+        12,
+        "可归档任务索引",
+        indexes=(
+            # archive_finished_tasks：按 updateTime 直接定位已结束且超期的任务，每批不再从头扫描热表
+            f"CREATE INDEX IF NOT EXISTS idx_task_archivable ON download_task(updateTime) WHERE {ARCHIVE_TASK_FILTER}",
+        ),
+    ),
+    Migration(13, "回填缺失的创建时间", _backfill_create_time),
+)
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """读取当前 schema 版本（PRAGMA user_version）"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def set_schema_version(conn: sqlite3.Connection, version: int) -> None:
+    """写入 schema 版本；PRAGMA 不支持参数绑定，这里强制转 int 防注入"""
+    conn.execute(f"PRAGMA user_version = {int(version)}")
+
+
+def _create_index_online(conn: sqlite3.Connection, ddl: str) -> None:
+    """单独一个短事务创建索引，建完立即提交释放写锁"""
+    start = time.perf_counter()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(ddl)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    elapsed_ms = int((time.perf_counter() - start) * 1000)
+    logger.info(f"索引已就绪（耗时 {elapsed_ms}ms）: {' '.join(ddl.split())[:120]}")
+    # 让出 CPU，便于等待写锁的其他连接在两条索引之间插入
+    time.sleep(0)
+
+
+def _apply_migration(conn: sqlite3.Connection, migration: Migration) -> None:
+    """执行单个迁移并推进版本号"""
+    if migration.transactional:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if migration.apply:
+                migration.apply(conn)
+            if not migration.indexes:
+                set_schema_version(conn, migration.version)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    elif migration.apply:
+        migration.apply(conn)
+
+    if migration.indexes or not migration.transactional:
+        for ddl in migration.indexes:
+            _create_index_online(conn, ddl)
+        set_schema_version(conn, migration.version)
+        conn.commit()
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """将数据库升级到最新版本，返回升级后的版本号"""
+    current = get_schema_version(conn)
+    pending = [m for m in MIGRATIONS if m.version > current]
+    if not pending:
+        return current
+    logger.info(f"数据库结构版本 {current} → {LATEST_VERSION}，待执行迁移 {len(pending)} 个")
+    for migration in pending:
+        start = time.perf_counter()
+        try:
+            _apply_migration(conn, migration)
+        except Exception:
+            logger.exception(f"数据库迁移失败: v{migration.version} {migration.description}")
+            raise
+        elapsed_ms = int((time.perf_counter() - start) * 1000)
+        logger.info(f"数据库迁移完成: v{migration.version} {migration.description}（耗时 {elapsed_ms}ms）")
+    return get_schema_version(conn)
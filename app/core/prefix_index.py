@@ -0,0 +1,91 @@
+"""
+标题前缀索引（搜索补全本地优先）
+- 每个媒体类型一个按规范化标题（NFKC、casefold、合并空白）排序的键数组，前缀匹配用二分定位到连续区间，
+  再在区间内取权重最高的若干个；比逐字符的字典树节省一个数量级的内存，2 万标题下单次查询约 1ms
+- 标题来源：TMDB 列表/搜索结果、Bangumi 放送表、用户的历史搜索；重复出现时累加权重
+- 标题数达到上限后不再收录新标题（已有标题仍累加权重），进程重启后从空索引开始
+"""
+import bisect
+import heapq
+import re
+import threading
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import config
+
+_SPACE_RE = re.compile(r"\s+")
+# 大于任何字符的哨兵：[prefix, prefix + _MAX_CHAR) 即所有以 prefix 开头的键
+_MAX_CHAR = "\U0010ffff"
+
+
+def normalize_title(text: str) -> str:
+    """规范化：全角转半角、忽略大小写、合并空白"""
+    return _SPACE_RE.sub(" ", unicodedata.normalize("NFKC", text or "").casefold()).strip()
+
+
+class PrefixIndex:
+    """按媒体类型分开的标题前缀索引（线程安全）"""
+
+    def __init__(self, max_titles: int = 20000):
+        self.max_titles = max_titles
+        self._lock = threading.Lock()
+        # 媒体类型 → 有序的规范化标题
+        self._keys: Dict[str, List[str]] = {}
+        # 媒体类型 → 规范化标题 → (首次出现的原始写法, 累计权重)
+        self._titles: Dict[str, Dict[str, Tuple[str, float]]] = {}
+        self._count = 0
+
+    def add(self, title: str, kind: str, weight: float = 1.0) -> bool:
+        """收录或加权一个标题，返回是否写入（空标题或达到上限的新标题返回 False）"""
+        key = normalize_title(title)
+        if not key:
+            return False
+        with self._lock:
+            titles = self._titles.setdefault(kind, {})
+            entry = titles.get(key)
+            if entry is None:
+                if self._count >= self.max_titles:
+                    return False
+                self._count += 1
+                bisect.insort(self._keys.setdefault(kind, []), key)
+                entry = (title.strip(), 0.0)
+            titles[key] = (entry[0], entry[1] + weight)
+        return True
+
+    def add_many(self, titles: Iterable[Optional[str]], kind: str, weight: float = 1.0) -> int:
+        return sum(1 for t in titles if t and self.add(t, kind, weight))
+
+    def search(self, prefix: str, limit: int = 10, kind: str = "") -> List[str]:
+        """前缀匹配，按权重降序（同权重短标题优先）返回原始写法；kind 为空时合并所有媒体类型"""
+        key = normalize_title(prefix)
+        if not key or limit <= 0:
+            return []
+        candidates: Dict[str, float] = {}
+        with self._lock:
+            for k in ([kind] if kind else list(self._keys)):
+                keys = self._keys.get(k)
+                if not keys:
+                    continue
+                lo = bisect.bisect_left(keys, key)
+                hi = bisect.bisect_left(keys, key + _MAX_CHAR, lo)
+                titles = self._titles[k]
+                for title_key in heapq.nsmallest(
+                    limit, keys[lo:hi], key=lambda t: (-titles[t][1], len(t), t)
+                ):
+                    display, total = titles[title_key]
+                    candidates[display] = max(candidates.get(display, 0), total)
+        ranked = sorted(candidates.items(), key=lambda item: (-item[1], len(item[0]), item[0]))
+        return [display for display, _ in ranked[:limit]]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys.clear()
+            self._titles.clear()
+            self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+
+title_index = PrefixIndex(int(config.get("cache.suggest_index_titles", 20000)))
@@ -0,0 +1,84 @@
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.core.http_cache import CachedSession
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://api.themoviedb.org/3"
+
+
+class TMDBError(requests.RequestException):
+    """TMDB 返回了业务错误（success=false / status_message）"""
+
+
+class TMDBClient:
+    """TMDB v3 REST 客户端
+
+    - 所有请求共用一个带连接池的 Session（经持久 HTTP 缓存），多线程并发调用安全
+    - 语言按请求传入，不修改共享状态；未传入时用默认语言
+    - 列表接口显式返回 (results, total_results)
+    - 429 / 5xx 按 Retry-After 退避重试
+    """
+
+    def __init__(
+        self,
+        api_key: str = "",
+        base_url: str = DEFAULT_BASE_URL,
+        language: str = "zh-CN",
+        pool_size: int = 16,
+        timeout: float = 10,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.language = language
+        self.timeout = timeout
+        self.session = CachedSession()
+        retry = Retry(
+            total=2,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def configure(self, api_key: str, base_url: str, language: str) -> None:
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.language = language
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None, language: Optional[str] = None) -> Dict[str, Any]:
+        """GET {base_url}{path}，返回 JSON；HTTP 错误抛 requests.HTTPError，业务错误抛 TMDBError"""
+        if not self.api_key:
+            raise TMDBError("未配置 TMDB API Key")
+        query = {"api_key": self.api_key, "language": language or self.language}
+        if params:
+            query.update(params)
+        resp = self.session.get(f"{self.base_url}{path}", params=query, timeout=self.timeout)
+        resp.raise_for_status()
+        data = resp.json()
+        if isinstance(data, dict) and data.get("success") is False:
+            raise TMDBError(data.get("status_message") or "TMDB 请求失败")
+        return data
+
+    def get_page(
+        self, path: str, page: int = 1, params: Optional[Dict[str, Any]] = None, language: Optional[str] = None
+    ) -> Tuple[List[dict], int]:
+        """分页列表接口，返回 (results, total_results)"""
+        data = self.get(path, {**(params or {}), "page": page}, language=language)
+        results = data.get("results") if isinstance(data, dict) else None
+        if not isinstance(results, list):
+            return [], 0
+        try:
+            total = int(data.get("total_results") or len(results))
+        except (TypeError, ValueError):
+            total = len(results)
+        return results, total
@@ -0,0 +1,170 @@
+"""
+进程内 TTL + LRU 缓存（线程安全）
+- 每个条目带独立的过期时间，读取时惰性淘汰过期条目
+- 条目数超过 max_entries 时淘汰最久未访问的条目，内存占用有上界
+- stale-while-revalidate：过期但仍在 stale_ttl 宽限期内的条目立即返回旧值，并在后台只发起一次刷新
+用于外部元数据接口（TMDB 列表等）这类变化慢、访问集中的数据
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# 后台刷新共用的线程池（所有缓存实例共享，限制对上游的并发）
+_refresh_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+
+
+class TTLCache:
+    """按条目 TTL 过期、按 LRU 淘汰的缓存；max_entries <= 0 时不缓存"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        # key -> (新鲜截止时间, 可返回旧值的截止时间, 值)
+        self._data: "OrderedDict[Hashable, Tuple[float, float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing: set = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """取未过期的值并标记为最近使用；不存在或已过期时返回 default"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            fresh_until, stale_until, value = entry
+            if fresh_until <= now:
+                if stale_until <= now:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float, stale_ttl: float = 0) -> None:
+        """写入条目，ttl 为新鲜秒数，stale_ttl 为过期后仍可作为旧值返回的秒数"""
+        if self.max_entries <= 0 or ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._data[key] = (now + ttl, now + ttl + max(stale_ttl, 0), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        ttl: float,
+        cacheable: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """命中直接返回，否则调用 loader 加载；cacheable 返回 False 的结果（如请求失败的空列表）不写入缓存"""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = loader()
+        if cacheable is None or cacheable(value):
+            self.set(key, value, ttl)
+        return value
+
+    def get_or_refresh(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        ttl: float,
+        stale_ttl: float,
+        cacheable: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        stale-while-revalidate 读取：新鲜直接返回；过期但在宽限期内返回旧值并在后台刷新（同一 key 同时只刷新一次）；
+        不存在或超出宽限期时同步加载
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                fresh_until, stale_until, value = entry
+                if now < fresh_until:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                if now < stale_until:
+                    self._data.move_to_end(key)
+                    self.stale_hits += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        _refresh_pool.submit(self._background_refresh, key, loader, ttl, stale_ttl, cacheable)
+                    return value
+                del self._data[key]
+            self.misses += 1
+        value = loader()
+        if cacheable is None or cacheable(value):
+            self.set(key, value, ttl, stale_ttl)
+        return value
+
+    def refresh(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        ttl: float,
+        stale_ttl: float = 0,
+        cacheable: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """同步重新加载并写入（预热用），不可缓存的结果不覆盖已有旧值"""
+        value = loader()
+        if cacheable is None or cacheable(value):
+            self.set(key, value, ttl, stale_ttl)
+        return value
+
+    def fresh_seconds(self, key: Hashable) -> float:
+        """条目剩余的新鲜秒数，不存在或已过期返回 0"""
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None:
+            return 0.0
+        return max(entry[0] - time.monotonic(), 0.0)
+
+    def _background_refresh(self, key, loader, ttl, stale_ttl, cacheable) -> None:
+        try:
+            self.refresh(key, loader, ttl, stale_ttl, cacheable)
+        except Exception as e:
+            # 刷新失败保留旧值，宽限期内下次访问会再次尝试
+            logger.warning(f"缓存后台刷新失败 {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def resize(self, max_entries: int) -> None:
+        """调整容量，超出部分按 LRU 淘汰"""
+        with self._lock:
+            self.max_entries = max_entries
+            while self._data and len(self._data) > max(max_entries, 0):
+                self._data.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
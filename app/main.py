@@ -13,6 +13,8 @@ from app.api.v1.api import api_router
 from app.core import db
 from app.core.auth_middleware import JWTAuthMiddleware
 from app.core.handlers import register_exception_handlers
+from app.services.cache_warmer import cache_warmer
+from app.services.db_maintenance import db_maintenance
 from app.services.task_monitor import task_monitor
 
 # 修复 Windows 下 MIME 类型可能不正确的问题
@@ -88,14 +90,19 @@ def get_version():
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # 启动：初始化数据库并启动任务监控
+    # 启动：初始化数据库并启动任务监控、数据库定时维护、首页缓存预热
     logger.info(f"ZongziBay v{get_version()} 正在启动...")
     db.init_db()
     task_monitor.start()
+    db_maintenance.start()
+    cache_warmer.start()
     logger.info("服务已就绪，监听 http://127.0.0.1:8000")
     yield
-    # 关闭：停止任务监控
+    # 关闭：停止任务监控、定时维护与缓存预热，再等写线程落盘已排队的写操作并关闭读连接池
     task_monitor.stop()
+    db_maintenance.stop()
+    cache_warmer.stop()
+    db.close_db()
     logger.info("服务已停止")
 
 
@@ -55,3 +55,9 @@ class BangumiSubjectDetail(BaseModel):
     rank: Optional[int] = None
     tags: List[BangumiTag] = []
     url: Optional[str] = None
+
+
+class BangumiSubjectBatch(BaseModel):
+    """批量条目详情"""
+    items: List[BangumiSubjectDetail] = []
+    failed: List[int] = []
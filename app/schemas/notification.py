@@ -21,9 +21,11 @@ class Notification(BaseModel):
     isRead: int
     createTime: Optional[str] = None
     isDelete: int
+    repeatCount: int = 1  # 同一折叠键的事件累计次数，大于 1 时前端可显示「×N」
 
 
 class NotificationPage(BaseModel):
-    """通知分页响应"""
+    """通知分页响应：total 仅在 with_total=true 时返回；next_cursor 为 None 表示已无更多"""
     items: List[Notification]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
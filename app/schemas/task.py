@@ -58,6 +58,7 @@ class DownloadTask(BaseModel):
     createTime: Optional[str] = None
     updateTime: Optional[str] = None
     isDelete: int
+    archived: bool = False  # 是否来自归档表（仅 include_history / 搜索结果中可能为 true）
     file_tasks: List[FileTask] = []
 
 
@@ -73,6 +74,7 @@ class AddTaskRequest(BaseModel):
 
 
 class TaskListResponse(BaseModel):
-    """任务列表分页响应"""
-    total: int
+    """任务列表分页响应：total 仅在 with_total=true 时返回；next_cursor 为 None 表示已无更多"""
+    total: Optional[int] = None
     items: List[DownloadTask]
+    next_cursor: Optional[str] = None
@@ -1,10 +1,15 @@
 import logging
 import re
-from typing import List, Optional
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
 
 import requests
 
 from app.core.config import config
+from app.core.config_executor import ConfigExecutor
+from app.core.http_cache import cached_get
+from app.core.ttl_cache import TTLCache
 from app.schemas.anime_garden import (
     AnimeGardenResponse,
     AnimeGardenResource,
@@ -28,6 +33,29 @@ _SEARCH_SPLIT_PATTERNS = [
 ]
 
 
+# 拆分搜索与核心词回退搜索并发请求共用的线程池（限制对 animes.garden 的并发）
+_request_pool = ConfigExecutor("anime_garden.max_concurrency", 4, thread_name_prefix="anime-garden")
+
+
+# 下一页预取单独一个线程：预取的搜索会向 _request_pool 提交回退搜索，共用时可能占满线程池互相等待
+_prefetch_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="anime-garden-prefetch")
+
+# 搜索结果短期缓存（翻页返回、重复搜索直接命中），键为 (拆分后的搜索词, 页码, 每页数量, 字幕组)
+_SEARCH_TTL = 300
+# 用户请求的页正在预取时最多等待的秒数（拆分/回退搜索并发，约为一次请求的超时），超时后自行请求
+_PREFETCH_WAIT = 15
+_SEARCH_CACHE_ENTRIES = 256
+# 字幕组列表很少变化：一天内视为新鲜，过期后一周内先返回旧列表并在后台刷新
+_TEAMS_KEY = "teams"
+_TEAMS_TTL = 24 * 3600
+_TEAMS_STALE_SECONDS = 7 * 24 * 3600
+
+
+def _has_next_page(result: dict) -> bool:
+    pagination = result.get("pagination")
+    return bool(pagination) and not pagination.get("complete", True) and bool(result.get("resources"))
+
+
 def _teams_url() -> str:
     url = config.get("anime_garden.url", "https://animes.garden/api/resources")
     base = url.rstrip("/").replace("/resources", "")
@@ -47,6 +75,9 @@ class AnimeGardenService:
     分开传），比传一个完整的 "葬送的芙莉莲第三季" 分词效果更好。
 
     回退策略：若拆分搜索返回结果太少，自动回退到仅用核心番剧名做宽泛搜索。
+    回退搜索与拆分搜索同时发出，不需要时丢弃，结果少时不再多等一轮请求。
+
+    缓存：搜索结果短期缓存，返回第 N 页后在后台预取第 N+1 页；字幕组列表长期缓存。
     """
 
     def __init__(self):
@@ -55,15 +86,26 @@ class AnimeGardenService:
             self.page_size = int(config.get("anime_garden.page_size", 20))
         except (ValueError, TypeError):
             self.page_size = 20
+        self._cache = TTLCache(max_entries=_SEARCH_CACHE_ENTRIES)
+        # 字幕组列表单独存放，不会被翻页/预取写入的搜索结果按 LRU 挤掉
+        self._teams = TTLCache(max_entries=1)
+        self._lock = threading.Lock()
+        # 进行中的下一页预取：缓存键 → Future（同一页的用户请求直接等待预取结果）
+        self._prefetching: Dict[tuple, Future] = {}
 
     # ------------------------------------------------------------------
     # 公开方法
     # ------------------------------------------------------------------
 
     def get_teams(self) -> List[dict]:
-        """获取所有字幕组列表。返回 [{ id, provider, providerId, name, avatar }, ...]"""
+        """获取所有字幕组列表（带缓存）。返回 [{ id, provider, providerId, name, avatar }, ...]"""
+        return self._teams.get_or_refresh(
+            _TEAMS_KEY, self._fetch_teams, _TEAMS_TTL, _TEAMS_STALE_SECONDS, cacheable=bool
+        )
+
+    def _fetch_teams(self) -> List[dict]:
         try:
-            response = requests.get(_teams_url(), timeout=10)
+            response = cached_get(_teams_url(), timeout=10)
             response.raise_for_status()
             data = response.json()
             parsed = AnimeGardenTeamsResponse(**data)
@@ -88,45 +130,121 @@ class AnimeGardenService:
         智能搜索策略：
         1. 将查询词拆分为多个 search 参数（番剧名 + 季/集标记分开），
            利用 Anime Garden 对每个 search 参数独立 Jieba 分词的特性提升匹配精度。
-        2. 若拆分后结果太少（< 同页半数），回退到仅用核心番剧名做宽泛搜索。
+        2. 拆分过时同时发出仅用核心番剧名的宽泛搜索；拆分结果太少（< 同页半数）时合并其结果，否则丢弃。
 
         返回与 Anime Garden 一致的结构：{ status, complete, resources, pagination }，
         额外增加 query_modified / query_used 字段。
+        结果短期缓存；还有下一页时在后台预取。
         """
         size = int(page_size) if page_size is not None else self.page_size
         cleaned = q.strip()
         terms = self._parse_search_terms(cleaned)
+        result = self._cached_search(cleaned, terms, page, size, fansub)
+        if _has_next_page(result):
+            self._prefetch(cleaned, terms, page + 1, size, fansub)
+        return result
+
+    @staticmethod
+    def _search_key(terms: List[str], page: int, size: int, fansub: Optional[str]) -> tuple:
+        return tuple(terms), page, size, (fansub or "").strip()
+
+    def _cached_search(self, cleaned: str, terms: List[str], page: int, size: int, fansub: Optional[str]) -> dict:
+        """
+        命中缓存直接返回；该页的预取已在执行时等待其结果（有上限），预取失败或超时再自行请求；
+        预取仍在排队时取消，直接自行请求（不排在其他预取之后）
+        """
+        key = self._search_key(terms, page, size, fansub)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        with self._lock:
+            pending = self._prefetching.get(key)
+            if pending is not None and pending.cancel():
+                del self._prefetching[key]
+                pending = None
+        if pending is not None:
+            try:
+                return pending.result(timeout=_PREFETCH_WAIT)
+            except Exception:
+                pass
+        return self._cache.get_or_load(
+            key, lambda: self._search_uncached(cleaned, terms, page, size, fansub), _SEARCH_TTL
+        )
+
+    def _prefetch(self, cleaned: str, terms: List[str], page: int, size: int, fansub: Optional[str]) -> None:
+        """后台预取某一页（已缓存或正在预取时跳过）；其他仍在排队的预取已被这次更新的浏览取代，直接取消"""
+        key = self._search_key(terms, page, size, fansub)
+        with self._lock:
+            for other, future in list(self._prefetching.items()):
+                if other != key and future.cancel():
+                    del self._prefetching[other]
+            if key in self._prefetching or self._cache.get(key) is not None:
+                return
+            self._prefetching[key] = _prefetch_pool.submit(
+                self._run_prefetch, key, cleaned, terms, page, size, fansub
+            )
+
+    def _run_prefetch(
+        self, key: tuple, cleaned: str, terms: List[str], page: int, size: int, fansub: Optional[str]
+    ) -> dict:
+        try:
+            return self._cache.get_or_load(
+                key, lambda: self._search_uncached(cleaned, terms, page, size, fansub), _SEARCH_TTL
+            )
+        except Exception as e:
+            logger.debug(f"预取动漫花园第 {page} 页失败: {e}")
+            raise
+        finally:
+            with self._lock:
+                self._prefetching.pop(key, None)
+
+    def _search_uncached(self, cleaned: str, terms: List[str], page: int, size: int, fansub: Optional[str]) -> dict:
+        """请求一页搜索结果（拆分搜索 + 核心词回退搜索）"""
         query_modified = len(terms) > 1
 
-        # 第一步：用拆分的多个 search 参数搜索
+        # 拆分过时，核心词回退搜索与拆分搜索并发请求
+        core = terms[0] if query_modified else None
+        fallback = _request_pool.submit(self._do_search, [core], page, size, fansub) if core else None
+
         logger.info(f"搜索词拆分: {cleaned!r} → {terms}")
-        result = self._do_search(terms, page, size, fansub)
+        try:
+            result = self._do_search(terms, page, size, fansub)
+        except Exception:
+            if fallback is not None:
+                fallback.cancel()
+            raise
 
-        # 第二步：若结果不足且拆分过，回退到仅用核心词搜索
         threshold = max(5, size // 2)
-        if query_modified and len(result["resources"]) < threshold:
-            core = terms[0]  # 核心番剧名
-            logger.info(f"拆分搜索词结果不足 ({len(result['resources'])} 条 < {threshold})，回退到核心词: {core!r}")
-            try:
-                fallback = self._do_search([core], page, size, fansub)
-                seen = {r["id"] for r in result["resources"]}
-                added = 0
-                for r in fallback["resources"]:
-                    if r["id"] not in seen:
-                        result["resources"].append(r)
-                        seen.add(r["id"])
-                        added += 1
-                if added > 0:
-                    logger.info(f"回退搜索合并了 {added} 条额外结果（共 {len(result['resources'])} 条）")
-                    # 回退后显示核心词，让用户知道搜了什么
-                    result["query_used"] = core
-            except Exception:
-                logger.warning("回退搜索失败，使用拆分结果", exc_info=True)
+        if fallback is not None:
+            if len(result["resources"]) >= threshold:
+                # 拆分结果足够，回退结果不再需要（仍在排队则直接取消）
+                fallback.cancel()
+            else:
+                logger.info(f"拆分搜索词结果不足 ({len(result['resources'])} 条 < {threshold})，合并核心词结果: {core!r}")
+                try:
+                    self._merge_fallback(result, fallback.result(), core)
+                except Exception:
+                    logger.warning("回退搜索失败，使用拆分结果", exc_info=True)
 
         result.setdefault("query_modified", query_modified)
         result.setdefault("query_used", " + ".join(terms) if query_modified else cleaned)
         return result
 
+    @staticmethod
+    def _merge_fallback(result: dict, fallback: dict, core: str) -> None:
+        """把回退搜索中拆分结果没有的资源追加到 result（保持各自顺序）"""
+        seen = {r["id"] for r in result["resources"]}
+        extra = []
+        for r in fallback["resources"]:
+            if r["id"] not in seen:
+                extra.append(r)
+                seen.add(r["id"])
+        if extra:
+            result["resources"].extend(extra)
+            logger.info(f"回退搜索合并了 {len(extra)} 条额外结果（共 {len(result['resources'])} 条）")
+            # 回退后显示核心词，让用户知道搜了什么
+            result["query_used"] = core
+
     # ------------------------------------------------------------------
     # 搜索词拆分
     # ------------------------------------------------------------------
@@ -206,7 +324,7 @@ class AnimeGardenService:
 
         logger.info(f"请求动漫花园 | search={search_terms} page={page} pageSize={page_size} fansub={fansub}")
         try:
-            response = requests.get(self.base_url, params=params, timeout=15)
+            response = cached_get(self.base_url, params=params, timeout=15)
             response.raise_for_status()
             data = response.json()
             parsed = AnimeGardenResponse(**data)
@@ -8,6 +8,7 @@ import requests
 
 from app.core.config import config
 from app.core.db import db
+from app.core.http_cache import cached_get
 from app.schemas.assrt import (
     AssrtFileListItem,
     AssrtLang,
@@ -197,7 +198,7 @@ class AssrtService:
         if params:
             req_params.update(params)
         try:
-            r = requests.get(url, params=req_params, timeout=15)
+            r = cached_get(url, params=req_params, timeout=15)
             r.raise_for_status()
             data = r.json()
         except requests.HTTPError as e:
@@ -348,8 +349,7 @@ class AssrtService:
             dest_filename = os.path.basename(dest_full) or filename
         if not final_target:
             final_target = (config.get("paths.default_target_path") or "").replace("\\", "/")
-        conn = db.get_conn()
-        try:
+        def write(conn):
             task_id = db.insert_download_task(
                 taskName=task_name,
                 taskInfo=f"ASSRT字幕 #{sub_id}",
@@ -357,7 +357,7 @@ class AssrtService:
                 sourcePath=download_dir,
                 targetPath=final_target,
                 taskStatus="moving",
-                commit=False,
+                conn=conn,
             )
             db.insert_file_task(
                 downloadTaskId=task_id,
@@ -365,9 +365,12 @@ class AssrtService:
                 targetPath=dest_dir_relative,
                 file_rename=dest_filename,
                 file_status="pending",
-                commit=False,
+                conn=conn,
             )
-            conn.commit()
+            return task_id
+
+        try:
+            task_id = db.run_write(write)
             db.insert_notification(
                 title="字幕任务已添加",
                 content=f"字幕「{task_name}」已下载并加入任务队列，将由监控移动至目标路径",
@@ -375,7 +378,6 @@ class AssrtService:
             )
             return task_id, task_name, source_dir, final_target
         except Exception as e:
-            conn.rollback()
             logger.error("字幕任务写入失败: %s", e)
             raise BusinessException(
                 code=ErrorCode.OPERATION_ERROR.code,
@@ -422,8 +424,7 @@ class AssrtService:
             download_dir = _resolve_download_path(download_path)
         else:
             download_dir = _get_subtitle_download_dir_for_target(final_target)
-        conn = db.get_conn()
-        try:
+        def write(conn):
             task_id = db.insert_download_task(
                 taskName=task_name,
                 taskInfo=f"ASSRT字幕 #{sub_id}",
@@ -431,7 +432,7 @@ class AssrtService:
                 sourcePath=download_dir,
                 targetPath=final_target,
                 taskStatus="pending_download",
-                commit=False,
+                conn=conn,
             )
             for _file_index, file_rename in items:
                 dest_full = (file_rename or "").strip().replace("\\", "/") or "sub.srt"
@@ -447,12 +448,13 @@ class AssrtService:
                     targetPath=dest_dir_relative,
                     file_rename=dest_filename,
                     file_status="pending",
-                    commit=False,
+                    conn=conn,
                 )
-            conn.commit()
             return task_id
+
+        try:
+            return db.run_write(write)
         except Exception as e:
-            conn.rollback()
             logger.error("字幕占位任务写入失败: %s", e)
             raise BusinessException(
                 code=ErrorCode.OPERATION_ERROR.code,
@@ -476,10 +478,8 @@ class AssrtService:
             task_name = task_name[:200]
 
         # 读取任务创建时写入的 sourcePath，作为字幕下载目录，保证与最初推断的类型目录一致
-        conn = db.get_conn()
-        cur = conn.cursor()
-        cur.execute("SELECT sourcePath FROM download_task WHERE id = ?", (task_id,))
-        row = cur.fetchone()
+        with db.read_conn() as conn:
+            row = conn.execute("SELECT sourcePath FROM download_task WHERE id = ?", (task_id,)).fetchone()
         download_dir = None
         if row:
             # sqlite3.Row 支持按下标或列名访问
@@ -527,17 +527,9 @@ class AssrtService:
         if not final_target:
             final_target = (config.get("paths.default_target_path") or "").replace("\\", "/")
         download_dir = _get_subtitle_download_dir_for_target(final_target)
-        conn = db.get_conn()
         try:
-            task_id = db.insert_download_task(
-                taskName=task_name,
-                taskInfo=f"ASSRT字幕 #{sub_id}",
-                sourceUrl=f"subtitle:{sub_id}",
-                sourcePath=download_dir,
-                targetPath=final_target,
-                taskStatus="moving",
-                commit=False,
-            )
+            # 先下载全部文件（HTTP 不能放进写线程的事务里），再一次性写入任务与文件任务
+            file_rows = []
             for file_index, file_rename in items:
                 saved_path, filename = self._download_sub_to_path(detail, sub_id, file_index)
                 dest_full = ((file_rename or filename) or "").strip() or filename
@@ -548,15 +540,30 @@ class AssrtService:
                 else:
                     dest_dir_relative = ""
                     dest_filename = os.path.basename(dest_full) or filename
-                db.insert_file_task(
-                    downloadTaskId=task_id,
-                    sourcePath=filename,
-                    targetPath=dest_dir_relative,
-                    file_rename=dest_filename,
-                    file_status="pending",
-                    commit=False,
+                file_rows.append((filename, dest_dir_relative, dest_filename))
+
+            def write(conn):
+                task_id = db.insert_download_task(
+                    taskName=task_name,
+                    taskInfo=f"ASSRT字幕 #{sub_id}",
+                    sourceUrl=f"subtitle:{sub_id}",
+                    sourcePath=download_dir,
+                    targetPath=final_target,
+                    taskStatus="moving",
+                    conn=conn,
                 )
-            conn.commit()
+                for filename, dest_dir_relative, dest_filename in file_rows:
+                    db.insert_file_task(
+                        downloadTaskId=task_id,
+                        sourcePath=filename,
+                        targetPath=dest_dir_relative,
+                        file_rename=dest_filename,
+                        file_status="pending",
+                        conn=conn,
+                    )
+                return task_id
+
+            task_id = db.run_write(write)
             db.insert_notification(
                 title="字幕任务已添加",
                 content=f"字幕「{task_name}」共 {len(items)} 个文件已加入任务队列，将由监控移动至目标路径",
@@ -564,7 +571,6 @@ class AssrtService:
             )
             return [(task_id, task_name, download_dir, final_target)]
         except Exception as e:
-            conn.rollback()
             logger.error("字幕批量任务写入失败: %s", e)
             raise BusinessException(
                 code=ErrorCode.OPERATION_ERROR.code,
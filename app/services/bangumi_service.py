@@ -1,10 +1,19 @@
+import hashlib
 import logging
-from datetime import date as date_cls
-from typing import Dict, List, Optional, Tuple
+import sqlite3
+from datetime import date as date_cls, datetime, time as time_cls, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 import requests
 
 from app.core.config import config
+from app.core.config_executor import ConfigExecutor
+from app.core.db import db
+from app.core.http_cache import cached_get
+from app.core.prefix_index import title_index
+from app.core.ttl_cache import TTLCache
+from app.schemas.bangumi import BangumiCalendarDay
+from app.schemas.base import BaseResponse
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +40,67 @@ _WEEKDAY_META = (
 )
 _UNKNOWN_WEEKDAY = {"id": 0, "cn": "日期未定", "en": "TBD", "ja": "未定"}
 
+# 每日放送缓存：周历按天变化，新鲜到本地零点后 _CALENDAR_REFRESH_DELAY 秒（给上游留出更新时间），
+# 过期后一天内先返回旧周历并在后台刷新
+_CALENDAR_KEY = "calendar"
+_CALENDAR_REFRESH_DELAY = 10 * 60
+_CALENDAR_STALE_SECONDS = 24 * 3600
+
+# 季度条目分页大小（/v0/subjects 上限 50）
+_SEASON_PAGE_SIZE = 50
+# 当季/未来季度数据仍在变化，内存缓存 1 小时；已结束的季度存入数据库，内存中保留一天
+_SEASON_TTL = 3600
+_PAST_SEASON_TTL = 24 * 3600
+# 内存中最多保留的季度数（与周历分开缓存，翻看历史季度不会挤掉周历）
+_SEASON_CACHE_ENTRIES = 64
+# 季度最后一个月结束后再等待的天数，期间补录的条目仍会被拉取，之后视为不再变化
+_SEASON_SETTLE_DAYS = 30
+
+# 条目详情缓存：评分/收藏数变化缓慢，6 小时内直接返回
+_SUBJECT_TTL = 6 * 3600
+# 批量获取条目详情单次最多的条目数
+MAX_BATCH_SUBJECTS = 50
+
+# 对 bgm.tv 的并发请求共用的线程池（季度各月份/分页、批量条目详情），限制对同一站点的并发数；
+# 修改 bangumi.max_concurrency 后下次提交即生效
+_api_pool = ConfigExecutor("bangumi.max_concurrency", 4, thread_name_prefix="bangumi")
+
+
+def _index_titles(days: List[dict]) -> None:
+    """把放送表中的中文名/原名收录进搜索补全前缀索引（番剧归入剧集）"""
+    for day in days:
+        for it in day.get("items") or []:
+            title_index.add_many((it.get("name_cn"), it.get("name")), "tv")
+
+
+class CalendarSnapshot(NamedTuple):
+    """一次加载的每日放送：精简数据、预先序列化的成功响应体及其 ETag、上游 ETag"""
+    data: List[dict]
+    body: bytes
+    etag: str
+    upstream_etag: Optional[str]
+
+
+def _calendar_ttl(now: Optional[datetime] = None) -> float:
+    """距下一次刷新时刻（本地零点后 _CALENDAR_REFRESH_DELAY 秒）的秒数"""
+    now = now or datetime.now()
+    refresh_at = datetime.combine(now.date(), time_cls()) + timedelta(seconds=_CALENDAR_REFRESH_DELAY)
+    if refresh_at <= now:
+        refresh_at += timedelta(days=1)
+    return (refresh_at - now).total_seconds()
+
+
+def _has_calendar(snapshot: CalendarSnapshot) -> bool:
+    """空周历（上游异常）不缓存"""
+    return bool(snapshot.data)
+
+
+def _season_finished(year: int, months: Tuple[int, ...], today: Optional[date_cls] = None) -> bool:
+    """季度最后一个月结束 _SEASON_SETTLE_DAYS 天后视为已结束（数据不再变化）"""
+    last = months[-1]
+    next_month = date_cls(year + 1, 1, 1) if last == 12 else date_cls(year, last + 1, 1)
+    return (today or date_cls.today()) >= next_month + timedelta(days=_SEASON_SETTLE_DAYS)
+
 
 def _api_base() -> str:
     base = config.get("bangumi.api_url", "https://api.bgm.tv") or "https://api.bgm.tv"
@@ -40,6 +110,13 @@ def _api_base() -> str:
 class BangumiService:
     """Bangumi (bgm.tv) 番剧数据服务：每日放送、历史季度、条目详情。"""
 
+    def __init__(self):
+        self._calendar_cache = TTLCache(max_entries=1)
+        self._seasons = TTLCache(max_entries=_SEASON_CACHE_ENTRIES)
+        self._subjects = TTLCache(max_entries=int(config.get("bangumi.subject_cache_size", 1024)))
+        # 最近一次成功加载的周历：上游 ETag 未变时直接沿用，不再重新映射、序列化
+        self._calendar: Optional[CalendarSnapshot] = None
+
     @staticmethod
     def _pick_image(images: dict, *, prefer: str = "large") -> str:
         """从 Bangumi images 中挑一个可用封面。
@@ -63,11 +140,47 @@ class BangumiService:
         """获取每日放送，返回按星期分组的列表。
 
         结构: [{ weekday: {id, cn, en, ja}, items: [{...精简条目}] }, ...]
+        带缓存：过期后先返回旧周历并在后台刷新，首次请求失败时抛出异常
+        """
+        return self.get_calendar_snapshot().data
+
+    def get_calendar_snapshot(self) -> CalendarSnapshot:
+        """获取每日放送及预先序列化的响应体（/bangumi/calendar 直接返回，不再逐条校验与序列化）"""
+        return self._calendar_cache.get_or_refresh(
+            _CALENDAR_KEY, self._load_calendar, _calendar_ttl(), _CALENDAR_STALE_SECONDS, cacheable=_has_calendar
+        )
+
+    def refresh_calendar(self) -> CalendarSnapshot:
+        """立即重新加载每日放送（上游未变化时只消耗一次条件请求），失败时抛出异常"""
+        self._calendar_cache.refresh(
+            _CALENDAR_KEY, self._load_calendar, _calendar_ttl(), _CALENDAR_STALE_SECONDS, cacheable=_has_calendar
+        )
+        return self.get_calendar_snapshot()
+
+    def prewarm(self, horizon: float = 0) -> int:
+        """预热每日放送：缓存不存在或将在 horizon 秒内过期时同步刷新，返回实际请求数"""
+        if self._calendar_cache.fresh_seconds(_CALENDAR_KEY) > horizon:
+            return 0
+        self._calendar_cache.refresh(
+            _CALENDAR_KEY, self._load_calendar, _calendar_ttl(), _CALENDAR_STALE_SECONDS, cacheable=_has_calendar
+        )
+        return 1
+
+    def _load_calendar(self) -> CalendarSnapshot:
+        """
+        请求 /calendar（经 HTTP 缓存带 If-None-Match）；上游 ETag 与上次相同时沿用上次的快照，
+        否则映射为精简结构并预先序列化成功响应
         """
         url = f"{_api_base()}/calendar"
         try:
-            resp = requests.get(url, timeout=15, headers={"User-Agent": _USER_AGENT})
+            resp = cached_get(url, timeout=15, headers={"User-Agent": _USER_AGENT})
             resp.raise_for_status()
+            upstream_etag = resp.headers.get("ETag")
+            if not isinstance(upstream_etag, str) or not upstream_etag:
+                upstream_etag = None
+            previous = self._calendar
+            if upstream_etag and previous is not None and previous.upstream_etag == upstream_etag:
+                return previous
             data = resp.json()
         except requests.RequestException as e:
             logger.error(f"请求 Bangumi 每日放送失败: {e}")
@@ -76,6 +189,15 @@ class BangumiService:
             logger.error(f"解析 Bangumi 每日放送响应失败: {e}")
             raise
 
+        result = self._map_calendar(data)
+        body = BaseResponse[List[BangumiCalendarDay]].success(data=result).model_dump_json().encode("utf-8")
+        snapshot = CalendarSnapshot(result, body, f'"{hashlib.sha256(body).hexdigest()[:32]}"', upstream_etag)
+        if result:
+            self._calendar = snapshot
+        return snapshot
+
+    def _map_calendar(self, data) -> List[dict]:
+        """把 /calendar 响应映射为精简结构"""
         result: List[dict] = []
         if not isinstance(data, list):
             return result
@@ -109,46 +231,58 @@ class BangumiService:
                 },
                 "items": items_out,
             })
+        _index_titles(result)
         return result
 
-    def _fetch_subjects_month(self, year: int, month: int) -> List[dict]:
-        """分页拉取某年某月的动画条目（type=2）。"""
+    def _fetch_subjects_page(self, year: int, month: int, offset: int) -> dict:
+        """拉取某年某月动画条目（type=2）的一页"""
         url = f"{_api_base()}/v0/subjects"
-        items: List[dict] = []
-        offset = 0
-        limit = 50
-        while True:
-            try:
-                resp = requests.get(
-                    url,
-                    params={
-                        "type": 2,
-                        "year": year,
-                        "month": month,
-                        "limit": limit,
-                        "offset": offset,
-                        "sort": "date",
-                    },
-                    timeout=20,
-                    headers={"User-Agent": _USER_AGENT},
-                )
-                resp.raise_for_status()
-                data = resp.json()
-            except requests.RequestException as e:
-                logger.error(f"请求 Bangumi 季度条目失败 year={year} month={month}: {e}")
-                raise
-            except Exception as e:
-                logger.error(f"解析 Bangumi 季度条目失败 year={year} month={month}: {e}")
-                raise
-
-            batch = data.get("data") if isinstance(data, dict) else None
-            if not isinstance(batch, list) or not batch:
-                break
-            items.extend(batch)
+        try:
+            resp = cached_get(
+                url,
+                params={
+                    "type": 2,
+                    "year": year,
+                    "month": month,
+                    "limit": _SEASON_PAGE_SIZE,
+                    "offset": offset,
+                    "sort": "date",
+                },
+                timeout=20,
+                headers={"User-Agent": _USER_AGENT},
+            )
+            resp.raise_for_status()
+            data = resp.json()
+        except requests.RequestException as e:
+            logger.error(f"请求 Bangumi 季度条目失败 year={year} month={month}: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"解析 Bangumi 季度条目失败 year={year} month={month}: {e}")
+            raise
+        return data if isinstance(data, dict) else {}
+
+    def _fetch_subjects_months(self, year: int, months: Tuple[int, ...]) -> List[dict]:
+        """
+        并发拉取多个月份的全部条目：先并发请求各月第一页得到总数，再把其余分页一起并发请求，
+        结果按月份、分页顺序合并
+        """
+        first_pages = list(_api_pool.map(lambda m: self._fetch_subjects_page(year, m, 0), months))
+        pending = {}
+        for month, data in zip(months, first_pages):
+            batch = data.get("data")
+            if not isinstance(batch, list) or len(batch) < _SEASON_PAGE_SIZE:
+                continue
             total = int(data.get("total") or 0)
-            offset += len(batch)
-            if offset >= total or len(batch) < limit:
-                break
+            for offset in range(len(batch), total, _SEASON_PAGE_SIZE):
+                pending[(month, offset)] = _api_pool.submit(self._fetch_subjects_page, year, month, offset)
+
+        items: List[dict] = []
+        for month, data in zip(months, first_pages):
+            batches = [data] + [f.result() for (m, _), f in pending.items() if m == month]
+            for page in batches:
+                batch = page.get("data")
+                if isinstance(batch, list):
+                    items.extend(batch)
         return items
 
     @staticmethod
@@ -188,6 +322,7 @@ class BangumiService:
 
         season: winter | spring | summer | autumn
         返回结构与 get_calendar 相同；无首播日的条目归入末尾「日期未定」。
+        已结束的季度首次拉取后存入数据库，之后不再请求；当季/未来季度短期缓存
         """
         months = _SEASON_MONTHS.get(season)
         if not months:
@@ -195,18 +330,43 @@ class BangumiService:
         if year < 1980 or year > 2100:
             raise ValueError(f"无效年份: {year}")
 
+        key = ("season", year, season)
+        cached = self._seasons.get(key)
+        if cached is not None:
+            return cached
+        finished = _season_finished(year, months)
+        if finished:
+            try:
+                stored = db.get_bangumi_season(year, season)
+            except sqlite3.Error as e:
+                logger.debug(f"读取已保存的季度番剧失败 {year} {season}: {e}")
+                stored = None
+            if stored is not None:
+                self._seasons.set(key, stored, _PAST_SEASON_TTL)
+                return stored
+
+        result = self._fetch_season(year, months)
+        if finished and any(day["items"] for day in result):
+            try:
+                db.save_bangumi_season(year, season, result)
+            except sqlite3.Error as e:
+                logger.warning(f"保存季度番剧失败 {year} {season}: {e}")
+        self._seasons.set(key, result, _PAST_SEASON_TTL if finished else _SEASON_TTL)
+        return result
+
+    def _fetch_season(self, year: int, months: Tuple[int, ...]) -> List[dict]:
+        """请求季度三个月的条目并按首播日分组"""
         raw: List[dict] = []
         seen_ids: set = set()
-        for month in months:
-            for it in self._fetch_subjects_month(year, month):
-                if it.get("platform") not in _SEASON_PLATFORMS:
-                    continue
-                sid = it.get("id")
-                if sid is not None and sid in seen_ids:
-                    continue
-                if sid is not None:
-                    seen_ids.add(sid)
-                raw.append(it)
+        for it in self._fetch_subjects_months(year, months):
+            if it.get("platform") not in _SEASON_PLATFORMS:
+                continue
+            sid = it.get("id")
+            if sid is not None and sid in seen_ids:
+                continue
+            if sid is not None:
+                seen_ids.add(sid)
+            raw.append(it)
 
         buckets: Dict[int, List[dict]] = {i: [] for i in range(1, 8)}
         unknown: List[dict] = []
@@ -231,13 +391,43 @@ class BangumiService:
                 "weekday": dict(_UNKNOWN_WEEKDAY),
                 "items": sorted(unknown, key=_sort_key),
             })
+        _index_titles(result)
         return result
 
     def get_subject(self, subject_id: int) -> dict:
-        """获取番剧条目详情，调用 Bangumi /v0/subjects/{id}。"""
+        """获取番剧条目详情，调用 Bangumi /v0/subjects/{id}（带缓存）。"""
+        return self._subjects.get_or_load(subject_id, lambda: self._fetch_subject(subject_id), _SUBJECT_TTL)
+
+    def get_subjects(self, subject_ids: List[int]) -> Tuple[List[dict], List[int]]:
+        """
+        批量获取条目详情，返回 (按请求顺序的详情列表, 获取失败的 ID 列表)。
+        已缓存的直接返回，其余经共用线程池并发请求（并发数受 bangumi.max_concurrency 限制）
+        """
+        ids = list(dict.fromkeys(subject_ids))
+        if len(ids) > MAX_BATCH_SUBJECTS:
+            raise ValueError(f"单次最多获取 {MAX_BATCH_SUBJECTS} 个条目")
+        found: Dict[int, dict] = {}
+        pending = {}
+        for sid in ids:
+            cached = self._subjects.get(sid)
+            if cached is not None:
+                found[sid] = cached
+            else:
+                pending[sid] = _api_pool.submit(self.get_subject, sid)
+        failed: List[int] = []
+        for sid, future in pending.items():
+            try:
+                found[sid] = future.result()
+            except Exception:
+                # 单个条目失败不影响其它条目，错误已在 _fetch_subject 中记录
+                failed.append(sid)
+        return [found[sid] for sid in ids if sid in found], failed
+
+    def _fetch_subject(self, subject_id: int) -> dict:
+        """请求 /v0/subjects/{id} 并映射为详情结构"""
         url = f"{_api_base()}/v0/subjects/{subject_id}"
         try:
-            resp = requests.get(url, timeout=15, headers={"User-Agent": _USER_AGENT})
+            resp = cached_get(url, timeout=15, headers={"User-Agent": _USER_AGENT})
             resp.raise_for_status()
             data = resp.json()
         except requests.RequestException as e:
@@ -0,0 +1,72 @@
+"""
+首页列表缓存预热
+- 启动后立即预热一次，之后按 cache.prewarm_interval_minutes 定时执行
+- 预热 TMDB 各列表第 1 页与 Bangumi 每日放送；缓存在下次预热前会过期的才请求上游
+配合缓存的 stale-while-revalidate，首页访问不需要等待 TMDB / Bangumi
+"""
+import logging
+import threading
+
+from app.core.config import config
+from app.services.bangumi_service import bangumi_service
+from app.services.tmdb_service import tmdb_service
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWarmer:
+    """后台定时预热外部元数据缓存"""
+
+    def __init__(self):
+        self.running = False
+        self.thread = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """启动预热线程；间隔配置为 0 时不启动"""
+        if self.running:
+            return
+        if self._interval_seconds() <= 0:
+            logger.info("首页缓存预热已关闭（cache.prewarm_interval_minutes = 0）")
+            return
+        self.running = True
+        self._stop_event.clear()
+        self.thread = threading.Thread(target=self._run_loop, name="cache-warmer", daemon=True)
+        self.thread.start()
+        logger.info("首页缓存预热已启动")
+
+    def stop(self):
+        """停止预热线程"""
+        self.running = False
+        self._stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+            self.thread = None
+            logger.info("首页缓存预热已停止")
+
+    @staticmethod
+    def _interval_seconds() -> float:
+        return float(config.get("cache.prewarm_interval_minutes", 30)) * 60
+
+    def _run_loop(self):
+        while self.running:
+            self.run_once()
+            if self._stop_event.wait(self._interval_seconds()):
+                break
+
+    def run_once(self) -> dict:
+        """执行一次预热，返回各来源实际刷新的列表数；单个来源失败不影响其它来源"""
+        # 在下次预热之前会过期的条目现在就刷新
+        horizon = self._interval_seconds()
+        result = {"tmdb": 0, "bangumi": 0}
+        for name, service in (("tmdb", tmdb_service), ("bangumi", bangumi_service)):
+            try:
+                result[name] = service.prewarm(horizon)
+            except Exception as e:
+                logger.warning(f"预热 {name} 缓存失败: {e}")
+        if any(result.values()):
+            logger.info(f"首页缓存预热完成：TMDB 列表 {result['tmdb']} 个，Bangumi {result['bangumi']} 个")
+        return result
+
+
+cache_warmer = CacheWarmer()
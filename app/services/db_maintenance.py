@@ -0,0 +1,99 @@
+"""
+数据库定时维护
+- 把结束超过 sqlite.archive_after_days 天的任务移入归档表，热表与其索引只保留近期任务
+- 按 sqlite.notification_retention_days 物理删除过期的已读/已删除通知
+- 执行 PRAGMA incremental_vacuum 把删除后留下的空闲页归还给文件系统
+- 按 sqlite.backup_interval_hours 在线备份数据库（分步复制，见 app.core.db_backup）并轮换旧备份
+所有写入都经单写线程分批执行，不会长时间阻塞监控与 API 的写操作
+"""
+import logging
+import threading
+import time
+
+from app.core import db
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+
+class DbMaintenance:
+    """后台定时执行数据库维护任务"""
+
+    def __init__(self):
+        self.running = False
+        self.thread = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """启动维护线程；维护与备份间隔都配置为 0 时不启动"""
+        if self.running:
+            return
+        if self._interval_seconds() <= 0 and self._backup_interval_seconds() <= 0:
+            logger.info("数据库定时维护已关闭（sqlite.maintenance_interval_hours 与 sqlite.backup_interval_hours 均为 0）")
+            return
+        self.running = True
+        self._stop_event.clear()
+        self.thread = threading.Thread(target=self._run_loop, name="db-maintenance", daemon=True)
+        self.thread.start()
+        logger.info("数据库定时维护已启动")
+
+    def stop(self):
+        """停止维护线程"""
+        self.running = False
+        self._stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+            self.thread = None
+            logger.info("数据库定时维护已停止")
+
+    @staticmethod
+    def _interval_seconds() -> float:
+        return float(config.get("sqlite.maintenance_interval_hours", 6)) * 3600
+
+    @staticmethod
+    def _backup_interval_seconds() -> float:
+        return float(config.get("sqlite.backup_interval_hours", 24)) * 3600
+
+    def _run_loop(self):
+        # 启动后各任务先等一个周期，避免与启动时的迁移、监控首轮检查争抢写线程
+        now = time.monotonic()
+        next_maintenance = now + self._interval_seconds()
+        next_backup = now + self._backup_interval_seconds()
+        while self.running:
+            # 间隔可能在运行中被改为 0（保存配置），此时跳过对应任务
+            maintenance_on = self._interval_seconds() > 0
+            backup_on = self._backup_interval_seconds() > 0
+            deadlines = [d for d, on in ((next_maintenance, maintenance_on), (next_backup, backup_on)) if on]
+            wait = min(deadlines) - time.monotonic() if deadlines else 3600
+            if self._stop_event.wait(max(wait, 0)):
+                break
+            now = time.monotonic()
+            if maintenance_on and now >= next_maintenance:
+                try:
+                    self.run_once()
+                except Exception as e:
+                    logger.error(f"数据库定时维护出错: {e}")
+                next_maintenance = time.monotonic() + self._interval_seconds()
+            if backup_on and now >= next_backup:
+                self.run_backup()
+                next_backup = time.monotonic() + self._backup_interval_seconds()
+
+    def run_once(self) -> dict:
+        """执行一次维护，返回 {archived_tasks, purged_notifications, vacuumed_pages}"""
+        archived = db.archive_finished_tasks(int(config.get("sqlite.archive_after_days", 30)))
+        purged = db.purge_notifications(int(config.get("sqlite.notification_retention_days", 30)))
+        vacuumed = db.incremental_vacuum(int(config.get("sqlite.vacuum_pages", 1000)))
+        if archived or purged or vacuumed:
+            logger.info(f"数据库维护完成：归档任务 {archived} 个，清理过期通知 {purged} 条，归还空闲页 {vacuumed} 页")
+        return {"archived_tasks": archived, "purged_notifications": purged, "vacuumed_pages": vacuumed}
+
+    def run_backup(self):
+        """执行一次定时备份，失败只记录日志；返回备份信息或 None"""
+        try:
+            return db.backup()
+        except Exception as e:
+            logger.error(f"数据库定时备份失败: {e}")
+            return None
+
+
+db_maintenance = DbMaintenance()
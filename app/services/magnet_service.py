@@ -1,4 +1,3 @@
-import base64
 import logging
 import re
 import time
@@ -8,6 +7,7 @@ from typing import List
 
 from app.core import db
 from app.core.config import config
+from app.core.info_hash import normalize_info_hash
 from app.core.qb_client import QBittorrentClient
 from app.schemas.base import BusinessException, ErrorCode
 from app.schemas.magnet import MagnetFile
@@ -16,19 +16,6 @@ from app.schemas.notification import NotificationType
 logger = logging.getLogger(__name__)
 
 
-def normalize_info_hash(raw_hash: str) -> str:
-    """将 info_hash 统一为 40 位小写 hex（兼容 Base32）"""
-    h = raw_hash.strip()
-    if len(h) == 40:
-        return h.lower()
-    if len(h) == 32:
-        try:
-            return base64.b32decode(h.upper()).hex()
-        except Exception:
-            pass
-    return h.lower()
-
-
 class MagnetService:
     """磁链解析与 qBittorrent 下载服务"""
 
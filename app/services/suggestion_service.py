@@ -0,0 +1,158 @@
+"""
+搜索补全
+- 先查本地标题前缀索引（TMDB/Bangumi 结果与历史搜索），命中足够条数时直接返回，不请求上游
+- 不足时才请求 TMDB：未指定类型时电影/剧集两路并发搜索；相同查询的并发请求共用同一组上游请求，
+  远端结果短期缓存
+- 同一输入框会话的新输入到达时，旧请求立即返回本地结果，无人等待且仍在排队的上游请求直接取消
+"""
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+
+from app.core.prefix_index import PrefixIndex, normalize_title, title_index
+from app.core.ttl_cache import TTLCache
+from app.services.tmdb_service import tmdb_service
+
+logger = logging.getLogger(__name__)
+
+# 用户实际搜索过的词比列表中出现过的标题更可能再次被输入
+_SEARCH_WEIGHT = 3.0
+# 等待上游的上限（秒），超时返回本地结果
+_REMOTE_TIMEOUT = 8
+_REMOTE_CACHE_TTL = 600
+
+
+class _Flight:
+    """一次进行中的上游查询：各路搜索的 Future 与等待者数量"""
+    __slots__ = ("futures", "waiters")
+
+    def __init__(self, futures: List[Future]):
+        self.futures = futures
+        self.waiters = 0
+
+
+def _merge(local: List[str], remote: List[str], limit: int) -> List[str]:
+    """本地前缀命中在前，远端结果补足，去重并截取"""
+    return list(dict.fromkeys(local + remote))[:limit]
+
+
+class SuggestionService:
+    """搜索补全：本地前缀索引优先，未命中时并发请求 TMDB"""
+
+    def __init__(self, index: PrefixIndex = title_index, max_workers: int = 4):
+        self.index = index
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="suggest")
+        self._lock = threading.Lock()
+        self._inflight: Dict[tuple, _Flight] = {}
+        # 客户端 → 当前请求的取代信号（新请求到达时置为完成）
+        self._tickets: Dict[str, Future] = {}
+        self._remote_cache = TTLCache(max_entries=256)
+
+    def record_search(self, query: str, media_type: str) -> None:
+        """记录一次有结果的搜索，之后输入该词的前缀时优先补全"""
+        self.index.add(query, media_type, _SEARCH_WEIGHT)
+
+    def suggest(self, query: str, limit: int = 10, media_type: str = "", client: str = "") -> List[str]:
+        """
+        返回至多 limit 条补全；media_type 为 movie / tv，为空时不限类型
+        client 标识同一输入框的连续输入（前端上报的输入框会话 ID），为空时不做取代
+        """
+        q = (query or "").strip()
+        if not q or limit <= 0:
+            return []
+        local = self.index.search(q, limit, media_type)
+        if len(local) >= limit:
+            return local
+        key = (normalize_title(q), media_type, tmdb_service.client.language)
+        cached = self._remote_cache.get(key)
+        if cached is not None:
+            return _merge(local, cached, limit)
+
+        ticket = self._supersede(client)
+        flight = self._join(key, q, media_type)
+        try:
+            remote = self._wait(flight, ticket)
+        finally:
+            self._leave(key, flight)
+            self._release(client, ticket)
+        if remote is None:
+            return local
+        if remote:
+            self._remote_cache.set(key, remote, _REMOTE_CACHE_TTL)
+        return _merge(local, remote, limit)
+
+    def _supersede(self, client: str) -> Future:
+        """登记本次请求，同一客户端仍在等待的旧请求立即结束"""
+        ticket: Future = Future()
+        if not client:
+            return ticket
+        with self._lock:
+            previous = self._tickets.get(client)
+            self._tickets[client] = ticket
+            if previous is not None and not previous.done():
+                previous.set_result(None)
+        return ticket
+
+    def _release(self, client: str, ticket: Future) -> None:
+        with self._lock:
+            if client and self._tickets.get(client) is ticket:
+                del self._tickets[client]
+
+    def _join(self, key: tuple, query: str, media_type: str) -> _Flight:
+        """相同查询已有进行中的上游请求时共用，否则按类型提交一路或两路搜索"""
+        with self._lock:
+            flight = self._inflight.get(key)
+            if flight is None:
+                if media_type == "movie":
+                    searches = [tmdb_service.search_movies]
+                elif media_type == "tv":
+                    searches = [tmdb_service.search_tv_shows]
+                else:
+                    searches = [tmdb_service.search_movies, tmdb_service.search_tv_shows]
+                flight = _Flight([self._pool.submit(search, query) for search in searches])
+                self._inflight[key] = flight
+            flight.waiters += 1
+            return flight
+
+    def _leave(self, key: tuple, flight: _Flight) -> None:
+        """最后一个等待者离开时移除该查询；仍在排队的上游请求取消（已开始的照常完成，结果仍会收录进索引）"""
+        with self._lock:
+            flight.waiters -= 1
+            if flight.waiters > 0:
+                return
+            if self._inflight.get(key) is flight:
+                del self._inflight[key]
+            for future in flight.futures:
+                future.cancel()
+
+    @staticmethod
+    def _wait(flight: _Flight, ticket: Future) -> Optional[List[str]]:
+        """等待各路搜索完成，返回合并后的标题；被取代、超时或被取消时返回 None"""
+        pending = set(flight.futures)
+        deadline = time.monotonic() + _REMOTE_TIMEOUT
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            done, _ = wait(pending | {ticket}, timeout=remaining, return_when=FIRST_COMPLETED)
+            if ticket.done():
+                return None
+            pending -= done
+        results: List[dict] = []
+        for future in flight.futures:
+            if future.cancelled():
+                return None
+            try:
+                results.extend(future.result())
+            except Exception as e:
+                logger.warning(f"获取搜索补全失败: {e}")
+        if len(flight.futures) > 1:
+            # 电影与剧集两路结果按热度合并
+            results.sort(key=lambda r: -(r.get("popularity") or 0))
+        titles = [(r.get("title") or r.get("name") or "").strip() for r in results]
+        return list(dict.fromkeys(t for t in titles if t))
+
+
+suggestion_service = SuggestionService()
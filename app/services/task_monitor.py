@@ -1,6 +1,5 @@
 import logging
 import os
-import re
 import shutil
 import threading
 import time
@@ -8,8 +7,10 @@ from typing import List
 
 from app.core import db
 from app.core.config import config
+from app.core.db import format_progress, notification_key
+from app.core.info_hash import extract_info_hash, normalize_info_hash
 from app.schemas.notification import NotificationType
-from app.services.magnet_service import magnet_service, normalize_info_hash
+from app.services.magnet_service import magnet_service
 
 logger = logging.getLogger(__name__)
 
@@ -77,10 +78,12 @@ class TaskMonitor:
         client = magnet_service._get_client()
         processed_hashes = set() # 记录本轮已处理的 Hash
         processed_target_dirs = set() # 记录本轮已占用的目标目录，防止不同任务往同一个地方移动/重命名
+        progress_updates = [] # 本轮有变化的常规状态/进度，循环结束后一次性写入
 
         for task in active_tasks:
             try:
-                torrent_hash = self._extract_torrent_hash(task['taskName'], task.get('sourceUrl', ''))
+                # 优先使用入库时已规范化的 infoHash 列，旧数据再从任务名/链接解析
+                torrent_hash = task.get('infoHash') or self._extract_torrent_hash(task['taskName'], task.get('sourceUrl', ''))
                 if not torrent_hash:
                     # 字幕任务：HTTP 下载后由本程序加入队列，此处只做移动/重命名
                     if (task.get('sourceUrl') or '').startswith('subtitle:') and task.get('taskStatus') == 'moving':
@@ -92,6 +95,7 @@ class TaskMonitor:
                                 title="字幕任务处理失败",
                                 content=f"任务 {task['taskName']} 移动/重命名失败: {e}",
                                 type=NotificationType.ERROR.value,
+                                collapse_key=notification_key(task['id'], "subtitle_failed"),
                             )
                     else:
                         logger.warning(f"无法获取任务 {task['id']} 的 Hash，跳过检查。Name={task['taskName']}")
@@ -154,7 +158,8 @@ class TaskMonitor:
                                 db.insert_notification(
                                     title="推送成功" if task['taskStatus'] == 'fetching_metadata' else "任务已自动重推",
                                     content=f"任务 {task['taskName']} 已推送至 qB" if task['taskStatus'] == 'fetching_metadata' else f"任务 {task['taskName']} 已自动重推下载",
-                                    type=NotificationType.INFO.value if task['taskStatus'] == 'fetching_metadata' else NotificationType.WARNING.value
+                                    type=NotificationType.INFO.value if task['taskStatus'] == 'fetching_metadata' else NotificationType.WARNING.value,
+                                    collapse_key=notification_key(task['id'], "pushed"),
                                 )
                                 continue
                         except Exception as e:
@@ -181,7 +186,7 @@ class TaskMonitor:
                 # error 状态尝试自动恢复
                 if new_status == 'error':
                     if current_status != 'error':
-                        db.insert_notification(title="任务出错", content=f"任务 {task['taskName']} 状态异常 ({qb_state})，尝试自动恢复", type=NotificationType.WARNING.value)
+                        db.insert_notification(title="任务出错", content=f"任务 {task['taskName']} 状态异常 ({qb_state})，尝试自动恢复", type=NotificationType.WARNING.value, collapse_key=notification_key(task['id'], "error"))
                     logger.warning(f"任务 {task['id']} 状态异常 ({qb_state})，尝试自动恢复...")
                     try:
                         client.resume_torrents(torrent_hash)
@@ -207,7 +212,7 @@ class TaskMonitor:
                         logger.warning(f"检查目标目录冲突失败: {e}")
 
                     logger.info(f"任务 {task['id']} 已完成 (状态: {new_status})，开始执行后续处理: {torrent_info.get('name')}")
-                    db.insert_notification(title="任务下载完成", content=f"任务 {task['taskName']} 下载完成，开始后续处理", type=NotificationType.SUCCESS.value)
+                    db.insert_notification(title="任务下载完成", content=f"任务 {task['taskName']} 下载完成，开始后续处理", type=NotificationType.SUCCESS.value, collapse_key=notification_key(task['id'], "completed"))
                     try:
                         db.update_task_status(task['id'], "moving", progress)
                         # 执行处理，返回最终建议状态
@@ -218,7 +223,7 @@ class TaskMonitor:
                         
                         db.update_task_status(task['id'], final_status, progress)
                         if final_status == "moving":
-                            db.insert_notification(title="任务待重试", content=f"任务 {task['taskName']} 移动/复制未完成，将稍后自动重试", type=NotificationType.WARNING.value)
+                            db.insert_notification(title="任务待重试", content=f"任务 {task['taskName']} 移动/复制未完成，将稍后自动重试", type=NotificationType.WARNING.value, collapse_key=notification_key(task['id'], "retry"))
                         else:
                             db.insert_notification(title="任务处理完成", content=f"任务 {task['taskName']} 后续处理完成", type=NotificationType.SUCCESS.value)
                         
@@ -228,19 +233,32 @@ class TaskMonitor:
                             
                     except Exception as e:
                         logger.error(f"任务 {task['id']} 后续处理失败: {e}")
-                        db.insert_notification(title="任务处理失败", content=f"任务 {task['taskName']} 后续处理失败: {e}", type=NotificationType.ERROR.value)
+                        db.insert_notification(title="任务处理失败", content=f"任务 {task['taskName']} 后续处理失败: {e}", type=NotificationType.ERROR.value, collapse_key=notification_key(task['id'], "process_failed"))
                         db.update_task_status(task['id'], current_status, progress)  # 保留原状态便于重试
                 
                 elif new_status == 'seeding':
                     # 持续监控做种状态
-                    db.update_task_status(task['id'], new_status, progress)
+                    self._queue_progress_update(progress_updates, task, new_status, progress)
                     self._check_seeding_task(client, task['id'], torrent_hash, torrent_info)
                     
                 else:
-                    db.update_task_status(task['id'], new_status, progress)
+                    self._queue_progress_update(progress_updates, task, new_status, progress)
             except Exception as e:
                 logger.error(f"检查任务 {task.get('id')} 失败: {e}")
 
+        if progress_updates:
+            try:
+                db.update_task_statuses(progress_updates)
+            except Exception as e:
+                logger.error(f"批量写入任务进度失败: {e}")
+
+    @staticmethod
+    def _queue_progress_update(updates: list, task: dict, new_status: str, progress: float) -> None:
+        """状态与进度相对库中值有变化时才加入本轮待写列表（做种中的任务多数轮次无需写库）"""
+        if task.get('taskStatus') == new_status and task.get('taskInfo') == format_progress(progress):
+            return
+        updates.append((task['id'], new_status, progress, task.get('taskStatus')))
+
     def _handle_subtitle_task(self, task: dict) -> None:
         """字幕任务：将已下载到 sourcePath 的文件复制到 targetPath 并重命名。"""
         file_tasks = db.get_file_tasks(task["id"])
@@ -312,13 +330,7 @@ class TaskMonitor:
 
     def _extract_torrent_hash(self, task_name: str, source_url: str) -> str | None:
         """从任务名或链接中提取种子 Hash，统一为 40 位小写 hex 以便与 qBittorrent API 一致"""
-        if re.match(r'^[a-fA-F0-9]{40}$', (task_name or "").strip()):
-            return task_name.strip().lower()
-        if source_url and (source_url.startswith("magnet:?") or source_url.startswith("magnet:")):
-            match = re.search(r'xt=urn:btih:([a-zA-Z0-9]+)', source_url)
-            if match:
-                return normalize_info_hash(match.group(1))
-        return None
+        return extract_info_hash(task_name, source_url)
 
     def _normalize_path_for_compare(self, path: str) -> str:
         """规范化路径用于比较：统一斜杠、大小写(Windows)，避免同路径被误判为不同"""
@@ -562,7 +574,7 @@ class TaskMonitor:
         if file_tasks:
             if not content_path or not os.path.exists(content_path):
                 logger.error(f"无法找到种子根路径: {content_path}")
-                db.insert_notification(title="复制失败", content=f"无法访问下载目录: {content_path or '(空)'}", type=NotificationType.ERROR.value)
+                db.insert_notification(title="复制失败", content=f"无法访问下载目录: {content_path or '(空)'}", type=NotificationType.ERROR.value, collapse_key=notification_key(task['id'], "copy_failed"))
                 return None
             # sourcePath 是相对 save_path 的；content_path = save_path + name，直接 content_path+sourcePath 会多一层根目录名，需用 save_path+sourcePath
             save_path_raw = torrent_info.get('save_path', '')
@@ -596,7 +608,7 @@ class TaskMonitor:
                         src_full = self._find_source_by_extension(save_path_resolved, content_path, dest_name)
                     if not os.path.exists(src_full):
                         logger.warning(f"复制跳过（源不存在）: {src_full}")
-                        db.insert_notification(title="复制跳过", content=f"源文件不存在，未复制: {dest_name}", type=NotificationType.WARNING.value)
+                        db.insert_notification(title="复制跳过", content=f"源文件不存在，未复制: {dest_name}", type=NotificationType.WARNING.value, collapse_key=notification_key(task['id'], f"copy_skipped:{dest_name}"))
                         continue
                     # 目标目录以任务的 targetPath为基准，再拼 file_task 的 targetPath，避免误用 default_target_path
                     task_base = (task.get('targetPath') or '').replace('\\', '/').strip()
@@ -612,12 +624,12 @@ class TaskMonitor:
                     dest_path = os.path.join(dest_dir, dest_name)
                     if os.path.exists(dest_path):
                         logger.warning(f"复制跳过（目标已存在）: {dest_path}")
-                        db.insert_notification(title="复制跳过", content=f"目标已存在，未覆盖: {dest_name}", type=NotificationType.WARNING.value)
+                        db.insert_notification(title="复制跳过", content=f"目标已存在，未覆盖: {dest_name}", type=NotificationType.WARNING.value, collapse_key=notification_key(task['id'], f"copy_skipped:{dest_name}"))
                         continue
                     # 复制前再次确认源文件存在，避免复制过程中被删除
                     if not os.path.exists(src_full):
                         logger.warning(f"复制跳过（复制前检查源不存在）: {src_full}")
-                        db.insert_notification(title="复制跳过", content=f"复制前检查源文件不存在: {dest_name}", type=NotificationType.WARNING.value)
+                        db.insert_notification(title="复制跳过", content=f"复制前检查源文件不存在: {dest_name}", type=NotificationType.WARNING.value, collapse_key=notification_key(task['id'], f"copy_skipped:{dest_name}"))
                         continue
                     os.makedirs(dest_dir, exist_ok=True)
                     shutil.copy2(src_full, dest_path)
@@ -635,13 +647,13 @@ class TaskMonitor:
                     return 'seeding' if limit_ratio >= 0 else 'completed'
             except Exception as e:
                 logger.error(f"复制失败: {e}")
-                db.insert_notification(title="复制失败", content=str(e), type=NotificationType.ERROR.value)
+                db.insert_notification(title="复制失败", content=str(e), type=NotificationType.ERROR.value, collapse_key=notification_key(task['id'], "copy_failed"))
             return None
 
         # 无 file_tasks：复制整个 content_path 到目标目录（保留根目录名）
         if not content_path or not os.path.exists(content_path):
             logger.error(f"无法找到源文件路径: {content_path}")
-            db.insert_notification(title="复制失败", content=f"无法访问源文件路径: {content_path or '(空)'}", type=NotificationType.ERROR.value)
+            db.insert_notification(title="复制失败", content=f"无法访问源文件路径: {content_path or '(空)'}", type=NotificationType.ERROR.value, collapse_key=notification_key(task['id'], "copy_failed"))
             return None
         if not os.path.isabs(target_path):
             final_dest_dir = os.path.join(default_target_path, target_path) if default_target_path else target_path
@@ -653,15 +665,15 @@ class TaskMonitor:
         dest_path = os.path.join(final_dest_dir, basename)
         dest_path = dest_path.replace('\\', '/')
         logger.info(f"开始复制: {content_path} -> {dest_path}")
-        db.insert_notification(title="开始复制", content=f"正在复制到: {dest_path}", type=NotificationType.INFO.value)
+        db.insert_notification(title="开始复制", content=f"正在复制到: {dest_path}", type=NotificationType.INFO.value, collapse_key=notification_key(task['id'], "copy_started"))
         try:
             if os.path.exists(dest_path):
                 logger.error(f"复制失败: 目标路径已存在: {dest_path}")
-                db.insert_notification(title="复制失败", content=f"目标路径已存在，跳过复制: {dest_path}", type=NotificationType.ERROR.value)
+                db.insert_notification(title="复制失败", content=f"目标路径已存在，跳过复制: {dest_path}", type=NotificationType.ERROR.value, collapse_key=notification_key(task['id'], "copy_failed"))
                 return None
             if not os.path.exists(content_path):
                 logger.error(f"复制失败: 复制前检查源不存在: {content_path}")
-                db.insert_notification(title="复制失败", content=f"复制前检查源路径不存在: {content_path}", type=NotificationType.ERROR.value)
+                db.insert_notification(title="复制失败", content=f"复制前检查源路径不存在: {content_path}", type=NotificationType.ERROR.value, collapse_key=notification_key(task['id'], "copy_failed"))
                 return None
             os.makedirs(final_dest_dir, exist_ok=True)
             if is_dir:
@@ -679,7 +691,7 @@ class TaskMonitor:
             return 'seeding' if limit_ratio >= 0 else 'completed'
         except Exception as e:
             logger.error(f"复制失败: {e}")
-            db.insert_notification(title="复制失败", content=str(e), type=NotificationType.ERROR.value)
+            db.insert_notification(title="复制失败", content=str(e), type=NotificationType.ERROR.value, collapse_key=notification_key(task['id'], "copy_failed"))
         return None
 
     def _get_task_qb_target_path(self, task: dict, file_tasks: list = None) -> str | None:
@@ -891,7 +903,7 @@ class TaskMonitor:
                 target_check_path = os.path.join(local_mkdir_path, torrent_info.get('name', ''))
                 if os.path.exists(target_check_path):
                     logger.error(f"移动失败: 目标路径已存在同名文件/文件夹: {target_check_path}")
-                    db.insert_notification(title="移动失败", content=f"目标路径已存在同名内容，跳过移动: {target_check_path}", type=NotificationType.ERROR.value)
+                    db.insert_notification(title="移动失败", content=f"目标路径已存在同名内容，跳过移动: {target_check_path}", type=NotificationType.ERROR.value, collapse_key=notification_key(task_id, "move_failed"))
                     return False, local_mkdir_path, qb_move_path
             except Exception as e:
                 logger.warning(f"检查目标文件存在性失败: {e}，将继续尝试移动")
@@ -912,7 +924,7 @@ class TaskMonitor:
                 return True, local_mkdir_path, qb_move_path
             else:
                 logger.error(f"移动失败: {qb_move_path}")
-                db.insert_notification(title="移动任务失败", content=f"任务 {task_id} 移动到 {qb_move_path} 失败", type=NotificationType.ERROR.value)
+                db.insert_notification(title="移动任务失败", content=f"任务 {task_id} 移动到 {qb_move_path} 失败", type=NotificationType.ERROR.value, collapse_key=notification_key(task_id, "move_failed"))
                 return False, local_mkdir_path, qb_move_path
 
         logger.info(f"任务 {task_id} 当前已在目标路径 (当前: {current_save_path}, 目标: {qb_move_path})，跳过移动")
@@ -1,17 +1,18 @@
 import logging
 import os
 import re
+import sqlite3
 import time
 import urllib.parse
 from typing import List
 
 from app.core.config import config
 from app.core.db import db
+from app.core.info_hash import extract_info_hash, normalize_info_hash
 from app.core.qb_client import QBittorrentClient
 from app.schemas.base import BusinessException, ErrorCode
 from app.schemas.notification import NotificationType
 from app.schemas.task import AddTaskRequest
-from app.services.magnet_service import normalize_info_hash
 
 logger = logging.getLogger(__name__)
 
@@ -48,20 +49,12 @@ class TaskService:
 
     def add_task(self, request: AddTaskRequest) -> int:
         """添加下载任务。立即写入 DB 并返回,后台由 task_monitor 异步推送到 qBittorrent."""
-        # 0. 提取 Hash 并检查是否已存在
-        torrent_hash = None
-        if request.sourceUrl.startswith("magnet:?"):
-            match = re.search(r'xt=urn:btih:([a-zA-Z0-9]+)', request.sourceUrl)
-            if match:
-                torrent_hash = normalize_info_hash(match.group(1))
+        # 0. 提取 Hash 并检查是否已存在（与写入 DB 的 infoHash 同一解析规则，唯一索引冲突时才能找回已有任务）
+        torrent_hash = extract_info_hash(request.taskName, request.sourceUrl)
 
         if torrent_hash:
             # 1. 检查 DB 中是否已有此 Hash 的活跃任务，若有则复用
-            existing_db_tasks = db.get_tasks_by_hash(torrent_hash)
-            active_task = next((
-                t for t in existing_db_tasks
-                if t['taskStatus'] not in ('completed', 'error', 'paused', 'cancelled', 'fetching_metadata_failed')
-            ), None)
+            active_task = self._find_active_task_by_hash(torrent_hash)
             if active_task:
                 logger.info(f"[TaskService] 检测到 DB 中已存在此 Hash 的活跃任务: {active_task['id']}，复用之")
                 return active_task['id']
@@ -102,32 +95,35 @@ class TaskService:
             target_path = default_target
 
         # 4. 立即写入 DB（状态：获取下载信息），不等待 qB 推送 —— 由 task_monitor 异步处理
-        conn = db.get_conn()
         try:
             # 若 qB 中已存在，直接以 downloading 录入
             initial_status = "downloading" if (torrent_hash and self.qb_client.get_torrent_info(torrent_hash)) else "fetching_metadata"
 
-            task_id = db.insert_download_task(
-                taskName=request.taskName,
-                taskInfo=request.taskInfo,
-                sourceUrl=request.sourceUrl,
-                sourcePath=source_path,
-                targetPath=target_path,
-                taskStatus=initial_status,
-                commit=False
-            )
-            if request.file_tasks:
-                for file_task in request.file_tasks:
-                    db.insert_file_task(
-                        downloadTaskId=task_id,
-                        sourcePath=file_task.sourcePath,
-                        targetPath=file_task.targetPath,
-                        file_rename=file_task.file_rename,
-                        file_status="pending",
-                        commit=False
-                    )
-
-            conn.commit()
+            def write(conn):
+                # 下载任务与文件任务在写线程的同一个原子操作内写入，失败时整体回滚
+                task_id = db.insert_download_task(
+                    taskName=request.taskName,
+                    taskInfo=request.taskInfo,
+                    sourceUrl=request.sourceUrl,
+                    sourcePath=source_path,
+                    targetPath=target_path,
+                    taskStatus=initial_status,
+                    infoHash=torrent_hash,
+                    conn=conn
+                )
+                if request.file_tasks:
+                    for file_task in request.file_tasks:
+                        db.insert_file_task(
+                            downloadTaskId=task_id,
+                            sourcePath=file_task.sourcePath,
+                            targetPath=file_task.targetPath,
+                            file_rename=file_task.file_rename,
+                            file_status="pending",
+                            conn=conn
+                        )
+                return task_id
+
+            task_id = db.run_write(write)
 
             if initial_status == "downloading":
                 # qB 中已存在，直接推送文件过滤
@@ -138,13 +134,28 @@ class TaskService:
                 db.insert_notification(title="任务已创建", content=f"任务 {request.taskName} 正在推送到 qB…", type=NotificationType.INFO.value)
             return task_id
 
+        except sqlite3.IntegrityError as e:
+            # 并发添加同一 Hash：唯一索引拦截了第二个活跃任务（写操作已自动回滚），复用先写入的那个
+            active_task = self._find_active_task_by_hash(torrent_hash) if torrent_hash else None
+            if active_task:
+                logger.info(f"[TaskService] 并发添加同一 Hash，复用已存在的活跃任务: {active_task['id']}")
+                return active_task['id']
+            logger.error(f"[TaskService] 添加任务异常, 已回滚: {e}")
+            raise BusinessException(code=ErrorCode.OPERATION_ERROR, message=f"添加任务失败: {str(e)}")
         except Exception as e:
-            logger.error(f"[TaskService] 添加任务异常, 执行回滚: {e}")
-            conn.rollback()
+            logger.error(f"[TaskService] 添加任务异常, 已回滚: {e}")
             if isinstance(e, BusinessException):
                 raise e
             raise BusinessException(code=ErrorCode.OPERATION_ERROR, message=f"添加任务失败: {str(e)}")
 
+    @staticmethod
+    def _find_active_task_by_hash(torrent_hash: str):
+        """按 infoHash 查找未结束的任务"""
+        return next((
+            t for t in db.get_tasks_by_hash(torrent_hash)
+            if t['taskStatus'] not in ('completed', 'error', 'paused', 'cancelled', 'fetching_metadata_failed')
+        ), None)
+
     def push_to_qb(self, task_id: int, source_url: str, source_path: str, torrent_hash: str = None, file_tasks: list = None) -> bool:
         """推送任务到 qBittorrent，不处理 DB 事务"""
         try:
@@ -231,8 +242,8 @@ class TaskService:
             raise BusinessException(code=ErrorCode.OPERATION_ERROR, message="只有活跃状态的任务可以取消")
 
         source_url = task['sourceUrl']
-        torrent_hash = None
-        if source_url and (source_url.startswith("magnet:?") or source_url.startswith("magnet:")):
+        torrent_hash = task.get('infoHash')
+        if not torrent_hash and source_url and (source_url.startswith("magnet:?") or source_url.startswith("magnet:")):
             match = re.search(r'xt=urn:btih:([a-zA-Z0-9]+)', source_url)
             if match:
                 torrent_hash = normalize_info_hash(match.group(1))
@@ -1,47 +1,153 @@
 import logging
-import os
+import sqlite3
 from typing import Any, List, Optional
 
 import requests
-from tmdbv3api import TMDb, Movie, TV, Search, Trending, Discover
 
 from app.core.config import config
+from app.core.db import db
+from app.core.prefix_index import title_index
+from app.core.tmdb_client import TMDBClient
+from app.core.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
 # 英文区国家优先级（用于从 alternative_titles 中选取英文标题）
 _ENGLISH_COUNTRIES = ("US", "GB", "AU", "CA")
 
+# 列表接口缓存时长（秒）：趋势按小时变化，热门每天数次，高分榜几乎不变
+_LIST_CACHE_TTLS = {
+    "trending": 3600,
+    "popular": 3 * 3600,
+    "top_rated": 12 * 3600,
+}
+# 过期后仍可先返回旧列表（同时后台刷新）的宽限时长，上游不可用时首页依旧可用
+_LIST_STALE_SECONDS = 24 * 3600
+
+# 详情一次请求附带的子资源；返回给前端时去掉（演员阵容单独整理为 cast）
+_DETAIL_APPENDS = "credits,alternative_titles,translations"
+_DETAIL_APPEND_KEYS = frozenset(_DETAIL_APPENDS.split(","))
+# 详情缓存时长（秒）：元数据变化很慢，评分等字段几小时内的偏差可以接受
+_DETAIL_CACHE_TTL = 6 * 3600
+
+# 历史高分番剧：题材=动画(16)，评分降序，要求足够票数以过滤冷门条目
+_TOP_RATED_ANIME_PARAMS = {
+    "with_genres": "16",
+    "sort_by": "vote_average.desc",
+    "vote_count.gte": 300,
+}
+
 
 def _attr_or_key(obj: Any, key: str) -> Optional[str]:
-    """从 tmdbv3api AsObj 或 dict 中取属性/键值"""
+    """从 dict 或对象中取键值/属性，去掉首尾空白，空值返回 None"""
     if obj is None:
         return None
-    v = getattr(obj, key, None)
-    if v is not None:
-        return str(v).strip() if v else None
     if isinstance(obj, dict):
         v = obj.get(key)
-        return str(v).strip() if v else None
+        return str(v).strip() or None if v else None
+    v = getattr(obj, key, None)
+    return str(v).strip() or None if v else None
+
+
+def _pick_english_title(titles: List[dict]) -> Optional[str]:
+    """从 alternative_titles 中按英文区国家优先级选标题，都没有时取第一个非空标题"""
+    for country in _ENGLISH_COUNTRIES:
+        for t in titles:
+            if (_attr_or_key(t, "iso_3166_1") or "").upper() == country:
+                title = _attr_or_key(t, "title")
+                if title:
+                    return title
+    for t in titles:
+        title = _attr_or_key(t, "title")
+        if title:
+            return title
     return None
 
 
+def _extract_cast(credits: Any, limit: int = 15) -> List[dict]:
+    """从 credits 中取主要演员阵容（按 TMDB 顺序取前 N 位）"""
+    result: List[dict] = []
+    for c in ((credits or {}).get("cast") or [])[:limit]:
+        name = _attr_or_key(c, "name")
+        if not name:
+            continue
+        result.append({
+            "id": c.get("id"),
+            "name": name,
+            "character": _attr_or_key(c, "character"),
+            "profile_path": _attr_or_key(c, "profile_path"),
+        })
+    return result
+
+
+def _english_title_from_details(data: dict, title_key: str, alternatives_key: str) -> Optional[str]:
+    """
+    从 append_to_response 的详情中取英文标题：
+    英文翻译（按英文区国家优先级）> 原语言为英文时的原标题 > alternative_titles > 原标题
+    （剧集取 name，避免取到工作名如 Montauk）
+    """
+    translations = [
+        t for t in ((data.get("translations") or {}).get("translations") or [])
+        if (t.get("iso_639_1") or "").lower() == "en"
+    ]
+    rank = {country: i for i, country in enumerate(_ENGLISH_COUNTRIES)}
+    for t in sorted(translations, key=lambda t: rank.get(t.get("iso_3166_1"), len(rank))):
+        title = _attr_or_key(t.get("data"), title_key)
+        if title:
+            return title
+    original = _attr_or_key(data, f"original_{title_key}")
+    if original and (data.get("original_language") or "").lower() == "en":
+        return original
+    alternatives = (data.get("alternative_titles") or {}).get(alternatives_key) or []
+    return _pick_english_title(alternatives) or original
+
+
+def _alternative_titles(data: dict, alternatives_key: str) -> List[str]:
+    """详情 alternative_titles 中的全部别名（去重、保持顺序）"""
+    titles = [_attr_or_key(t, "title") for t in ((data.get("alternative_titles") or {}).get(alternatives_key) or [])]
+    return list(dict.fromkeys(t for t in titles if t))
+
+
+def _english_originals(media: str, results: List[dict]) -> List[tuple]:
+    """列表结果中原语言为英文的条目，其原标题即英文标题：(media_type, tmdb_id, english_title, alt_titles)"""
+    title_key = "original_title" if media == "movie" else "original_name"
+    rows = []
+    for r in results:
+        title = _attr_or_key(r, title_key)
+        if title and r.get("id") and (r.get("original_language") or "").lower() == "en":
+            rows.append((media, r["id"], title, []))
+    return rows
+
+
+def _index_titles(media: str, results: List[dict]) -> None:
+    """把结果中的标题与原标题收录进搜索补全前缀索引"""
+    for r in results:
+        title_index.add_many(
+            (_attr_or_key(r, "title") or _attr_or_key(r, "name"),
+             _attr_or_key(r, "original_title") or _attr_or_key(r, "original_name")),
+            media,
+        )
+
+
+def _has_results(value: tuple) -> bool:
+    """(list, total) 中列表非空才写入缓存，请求失败的空结果不缓存"""
+    return bool(value[0])
+
+
 class TMDBService:
     """TMDB API 服务，封装电影、剧集搜索及详情"""
 
     def __init__(self):
-        self.tmdb = TMDb()
+        self.client = TMDBClient()
+        self._list_cache = TTLCache()
+        self._detail_cache = TTLCache()
+        self._cache_identity = None
         self.reload_config()
-        self.movie = Movie()
-        self.tv = TV()
-        self.search = Search()
-        self.trending = Trending()
-        self.discover = Discover()
 
     def reload_config(self) -> None:
         """从当前运行时配置刷新 TMDB 客户端参数（设置页保存后可立即生效）。"""
-        self.tmdb.api_key = config.get("tmdb.api_key") or ""
-        self.tmdb.language = config.get("tmdb.language", "zh-CN")
+        api_key = config.get("tmdb.api_key") or ""
+        language = config.get("tmdb.language", "zh-CN")
         api_domain = (config.get("tmdb.api_domain", "https://api.themoviedb.org") or "https://api.themoviedb.org").strip()
         # 兼容旧配置：去掉误填的 http(s):// 前缀和末尾 /
         if api_domain.startswith("https://"):
@@ -49,255 +155,226 @@ class TMDBService:
         elif api_domain.startswith("http://"):
             api_domain = api_domain[7:]
         api_domain = api_domain.rstrip("/")
-        self.tmdb._base = f"https://{api_domain}/3"
-
-    @staticmethod
-    def _extract_results(raw) -> List[Any]:
-        """从 tmdbv3api 返回值中安全提取结果列表。
-        
-        tmdbv3api 的 AsObj 正常迭代时直接产出每个结果项（AsObj 实例），
-        但在某些边界情况下会退化为迭代字典 key（字符串）。
-        这里先尝试正常迭代，发现是字符串就回退到取 .results 属性。
-        """
-        if isinstance(raw, list):
-            return raw
-        try:
-            items = list(raw)
-            # 如果迭代产出了字符串，说明遍历的是 dict 的 key 而非结果
-            if items and isinstance(items[0], str):
-                if hasattr(raw, 'results'):
-                    inner = raw.results
-                    return list(inner) if not isinstance(inner, list) else inner
-                return []
-            return items
-        except Exception:
-            return []
-
-    @staticmethod
-    def _extract_total(raw, fallback_obj=None) -> int:
-        """从 tmdbv3api 返回值中安全提取总数"""
-        total = getattr(raw, 'total_results', None)
-        if total is None and fallback_obj is not None:
-            total = getattr(fallback_obj, 'total_results', 0)
-        try:
-            return int(total or 0)
-        except Exception:
-            return 0
-
-    def search_movies(self, query: str, page: int = 1) -> List[Any]:
+        self.client.configure(api_key, f"https://{api_domain}/3", language)
+        # api_key / 域名变更后旧结果一并丢弃（语言已在缓存键中，无需清空）
+        identity = (self.client.api_key, self.client.base_url)
+        if identity != self._cache_identity:
+            self._list_cache.clear()
+            self._detail_cache.clear()
+            self._cache_identity = identity
+        self._list_cache.resize(int(config.get("tmdb.list_cache_size", 256)))
+        self._detail_cache.resize(int(config.get("tmdb.detail_cache_size", 512)))
+
+    def search_movies(self, query: str, page: int = 1) -> List[dict]:
         """搜索电影"""
-        if not query or not query.strip():
-            return []
-        raw = self.movie.search(query.strip(), page=page)
-        return self._extract_results(raw)
+        return self.search_movies_with_total(query, page)[0]
 
-    def search_tv_shows(self, query: str, page: int = 1) -> List[Any]:
+    def search_tv_shows(self, query: str, page: int = 1) -> List[dict]:
         """搜索电视剧/番剧"""
-        if not query or not query.strip():
-            return []
-        raw = self.tv.search(query.strip(), page=page)
-        return self._extract_results(raw)
+        return self.search_tv_shows_with_total(query, page)[0]
 
     def search_movies_with_total(self, query: str, page: int = 1) -> tuple:
         """搜索电影并返回总数"""
         if not query or not query.strip():
             return [], 0
-        raw = self.movie.search(query.strip(), page=page)
-        return self._extract_results(raw), self._extract_total(raw, self.movie)
+        results, total = self.client.get_page("/search/movie", page, {"query": query.strip()})
+        _index_titles("movie", results)
+        return results, total
 
     def search_tv_shows_with_total(self, query: str, page: int = 1) -> tuple:
         """搜索剧集并返回总数"""
         if not query or not query.strip():
             return [], 0
-        raw = self.tv.search(query.strip(), page=page)
-        return self._extract_results(raw), self._extract_total(raw, self.tv)
+        results, total = self.client.get_page("/search/tv", page, {"query": query.strip()})
+        _index_titles("tv", results)
+        return results, total
 
-    def search_multi(self, query: str, page: int = 1) -> List[Any]:
+    def search_multi(self, query: str, page: int = 1) -> List[dict]:
         """混合搜索（电影、电视、人物等）"""
-        return self.search.multi(query, page=page)
-
-    @staticmethod
-    def _detail_to_dict(detail: Any) -> dict:
-        """将 tmdbv3api 详情对象转换为完整原始 dict（含嵌套结构）"""
-        raw = getattr(detail, "_json", None)
-        if isinstance(raw, dict):
-            return dict(raw)
-        if isinstance(detail, dict):
-            return dict(detail)
-        if hasattr(detail, "__dict__"):
-            return {k: v for k, v in detail.__dict__.items() if not k.startswith("_")}
-        return {}
-
-    def _get_cast(self, api_obj: Any, media_id: int, limit: int = 15) -> List[dict]:
-        """获取主要演员阵容（按 TMDB 顺序取前 N 位）"""
-        try:
-            credits = api_obj.credits(media_id)
-            cast_raw = getattr(credits, "cast", None)
-            cast_list = list(cast_raw) if cast_raw else []
-            result: List[dict] = []
-            for c in cast_list[:limit]:
-                name = _attr_or_key(c, "name")
-                if not name:
-                    continue
-                result.append({
-                    "id": getattr(c, "id", None) if not isinstance(c, dict) else c.get("id"),
-                    "name": name,
-                    "character": _attr_or_key(c, "character"),
-                    "profile_path": _attr_or_key(c, "profile_path"),
-                })
-            return result
-        except Exception as e:
-            logger.debug("获取演员阵容失败 media_id=%s: %s", media_id, e)
-            return []
+        return self.client.get_page("/search/multi", page, {"query": query})[0]
 
-    def get_movie_details(self, movie_id: int) -> Any:
-        """获取电影详情（含主要演员阵容）"""
-        detail = self.movie.details(movie_id)
-        data = self._detail_to_dict(detail)
-        data["cast"] = self._get_cast(self.movie, movie_id)
+    def _details(self, media: str, media_id: int) -> dict:
+        """
+        详情原始数据（含 credits / alternative_titles / translations），一次请求取回
+        按 (类型, id, 语言) 缓存 _DETAIL_CACHE_TTL 秒；详情页与英文标题共用，打开详情后再取英文标题不再请求
+        """
+        key = (media, media_id, self.client.language)
+        return self._detail_cache.get_or_load(
+            key,
+            lambda: self.client.get(f"/{media}/{media_id}", {"append_to_response": _DETAIL_APPENDS}),
+            _DETAIL_CACHE_TTL,
+        )
+
+    def _detail_with_cast(self, media: str, media_id: int) -> dict:
+        raw = self._details(media, media_id)
+        # 返回副本，调用方修改不影响缓存
+        data = {k: v for k, v in raw.items() if k not in _DETAIL_APPEND_KEYS}
+        data["cast"] = _extract_cast(raw.get("credits"))
         return data
 
-    def get_tv_details(self, tv_id: int) -> Any:
+    def get_movie_details(self, movie_id: int) -> dict:
+        """获取电影详情（含主要演员阵容）"""
+        return self._detail_with_cast("movie", movie_id)
+
+    def get_tv_details(self, tv_id: int) -> dict:
         """获取电视剧详情（含主要演员阵容）"""
-        detail = self.tv.details(tv_id)
-        data = self._detail_to_dict(detail)
-        data["cast"] = self._get_cast(self.tv, tv_id)
-        return data
+        return self._detail_with_cast("tv", tv_id)
 
     def get_movie_english_title(self, movie_id: int) -> Optional[str]:
-        """获取电影的英文标题（供海盗湾等英文搜索使用）。优先 en-US 详情主标题，再 fallback 到 alternative_titles。"""
-        try:
-            old_lang = self.tmdb.language
-            self.tmdb.language = "en-US"
-            try:
-                detail = self.movie.details(movie_id)
-                title = _attr_or_key(detail, "title")
-                if title:
-                    return title
-            finally:
-                self.tmdb.language = old_lang
-        except Exception as e:
-            logger.debug("获取电影英文主标题失败 movie_id=%s: %s", movie_id, e)
-        try:
-            raw = self.movie.alternative_titles(movie_id)
-            titles = raw if isinstance(raw, list) else list(raw) if raw else []
-            for country in _ENGLISH_COUNTRIES:
-                for t in titles:
-                    if (_attr_or_key(t, "iso_3166_1") or "").upper() == country:
-                        title = _attr_or_key(t, "title")
-                        if title:
-                            return title
-            for t in titles:
-                title = _attr_or_key(t, "title")
-                if title:
-                    return title
-            return None
-        except Exception as e:
-            logger.debug("获取电影英文标题 alternative_titles 失败 movie_id=%s: %s", movie_id, e)
-            return None
+        """获取电影的英文标题（供海盗湾等英文搜索使用），先查本地映射表，没有时由详情推导并写入"""
+        return self._english_title("movie", movie_id, "title", "titles")
 
     def get_tv_english_title(self, tv_id: int) -> Optional[str]:
-        """获取剧集的英文标题（供海盗湾等英文搜索使用）。优先 en-US 详情主标题（避免取到工作名如 Montauk），再 fallback 到 alternative_titles。"""
+        """获取剧集的英文标题（供海盗湾等英文搜索使用），先查本地映射表，没有时由详情推导并写入"""
+        return self._english_title("tv", tv_id, "name", "results")
+
+    def _english_title(self, media: str, media_id: int, title_key: str, alternatives_key: str) -> Optional[str]:
         try:
-            old_lang = self.tmdb.language
-            self.tmdb.language = "en-US"
-            try:
-                detail = self.tv.details(tv_id)
-                name = _attr_or_key(detail, "name")
-                if name:
-                    return name
-            finally:
-                self.tmdb.language = old_lang
-        except Exception as e:
-            logger.debug("获取剧集英文主标题失败 tv_id=%s: %s", tv_id, e)
+            stored = db.get_tmdb_title(media, media_id)
+            if stored is not None and stored["englishTitle"]:
+                return stored["englishTitle"]
+        except sqlite3.Error as e:
+            logger.debug("读取 TMDB 英文标题映射失败 %s/%s: %s", media, media_id, e)
         try:
-            raw = self.tv.alternative_titles(tv_id)
-            results = raw if isinstance(raw, list) else list(raw) if raw else []
-            for country in _ENGLISH_COUNTRIES:
-                for t in results:
-                    if (_attr_or_key(t, "iso_3166_1") or "").upper() == country:
-                        title = _attr_or_key(t, "title")
-                        if title:
-                            return title
-            for t in results:
-                title = _attr_or_key(t, "title")
-                if title:
-                    return title
-            return None
+            data = self._details(media, media_id)
         except Exception as e:
-            logger.debug("获取剧集英文标题 alternative_titles 失败 tv_id=%s: %s", tv_id, e)
+            logger.debug("获取英文标题失败 %s/%s: %s", media, media_id, e)
             return None
+        title = _english_title_from_details(data, title_key, alternatives_key)
+        if title:
+            self._store_titles([(media, media_id, title, _alternative_titles(data, alternatives_key))])
+        return title
 
-    @staticmethod
-    def _total_from_raw(raw: Any, fallback: int) -> int:
-        """从 TMDB 列表响应或环境变量取 total_results（tmdbv3api 会把 total_results 写入 os.environ）"""
-        total = getattr(raw, "total_results", None)
-        if total is None:
-            try:
-                total = os.environ.get("total_results")
-            except Exception:
-                pass
+    def _store_titles(self, rows: List[tuple], overwrite: bool = True) -> None:
+        """写入英文标题映射；写入失败只记日志，不影响本次请求"""
         try:
-            return int(total) if total is not None else fallback
-        except (TypeError, ValueError):
-            return fallback
+            db.upsert_tmdb_titles(rows, overwrite=overwrite)
+        except sqlite3.Error as e:
+            logger.debug("写入 TMDB 英文标题映射失败: %s", e)
+
+    def _list_loader(self, media: str, fetch):
+        """
+        列表加载后顺带把原语言为英文的条目写入英文标题映射（已有的不覆盖），之后按 id 取英文标题无需请求；
+        标题同时收录进搜索补全前缀索引
+        """
+        media_type = "movie" if media == "movie" else "tv"
+
+        def load() -> tuple:
+            results, total = fetch()
+            self._store_titles(_english_originals(media_type, results), overwrite=False)
+            _index_titles(media_type, results)
+            return results, total
+        return load
+
+    def _cached_list(self, category: str, media: str, page: int, window: Optional[str], fetch) -> tuple:
+        """
+        列表接口缓存：键为 (接口, 页码, 时间窗口, 语言)，时长按接口取 _LIST_CACHE_TTLS
+        过期后的 _LIST_STALE_SECONDS 内先返回旧列表并在后台刷新；请求失败返回的空列表不缓存
+        """
+        key = (f"{category}/{media}", page, window, self.client.language)
+        results, total = self._list_cache.get_or_refresh(
+            key, self._list_loader(media, fetch), _LIST_CACHE_TTLS[category], _LIST_STALE_SECONDS, cacheable=_has_results
+        )
+        # 返回列表副本，调用方修改不影响缓存
+        return list(results), total
+
+    def _first_pages(self) -> List[tuple]:
+        """首页用到的各列表第 1 页：(category, media, window, fetch)"""
+        return [
+            ("trending", "movie", "week", lambda: self._fetch_trending_movies(1, "week")),
+            ("trending", "movie", "day", lambda: self._fetch_trending_movies(1, "day")),
+            ("trending", "tv", "week", lambda: self._fetch_trending_tv(1, "week")),
+            ("trending", "tv", "day", lambda: self._fetch_trending_tv(1, "day")),
+            ("popular", "movie", None, lambda: self._fetch_popular_movies(1)),
+            ("popular", "tv", None, lambda: self._fetch_popular_tv(1)),
+            ("top_rated", "movie", None, lambda: self._fetch_top_rated_movies(1)),
+            ("top_rated", "tv", None, lambda: self._fetch_top_rated_tv(1)),
+            ("top_rated", "anime", None, lambda: self._fetch_top_rated_anime(1)),
+        ]
+
+    def prewarm(self, horizon: float = 0) -> int:
+        """
+        预热各列表第 1 页：缓存不存在或将在 horizon 秒内过期时同步刷新，返回实际请求的列表数
+        未配置 api_key 时不请求
+        """
+        if not self.client.api_key:
+            return 0
+        refreshed = 0
+        for category, media, window, fetch in self._first_pages():
+            key = (f"{category}/{media}", 1, window, self.client.language)
+            if self._list_cache.fresh_seconds(key) > horizon:
+                continue
+            self._list_cache.refresh(
+                key, self._list_loader(media, fetch), _LIST_CACHE_TTLS[category], _LIST_STALE_SECONDS,
+                cacheable=_has_results,
+            )
+            refreshed += 1
+        return refreshed
 
     def get_trending_movies(self, page: int = 1, window: str = "week") -> tuple:
         """热播电影，window: day | week，返回 (list, total)"""
+        window = "day" if window == "day" else "week"
+        return self._cached_list("trending", "movie", page, window, lambda: self._fetch_trending_movies(page, window))
+
+    def _fetch_trending_movies(self, page: int = 1, window: str = "week") -> tuple:
         try:
-            raw = self.trending.movie_day(page=page) if window == "day" else self.trending.movie_week(page=page)
-            results = self._extract_results(raw)
-            return results, self._total_from_raw(raw, len(results))
+            return self.client.get_page(f"/trending/movie/{window}", page)
         except requests.RequestException as e:
             logger.warning("TMDB 热播电影请求失败: %s", e)
             return [], 0
 
     def get_trending_tv(self, page: int = 1, window: str = "week") -> tuple:
         """热播剧集，window: day | week，返回 (list, total)"""
+        window = "day" if window == "day" else "week"
+        return self._cached_list("trending", "tv", page, window, lambda: self._fetch_trending_tv(page, window))
+
+    def _fetch_trending_tv(self, page: int = 1, window: str = "week") -> tuple:
         try:
-            raw = self.trending.tv_day(page=page) if window == "day" else self.trending.tv_week(page=page)
-            results = self._extract_results(raw)
-            return results, self._total_from_raw(raw, len(results))
+            return self.client.get_page(f"/trending/tv/{window}", page)
         except requests.RequestException as e:
             logger.warning("TMDB 热播剧集请求失败: %s", e)
             return [], 0
 
     def get_popular_movies(self, page: int = 1) -> tuple:
         """热门电影，返回 (list, total)"""
+        return self._cached_list("popular", "movie", page, None, lambda: self._fetch_popular_movies(page))
+
+    def _fetch_popular_movies(self, page: int = 1) -> tuple:
         try:
-            raw = self.movie.popular(page=page)
-            results = self._extract_results(raw) if not isinstance(raw, list) else raw
-            return results, self._total_from_raw(raw, len(results))
+            return self.client.get_page("/movie/popular", page)
         except requests.RequestException as e:
             logger.warning("TMDB 热门电影请求失败: %s", e)
             return [], 0
 
     def get_popular_tv(self, page: int = 1) -> tuple:
         """热门剧集，返回 (list, total)"""
+        return self._cached_list("popular", "tv", page, None, lambda: self._fetch_popular_tv(page))
+
+    def _fetch_popular_tv(self, page: int = 1) -> tuple:
         try:
-            raw = self.tv.popular(page=page)
-            results = self._extract_results(raw) if not isinstance(raw, list) else raw
-            return results, self._total_from_raw(raw, len(results))
+            return self.client.get_page("/tv/popular", page)
         except requests.RequestException as e:
             logger.warning("TMDB 热门剧集请求失败: %s", e)
             return [], 0
 
     def get_top_rated_movies(self, page: int = 1) -> tuple:
         """高分电影，返回 (list, total)"""
+        return self._cached_list("top_rated", "movie", page, None, lambda: self._fetch_top_rated_movies(page))
+
+    def _fetch_top_rated_movies(self, page: int = 1) -> tuple:
         try:
-            raw = self.movie.top_rated(page=page)
-            results = self._extract_results(raw) if not isinstance(raw, list) else raw
-            return results, self._total_from_raw(raw, len(results))
+            return self.client.get_page("/movie/top_rated", page)
         except requests.RequestException as e:
             logger.warning("TMDB 高分电影请求失败: %s", e)
             return [], 0
 
     def get_top_rated_tv(self, page: int = 1) -> tuple:
         """高分剧集，返回 (list, total)"""
+        return self._cached_list("top_rated", "tv", page, None, lambda: self._fetch_top_rated_tv(page))
+
+    def _fetch_top_rated_tv(self, page: int = 1) -> tuple:
         try:
-            raw = self.tv.top_rated(page=page)
-            results = self._extract_results(raw) if not isinstance(raw, list) else raw
-            return results, self._total_from_raw(raw, len(results))
+            return self.client.get_page("/tv/top_rated", page)
         except requests.RequestException as e:
             logger.warning("TMDB 高分剧集请求失败: %s", e)
             return [], 0
@@ -305,58 +382,17 @@ class TMDBService:
     def get_top_rated_anime(self, page: int = 1) -> tuple:
         """历史高分番剧（动画剧集）。
 
-        用 TMDB discover 按题材=动画(16) 过滤，评分降序，且要求足够票数以过滤冷门条目。
+        用 TMDB discover 按 _TOP_RATED_ANIME_PARAMS 过滤（动画题材、评分降序、足够票数）。
         返回 (list, total)，与其它列表接口保持一致。
         """
-        params = {
-            "with_genres": "16",
-            "sort_by": "vote_average.desc",
-            "vote_count.gte": 300,
-            "page": page,
-        }
+        return self._cached_list("top_rated", "anime", page, None, lambda: self._fetch_top_rated_anime(page))
+
+    def _fetch_top_rated_anime(self, page: int = 1) -> tuple:
         try:
-            raw = self.discover.discover_tv_shows(params)
-            results = self._extract_results(raw)
-            total = self._total_from_raw(raw, len(results))
-            if not total:
-                total = getattr(self.discover, "total_results", 0) or len(results)
-            return results, int(total or 0)
+            return self.client.get_page("/discover/tv", page, _TOP_RATED_ANIME_PARAMS)
         except requests.RequestException as e:
             logger.warning("TMDB 高分番剧请求失败: %s", e)
             return [], 0
-        except Exception as e:
-            logger.warning("TMDB 高分番剧解析失败: %s", e)
-            return [], 0
-
-    def get_search_suggestions(self, query: str, limit: int = 10, media_type: str = "") -> List[str]:
-        """获取搜索补全提示，支持按类型过滤"""
-        if not query or not query.strip():
-            return []
-        try:
-            suggestions = []
-            if media_type == "movie":
-                results = self._extract_results(self.movie.search(query.strip()))
-                for r in results:
-                    title = getattr(r, 'title', None) or (r.get('title') if isinstance(r, dict) else None)
-                    if title:
-                        suggestions.append(title)
-            elif media_type == "tv":
-                results = self._extract_results(self.tv.search(query.strip()))
-                for r in results:
-                    name = getattr(r, 'name', None) or (r.get('name') if isinstance(r, dict) else None)
-                    if name:
-                        suggestions.append(name)
-            else:
-                results = self.search.multi(query.strip())
-                for result in results:
-                    if hasattr(result, 'title'):
-                        suggestions.append(result.title)
-                    elif hasattr(result, 'name'):
-                        suggestions.append(result.name)
-            return list(dict.fromkeys(suggestions))[:limit]  # 去重并截取
-        except Exception as e:
-            logger.error(f"获取建议时出错: {e}")
-            return []
 
 
 tmdb_service = TMDBService()
@@ -1,3 +1,10 @@
+-- 新库的完整结构（版本 = app/core/migrations.py 中的 LATEST_VERSION）；结构变更须同时新增一个迁移
+
+-- 增量 VACUUM：须在建表前设置才对新库生效，空闲页由定时维护归还（见 app/services/db_maintenance.py）
+PRAGMA auto_vacuum = INCREMENTAL;
+-- WAL 日志模式：读连接与写线程互不阻塞（已有库由迁移 v11 切换）
+PRAGMA journal_mode = WAL;
+
 CREATE TABLE IF NOT EXISTS download_task (
     id INTEGER PRIMARY KEY AUTOINCREMENT,   -- 主键ID
     taskName TEXT NOT NULL,                 -- 任务名称 (例如: 电影标题)
@@ -8,7 +15,8 @@ CREATE TABLE IF NOT EXISTS download_task (
     taskStatus TEXT,                        -- 任务状态 (downloading:下载中, moving:移动中, completed:已完成,cancelled:已取消, error:错误)
     createTime DATETIME,                    -- 创建时间
     updateTime DATETIME,                    -- 更新时间
-    isDelete INTEGER NOT NULL DEFAULT 0     -- 逻辑删除标记 (0:未删除, 1:已删除)
+    isDelete INTEGER NOT NULL DEFAULT 0,    -- 逻辑删除标记 (0:未删除, 1:已删除)
+    infoHash TEXT                           -- 规范化的种子 info_hash (40 位小写 hex，非种子任务为空)
 );
 
 -- 文件操作任务表
@@ -28,6 +36,18 @@ CREATE TABLE IF NOT EXISTS file_task (
 -- 创建索引
 CREATE INDEX IF NOT EXISTS idx_taskName ON download_task(taskName);
 CREATE INDEX IF NOT EXISTS idx_fileOpStatus ON file_task(file_status);
+CREATE INDEX IF NOT EXISTS idx_fileTask_downloadTaskId ON file_task(downloadTaskId);        -- 按下载任务取文件任务
+CREATE INDEX IF NOT EXISTS idx_task_list ON download_task(isDelete, createTime);            -- 任务列表分页/计数
+-- 活跃任务（监控每轮查询）：部分索引，条件须与 Database.get_active_tasks 逐字一致
+CREATE INDEX IF NOT EXISTS idx_task_active ON download_task(isDelete)
+    WHERE isDelete = 0 AND taskStatus NOT IN ('completed', 'error', 'paused', 'cancelled', 'fetching_metadata_failed');
+CREATE INDEX IF NOT EXISTS idx_task_infoHash ON download_task(infoHash);                  -- 按 Hash 查重
+-- 同一 Hash 至多一个活跃任务
+CREATE UNIQUE INDEX IF NOT EXISTS uq_task_infoHash_active ON download_task(infoHash)
+    WHERE infoHash IS NOT NULL AND isDelete = 0 AND taskStatus NOT IN ('completed', 'error', 'paused', 'cancelled', 'fetching_metadata_failed');
+-- 可归档任务（定时归档分批查询）：部分索引，条件须与 Database.archive_finished_tasks 逐字一致
+CREATE INDEX IF NOT EXISTS idx_task_archivable ON download_task(updateTime)
+    WHERE taskStatus IN ('completed', 'cancelled');
 
 -- 通知表
 CREATE TABLE IF NOT EXISTS notification (
@@ -37,7 +57,173 @@ CREATE TABLE IF NOT EXISTS notification (
     type TEXT NOT NULL DEFAULT 'info',      -- 通知类型 (info, success, warning, error)
     isRead INTEGER NOT NULL DEFAULT 0,      -- 是否已读 (0:未读, 1:已读)
     createTime DATETIME,                    -- 创建时间
-    isDelete INTEGER NOT NULL DEFAULT 0     -- 逻辑删除 (0:未删除, 1:已删除)
+    isDelete INTEGER NOT NULL DEFAULT 0,    -- 逻辑删除 (0:未删除, 1:已删除)
+    collapseKey TEXT,                       -- 折叠键 (task:<任务ID>:<事件类型>)，同键重复事件只更新这一条
+    repeatCount INTEGER NOT NULL DEFAULT 1  -- 同一折叠键累计发生次数
 );
 
-CREATE INDEX IF NOT EXISTS idx_notif_isRead ON notification(isRead);
+CREATE INDEX IF NOT EXISTS idx_notif_list ON notification(isDelete, createTime);             -- 通知列表按时间倒序
+CREATE INDEX IF NOT EXISTS idx_notif_read_list ON notification(isDelete, isRead, createTime);  -- 按已读筛选 / 未读计数
+-- 同一折叠键至多一条未删除通知
+CREATE UNIQUE INDEX IF NOT EXISTS uq_notif_collapseKey ON notification(collapseKey)
+    WHERE collapseKey IS NOT NULL AND isDelete = 0;
+
+-- 计数表：由下方触发器在增删改时维护，未读数与列表总数按主键直接读取（不再 COUNT(*)）
+CREATE TABLE IF NOT EXISTS stat_counter (
+    name TEXT PRIMARY KEY NOT NULL,         -- 计数项 (task.total / task.status:<状态> / notification.total / notification.unread)
+    value INTEGER NOT NULL DEFAULT 0        -- 当前值
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_task_counter_insert AFTER INSERT ON download_task
+WHEN NEW.isDelete = 0
+BEGIN
+    INSERT INTO stat_counter (name, value)
+        VALUES ('task.total', 1), ('task.status:' || IFNULL(NEW.taskStatus, ''), 1)
+        ON CONFLICT(name) DO UPDATE SET value = stat_counter.value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_task_counter_update AFTER UPDATE OF taskStatus, isDelete ON download_task
+WHEN OLD.taskStatus IS NOT NEW.taskStatus OR OLD.isDelete IS NOT NEW.isDelete
+BEGIN
+    INSERT INTO stat_counter (name, value)
+        SELECT 'task.total', (NEW.isDelete = 0) - (OLD.isDelete = 0) WHERE 1
+        UNION ALL SELECT 'task.status:' || IFNULL(OLD.taskStatus, ''), -1 WHERE OLD.isDelete = 0
+        UNION ALL SELECT 'task.status:' || IFNULL(NEW.taskStatus, ''), 1 WHERE NEW.isDelete = 0
+        ON CONFLICT(name) DO UPDATE SET value = stat_counter.value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_task_counter_delete AFTER DELETE ON download_task
+WHEN OLD.isDelete = 0
+BEGIN
+    UPDATE stat_counter SET value = value - 1
+        WHERE name IN ('task.total', 'task.status:' || IFNULL(OLD.taskStatus, ''));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_notification_counter_insert AFTER INSERT ON notification
+WHEN NEW.isDelete = 0
+BEGIN
+    INSERT INTO stat_counter (name, value)
+        SELECT 'notification.total', 1 WHERE 1
+        UNION ALL SELECT 'notification.unread', 1 WHERE NEW.isRead = 0
+        ON CONFLICT(name) DO UPDATE SET value = stat_counter.value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_notification_counter_update AFTER UPDATE OF isRead, isDelete ON notification
+WHEN OLD.isRead IS NOT NEW.isRead OR OLD.isDelete IS NOT NEW.isDelete
+BEGIN
+    INSERT INTO stat_counter (name, value)
+        SELECT 'notification.total', (NEW.isDelete = 0) - (OLD.isDelete = 0) WHERE 1
+        UNION ALL SELECT 'notification.unread',
+            (NEW.isDelete = 0 AND NEW.isRead = 0) - (OLD.isDelete = 0 AND OLD.isRead = 0) WHERE 1
+        ON CONFLICT(name) DO UPDATE SET value = stat_counter.value + excluded.value;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_notification_counter_delete AFTER DELETE ON notification
+WHEN OLD.isDelete = 0
+BEGIN
+    UPDATE stat_counter SET value = value - (CASE WHEN name = 'notification.unread' THEN OLD.isRead = 0 ELSE 1 END)
+        WHERE name IN ('notification.total', 'notification.unread');
+END;
+
+-- 归档表：已结束超过 sqlite.archive_after_days 天的任务及其文件任务（保留原 id，列与热表一致）
+CREATE TABLE IF NOT EXISTS download_task_archive (
+    id INTEGER PRIMARY KEY,
+    taskName TEXT NOT NULL,
+    taskInfo TEXT,
+    sourceUrl TEXT,
+    sourcePath TEXT,
+    targetPath TEXT,
+    taskStatus TEXT,
+    createTime DATETIME,
+    updateTime DATETIME,
+    isDelete INTEGER NOT NULL DEFAULT 0,
+    infoHash TEXT,
+    archiveTime DATETIME                    -- 归档时间
+);
+
+CREATE TABLE IF NOT EXISTS file_task_archive (
+    id INTEGER PRIMARY KEY,
+    downloadTaskId INTEGER,
+    sourcePath TEXT NOT NULL,
+    targetPath TEXT NOT NULL,
+    file_rename TEXT NOT NULL,
+    file_status TEXT NOT NULL DEFAULT 'pending',
+    errorMessage TEXT,
+    createTime DATETIME,
+    updateTime DATETIME
+);
+
+CREATE INDEX IF NOT EXISTS idx_task_archive_list ON download_task_archive(isDelete, createTime);                -- 含历史的任务列表
+CREATE INDEX IF NOT EXISTS idx_fileTaskArchive_downloadTaskId ON file_task_archive(downloadTaskId);
+
+-- TMDB id → 英文标题映射：海盗湾英文搜索按主键读取，由详情按需写入、趋势/热门列表批量写入
+CREATE TABLE IF NOT EXISTS tmdb_title (
+    mediaType TEXT NOT NULL,                -- movie / tv
+    tmdbId INTEGER NOT NULL,                -- TMDB id
+    englishTitle TEXT,                      -- 英文标题
+    altTitles TEXT,                         -- 别名列表（JSON 数组）
+    updateTime DATETIME,
+    PRIMARY KEY (mediaType, tmdbId)
+) WITHOUT ROWID;
+
+-- Bangumi 已结束季度的番剧表（整理后的 JSON），历史季度只请求一次
+CREATE TABLE IF NOT EXISTS bangumi_season (
+    year INTEGER NOT NULL,
+    season TEXT NOT NULL,                   -- winter / spring / summer / autumn
+    data TEXT NOT NULL,                     -- 按星期分组的番剧列表（JSON）
+    updateTime DATETIME,
+    PRIMARY KEY (year, season)
+) WITHOUT ROWID;
+
+-- 任务全文索引（/tasks/search）：trigram 分词支持中英文子串/前缀匹配，rowid 即 download_task.id，由下方触发器同步
+CREATE VIRTUAL TABLE IF NOT EXISTS task_fts USING fts5(taskName, taskInfo, fileNames, tokenize = 'trigram');
+
+CREATE TRIGGER IF NOT EXISTS trg_task_fts_insert AFTER INSERT ON download_task
+WHEN NEW.isDelete = 0
+BEGIN
+    INSERT INTO task_fts (rowid, taskName, taskInfo, fileNames)
+        VALUES (NEW.id, NEW.taskName, CASE WHEN NEW.taskInfo GLOB '[0-9]*%' THEN NULL ELSE NEW.taskInfo END, (SELECT group_concat(file_rename, ' ') FROM file_task WHERE downloadTaskId = NEW.id));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_task_fts_rename AFTER UPDATE OF taskName ON download_task
+WHEN OLD.taskName IS NOT NEW.taskName
+BEGIN
+    UPDATE task_fts SET taskName = NEW.taskName WHERE rowid = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_task_fts_info AFTER UPDATE OF taskInfo ON download_task
+WHEN OLD.taskInfo IS NOT NEW.taskInfo AND IFNULL(NEW.taskInfo, '') NOT GLOB '[0-9]*%'
+BEGIN
+    UPDATE task_fts SET taskInfo = NEW.taskInfo WHERE rowid = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_task_fts_visibility AFTER UPDATE OF isDelete ON download_task
+WHEN OLD.isDelete IS NOT NEW.isDelete
+BEGIN
+    DELETE FROM task_fts WHERE rowid = OLD.id;
+    INSERT INTO task_fts (rowid, taskName, taskInfo, fileNames)
+        SELECT NEW.id, NEW.taskName, CASE WHEN NEW.taskInfo GLOB '[0-9]*%' THEN NULL ELSE NEW.taskInfo END, (SELECT group_concat(file_rename, ' ') FROM file_task WHERE downloadTaskId = NEW.id)
+        WHERE NEW.isDelete = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_task_fts_delete AFTER DELETE ON download_task
+BEGIN
+    DELETE FROM task_fts WHERE rowid = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_file_fts_insert AFTER INSERT ON file_task
+BEGIN
+    UPDATE task_fts SET fileNames = (SELECT group_concat(file_rename, ' ') FROM file_task WHERE downloadTaskId = NEW.downloadTaskId) WHERE rowid = NEW.downloadTaskId;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_file_fts_update AFTER UPDATE OF file_rename, downloadTaskId ON file_task
+WHEN OLD.file_rename IS NOT NEW.file_rename OR OLD.downloadTaskId IS NOT NEW.downloadTaskId
+BEGIN
+    UPDATE task_fts SET fileNames = (SELECT group_concat(file_rename, ' ') FROM file_task WHERE downloadTaskId = OLD.downloadTaskId) WHERE rowid = OLD.downloadTaskId;
+    UPDATE task_fts SET fileNames = (SELECT group_concat(file_rename, ' ') FROM file_task WHERE downloadTaskId = NEW.downloadTaskId) WHERE rowid = NEW.downloadTaskId;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_file_fts_delete AFTER DELETE ON file_task
+BEGIN
+    UPDATE task_fts SET fileNames = (SELECT group_concat(file_rename, ' ') FROM file_task WHERE downloadTaskId = OLD.downloadTaskId) WHERE rowid = OLD.downloadTaskId;
+END;
@@ -13,6 +13,8 @@
  Date: 07/02/2026 16:56:59
 */
 
+PRAGMA auto_vacuum = INCREMENTAL;
+PRAGMA journal_mode = WAL;
 PRAGMA foreign_keys = false;
 
 -- ----------------------------
@@ -29,7 +31,8 @@ CREATE TABLE "download_task" (
   "taskStatus" TEXT,
   "createTime" DATETIME,
   "updateTime" DATETIME,
-  "isDelete" INTEGER NOT NULL DEFAULT 0
+  "isDelete" INTEGER NOT NULL DEFAULT 0,
+  "infoHash" TEXT
 );
 
 -- ----------------------------
@@ -60,9 +63,21 @@ CREATE TABLE "notification" (
   "type" TEXT NOT NULL DEFAULT 'info',
   "isRead" INTEGER NOT NULL DEFAULT 0,
   "createTime" DATETIME,
-  "isDelete" INTEGER NOT NULL DEFAULT 0
+  "isDelete" INTEGER NOT NULL DEFAULT 0,
+  "collapseKey" TEXT,
+  "repeatCount" INTEGER NOT NULL DEFAULT 1
 );
 
+-- ----------------------------
+-- Table structure for stat_counter
+-- ----------------------------
+DROP TABLE IF EXISTS "stat_counter";
+CREATE TABLE "stat_counter" (
+  "name" TEXT NOT NULL,
+  "value" INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY ("name")
+) WITHOUT ROWID;
+
 -- ----------------------------
 -- Table structure for sqlite_sequence
 -- ----------------------------
@@ -84,6 +99,30 @@ CREATE INDEX "idx_taskName"
 ON "download_task" (
   "taskName" ASC
 );
+CREATE INDEX "idx_task_list"
+ON "download_task" (
+  "isDelete" ASC,
+  "createTime" ASC
+);
+CREATE INDEX "idx_task_active"
+ON "download_task" (
+  "isDelete" ASC
+)
+WHERE isDelete = 0 AND taskStatus NOT IN ('completed', 'error', 'paused', 'cancelled', 'fetching_metadata_failed');
+CREATE INDEX "idx_task_infoHash"
+ON "download_task" (
+  "infoHash" ASC
+);
+CREATE UNIQUE INDEX "uq_task_infoHash_active"
+ON "download_task" (
+  "infoHash" ASC
+)
+WHERE infoHash IS NOT NULL AND isDelete = 0 AND taskStatus NOT IN ('completed', 'error', 'paused', 'cancelled', 'fetching_metadata_failed');
+CREATE INDEX "idx_task_archivable"
+ON "download_task" (
+  "updateTime" ASC
+)
+WHERE taskStatus IN ('completed', 'cancelled');
 
 -- ----------------------------
 -- Auto increment value for file_task
@@ -97,6 +136,10 @@ CREATE INDEX "idx_fileOpStatus"
 ON "file_task" (
   "file_status" ASC
 );
+CREATE INDEX "idx_fileTask_downloadTaskId"
+ON "file_task" (
+  "downloadTaskId" ASC
+);
 
 -- ----------------------------
 -- Auto increment value for notification
@@ -106,9 +149,191 @@ UPDATE "sqlite_sequence" SET seq = 7 WHERE name = 'notification';
 -- ----------------------------
 -- Indexes structure for table notification
 -- ----------------------------
-CREATE INDEX "idx_notif_isRead"
+CREATE INDEX "idx_notif_list"
 ON "notification" (
-  "isRead" ASC
+  "isDelete" ASC,
+  "createTime" ASC
 );
+CREATE INDEX "idx_notif_read_list"
+ON "notification" (
+  "isDelete" ASC,
+  "isRead" ASC,
+  "createTime" ASC
+);
+CREATE UNIQUE INDEX "uq_notif_collapseKey"
+ON "notification" (
+  "collapseKey" ASC
+)
+WHERE collapseKey IS NOT NULL AND isDelete = 0;
+
+-- ----------------------------
+-- Triggers structure for table download_task / notification
+-- ----------------------------
+CREATE TRIGGER IF NOT EXISTS trg_task_counter_insert AFTER INSERT ON download_task
+WHEN NEW.isDelete = 0
+BEGIN
+    INSERT INTO stat_counter (name, value)
+        VALUES ('task.total', 1), ('task.status:' || IFNULL(NEW.taskStatus, ''), 1)
+        ON CONFLICT(name) DO UPDATE SET value = stat_counter.value + excluded.value;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_task_counter_update AFTER UPDATE OF taskStatus, isDelete ON download_task
+WHEN OLD.taskStatus IS NOT NEW.taskStatus OR OLD.isDelete IS NOT NEW.isDelete
+BEGIN
+    INSERT INTO stat_counter (name, value)
+        SELECT 'task.total', (NEW.isDelete = 0) - (OLD.isDelete = 0) WHERE 1
+        UNION ALL SELECT 'task.status:' || IFNULL(OLD.taskStatus, ''), -1 WHERE OLD.isDelete = 0
+        UNION ALL SELECT 'task.status:' || IFNULL(NEW.taskStatus, ''), 1 WHERE NEW.isDelete = 0
+        ON CONFLICT(name) DO UPDATE SET value = stat_counter.value + excluded.value;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_task_counter_delete AFTER DELETE ON download_task
+WHEN OLD.isDelete = 0
+BEGIN
+    UPDATE stat_counter SET value = value - 1
+        WHERE name IN ('task.total', 'task.status:' || IFNULL(OLD.taskStatus, ''));
+END;
+CREATE TRIGGER IF NOT EXISTS trg_notification_counter_insert AFTER INSERT ON notification
+WHEN NEW.isDelete = 0
+BEGIN
+    INSERT INTO stat_counter (name, value)
+        SELECT 'notification.total', 1 WHERE 1
+        UNION ALL SELECT 'notification.unread', 1 WHERE NEW.isRead = 0
+        ON CONFLICT(name) DO UPDATE SET value = stat_counter.value + excluded.value;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_notification_counter_update AFTER UPDATE OF isRead, isDelete ON notification
+WHEN OLD.isRead IS NOT NEW.isRead OR OLD.isDelete IS NOT NEW.isDelete
+BEGIN
+    INSERT INTO stat_counter (name, value)
+        SELECT 'notification.total', (NEW.isDelete = 0) - (OLD.isDelete = 0) WHERE 1
+        UNION ALL SELECT 'notification.unread',
+            (NEW.isDelete = 0 AND NEW.isRead = 0) - (OLD.isDelete = 0 AND OLD.isRead = 0) WHERE 1
+        ON CONFLICT(name) DO UPDATE SET value = stat_counter.value + excluded.value;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_notification_counter_delete AFTER DELETE ON notification
+WHEN OLD.isDelete = 0
+BEGIN
+    UPDATE stat_counter SET value = value - (CASE WHEN name = 'notification.unread' THEN OLD.isRead = 0 ELSE 1 END)
+        WHERE name IN ('notification.total', 'notification.unread');
+END;
+
+-- ----------------------------
+-- Table structure for download_task_archive
+-- ----------------------------
+DROP TABLE IF EXISTS "download_task_archive";
+CREATE TABLE "download_task_archive" (
+  "id" INTEGER PRIMARY KEY,
+  "taskName" TEXT NOT NULL,
+  "taskInfo" TEXT,
+  "sourceUrl" TEXT,
+  "sourcePath" TEXT,
+  "targetPath" TEXT,
+  "taskStatus" TEXT,
+  "createTime" DATETIME,
+  "updateTime" DATETIME,
+  "isDelete" INTEGER NOT NULL DEFAULT 0,
+  "infoHash" TEXT,
+  "archiveTime" DATETIME
+);
+
+-- ----------------------------
+-- Table structure for file_task_archive
+-- ----------------------------
+DROP TABLE IF EXISTS "file_task_archive";
+CREATE TABLE "file_task_archive" (
+  "id" INTEGER PRIMARY KEY,
+  "downloadTaskId" INTEGER,
+  "sourcePath" TEXT NOT NULL,
+  "targetPath" TEXT NOT NULL,
+  "file_rename" TEXT NOT NULL,
+  "file_status" TEXT NOT NULL DEFAULT 'pending',
+  "errorMessage" TEXT,
+  "createTime" DATETIME,
+  "updateTime" DATETIME
+);
+
+-- ----------------------------
+-- Indexes structure for table download_task_archive / file_task_archive
+-- ----------------------------
+CREATE INDEX "idx_task_archive_list"
+ON "download_task_archive" (
+  "isDelete" ASC,
+  "createTime" ASC
+);
+CREATE INDEX "idx_fileTaskArchive_downloadTaskId"
+ON "file_task_archive" (
+  "downloadTaskId" ASC
+);
+
+-- ----------------------------
+-- Table structure for tmdb_title
+-- ----------------------------
+DROP TABLE IF EXISTS "tmdb_title";
+CREATE TABLE "tmdb_title" (
+  "mediaType" TEXT NOT NULL,
+  "tmdbId" INTEGER NOT NULL,
+  "englishTitle" TEXT,
+  "altTitles" TEXT,
+  "updateTime" DATETIME,
+  PRIMARY KEY ("mediaType", "tmdbId")
+) WITHOUT ROWID;
+
+-- ----------------------------
+-- Table structure for bangumi_season
+-- ----------------------------
+DROP TABLE IF EXISTS "bangumi_season";
+CREATE TABLE "bangumi_season" (
+  "year" INTEGER NOT NULL,
+  "season" TEXT NOT NULL,
+  "data" TEXT NOT NULL,
+  "updateTime" DATETIME,
+  PRIMARY KEY ("year", "season")
+) WITHOUT ROWID;
+
+-- ----------------------------
+-- Full-text index for table download_task / file_task
+-- ----------------------------
+DROP TABLE IF EXISTS "task_fts";
+CREATE VIRTUAL TABLE task_fts USING fts5(taskName, taskInfo, fileNames, tokenize = 'trigram');
+CREATE TRIGGER IF NOT EXISTS trg_task_fts_insert AFTER INSERT ON download_task
+WHEN NEW.isDelete = 0
+BEGIN
+    INSERT INTO task_fts (rowid, taskName, taskInfo, fileNames)
+        VALUES (NEW.id, NEW.taskName, CASE WHEN NEW.taskInfo GLOB '[0-9]*%' THEN NULL ELSE NEW.taskInfo END, (SELECT group_concat(file_rename, ' ') FROM file_task WHERE downloadTaskId = NEW.id));
+END;
+CREATE TRIGGER IF NOT EXISTS trg_task_fts_rename AFTER UPDATE OF taskName ON download_task
+WHEN OLD.taskName IS NOT NEW.taskName
+BEGIN
+    UPDATE task_fts SET taskName = NEW.taskName WHERE rowid = NEW.id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_task_fts_info AFTER UPDATE OF taskInfo ON download_task
+WHEN OLD.taskInfo IS NOT NEW.taskInfo AND IFNULL(NEW.taskInfo, '') NOT GLOB '[0-9]*%'
+BEGIN
+    UPDATE task_fts SET taskInfo = NEW.taskInfo WHERE rowid = NEW.id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_task_fts_visibility AFTER UPDATE OF isDelete ON download_task
+WHEN OLD.isDelete IS NOT NEW.isDelete
+BEGIN
+    DELETE FROM task_fts WHERE rowid = OLD.id;
+    INSERT INTO task_fts (rowid, taskName, taskInfo, fileNames)
+        SELECT NEW.id, NEW.taskName, CASE WHEN NEW.taskInfo GLOB '[0-9]*%' THEN NULL ELSE NEW.taskInfo END, (SELECT group_concat(file_rename, ' ') FROM file_task WHERE downloadTaskId = NEW.id)
+        WHERE NEW.isDelete = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_task_fts_delete AFTER DELETE ON download_task
+BEGIN
+    DELETE FROM task_fts WHERE rowid = OLD.id;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_file_fts_insert AFTER INSERT ON file_task
+BEGIN
+    UPDATE task_fts SET fileNames = (SELECT group_concat(file_rename, ' ') FROM file_task WHERE downloadTaskId = NEW.downloadTaskId) WHERE rowid = NEW.downloadTaskId;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_file_fts_update AFTER UPDATE OF file_rename, downloadTaskId ON file_task
+WHEN OLD.file_rename IS NOT NEW.file_rename OR OLD.downloadTaskId IS NOT NEW.downloadTaskId
+BEGIN
+    UPDATE task_fts SET fileNames = (SELECT group_concat(file_rename, ' ') FROM file_task WHERE downloadTaskId = OLD.downloadTaskId) WHERE rowid = OLD.downloadTaskId;
+    UPDATE task_fts SET fileNames = (SELECT group_concat(file_rename, ' ') FROM file_task WHERE downloadTaskId = NEW.downloadTaskId) WHERE rowid = NEW.downloadTaskId;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_file_fts_delete AFTER DELETE ON file_task
+BEGIN
+    UPDATE task_fts SET fileNames = (SELECT group_concat(file_rename, ' ') FROM file_task WHERE downloadTaskId = OLD.downloadTaskId) WHERE rowid = OLD.downloadTaskId;
+END;
 
 PRAGMA foreign_keys = true;
@@ -10,6 +10,8 @@ import tempfile
 _test_db = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
 _test_db.close()
 os.environ["ZONGZI_DATABASE_PATH"] = os.path.abspath(_test_db.name)
+# 外部接口均为 mock，关闭磁盘 HTTP 缓存，避免在配置目录生成缓存文件；缓存本身由 test_http_cache 用临时文件测试
+os.environ["ZONGZI_CACHE_HTTP_CACHE_MB"] = "0"
 
 # CI 环境没有 config.yml，通过环境变量注入测试用的用户名和密码
 # 密码直接用 bcrypt 哈希值，避免被 _hash_env_password_if_needed 做 SHA-256 二次哈希
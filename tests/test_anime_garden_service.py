@@ -1,11 +1,15 @@
 """
 动漫花园服务单元测试（mock HTTP）
-覆盖：get_teams、search（关键字、分页、字幕组筛选）
+覆盖：get_teams、search（关键字、分页、字幕组筛选、核心词回退搜索并发与合并）、搜索结果与字幕组缓存、下一页预取（排队中的预取不等待、被新搜索取代时取消）
 """
+import threading
+import time
+
 import pytest
+import requests
 from unittest.mock import MagicMock, patch
 
-from app.services.anime_garden_service import AnimeGardenService
+from app.services.anime_garden_service import _SEARCH_CACHE_ENTRIES, AnimeGardenService, _prefetch_pool
 
 
 def _make_teams_response():
@@ -173,3 +177,164 @@ class TestSearch:
         svc = AnimeGardenService()
         with pytest.raises(req_lib.RequestException):
             svc.search("test")
+
+
+def _resources_response(ids):
+    data = _make_search_response()
+    template = data["resources"][0]
+    data["resources"] = [{**template, "id": i, "providerId": str(i)} for i in ids]
+    resp = MagicMock()
+    resp.json.return_value = data
+    return resp
+
+
+class TestFallbackSearch:
+    """search：拆分搜索与核心词回退搜索并发"""
+
+    @patch("app.services.anime_garden_service.requests.get")
+    def test_fallback_issued_concurrently_and_merged(self, mock_get):
+        barrier = threading.Barrier(2, timeout=2)
+
+        def fake_get(url, params=None, **kw):
+            # 两个请求同时在途（串行请求时屏障会超时）
+            barrier.wait()
+            if params["search"] == ["葬送的芙莉莲", "第三季"]:
+                return _resources_response([1])
+            return _resources_response([1, 2, 3])
+
+        mock_get.side_effect = fake_get
+        result = AnimeGardenService().search("葬送的芙莉莲第三季", page_size=10)
+        assert [r["id"] for r in result["resources"]] == [1, 2, 3]
+        assert result["query_modified"] is True
+        assert result["query_used"] == "葬送的芙莉莲"
+
+    @patch("app.services.anime_garden_service.requests.get")
+    def test_fallback_discarded_when_enough(self, mock_get):
+        def fake_get(url, params=None, **kw):
+            if len(params["search"]) > 1:
+                return _resources_response(range(1, 6))
+            return _resources_response([100])
+
+        mock_get.side_effect = fake_get
+        result = AnimeGardenService().search("咒术回战S2", page_size=10)
+        assert [r["id"] for r in result["resources"]] == [1, 2, 3, 4, 5]
+        assert result["query_used"] == "咒术回战 + S2"
+
+    @patch("app.services.anime_garden_service.requests.get")
+    def test_fallback_failure_keeps_split_results(self, mock_get):
+        def fake_get(url, params=None, **kw):
+            if len(params["search"]) > 1:
+                return _resources_response([1])
+            raise requests.RequestException("timeout")
+
+        mock_get.side_effect = fake_get
+        result = AnimeGardenService().search("咒术回战S2")
+        assert [r["id"] for r in result["resources"]] == [1]
+
+    @patch("app.services.anime_garden_service.requests.get")
+    def test_unsplit_query_single_request(self, mock_get):
+        mock_get.return_value = _resources_response([1])
+        AnimeGardenService().search("测试动画")
+        assert mock_get.call_count == 1
+
+
+class TestCache:
+    """搜索结果/字幕组缓存与下一页预取"""
+
+    @patch("app.services.anime_garden_service.requests.get")
+    def test_search_cached_by_terms(self, mock_get):
+        mock_get.return_value = _resources_response([1])
+        svc = AnimeGardenService()
+        svc.search("测试动画", page_size=10)
+        svc.search(" 测试动画 ", page_size=10)
+        assert mock_get.call_count == 1
+        # 字幕组、每页数量不同时分别缓存
+        svc.search("测试动画", page_size=10, fansub="LoliHouse")
+        svc.search("测试动画", page_size=20)
+        assert mock_get.call_count == 3
+
+    @patch("app.services.anime_garden_service.requests.get")
+    def test_teams_cached(self, mock_get):
+        resp = MagicMock()
+        resp.json.return_value = _make_teams_response()
+        mock_get.return_value = resp
+        svc = AnimeGardenService()
+        assert svc.get_teams() == svc.get_teams()
+        assert mock_get.call_count == 1
+
+    @patch("app.services.anime_garden_service.requests.get")
+    def test_next_page_prefetched(self, mock_get):
+        def fake_get(url, params=None, **kw):
+            page = params["page"]
+            resp = _resources_response([page * 100])
+            resp.json.return_value["pagination"] = {"page": page, "pageSize": 10, "complete": page >= 2}
+            return resp
+
+        mock_get.side_effect = fake_get
+        svc = AnimeGardenService()
+        svc.search("测试动画", page=1, page_size=10)
+        # 预取线程为单线程，提交一个空任务即可等待预取完成
+        _prefetch_pool.submit(lambda: None).result(timeout=2)
+        assert mock_get.call_count == 2
+
+        result = svc.search("测试动画", page=2, page_size=10)
+        assert [r["id"] for r in result["resources"]] == [200]
+        # 最后一页不再预取
+        _prefetch_pool.submit(lambda: None).result(timeout=2)
+        assert mock_get.call_count == 2
+        assert svc._prefetching == {}
+
+    @staticmethod
+    def _paged_get(url, params=None, **kw):
+        page = params["page"]
+        resp = _resources_response([page * 100])
+        resp.json.return_value["pagination"] = {"page": page, "pageSize": 10, "complete": False}
+        return resp
+
+    @patch("app.services.anime_garden_service.requests.get")
+    def test_queued_prefetch_not_waited_for(self, mock_get):
+        mock_get.side_effect = self._paged_get
+        blocker = threading.Event()
+        _prefetch_pool.submit(blocker.wait, 2)
+        try:
+            svc = AnimeGardenService()
+            svc.search("测试动画", page=1, page_size=10)
+            # 第 2 页的预取排在阻塞任务之后：用户请求直接自行获取，不等待
+            start = time.perf_counter()
+            result = svc.search("测试动画", page=2, page_size=10)
+            assert time.perf_counter() - start < 1
+            assert [r["id"] for r in result["resources"]] == [200]
+        finally:
+            blocker.set()
+            _prefetch_pool.submit(lambda: None).result(timeout=5)
+
+    @patch("app.services.anime_garden_service.requests.get")
+    def test_newer_search_cancels_queued_prefetch(self, mock_get):
+        mock_get.side_effect = self._paged_get
+        blocker = threading.Event()
+        _prefetch_pool.submit(blocker.wait, 2)
+        try:
+            svc = AnimeGardenService()
+            svc.search("测试动画", page=1, page_size=10)
+            svc.search("另一个动画", page=1, page_size=10)
+            assert list(svc._prefetching) == [(("另一个动画",), 2, 10, "")]
+        finally:
+            blocker.set()
+            _prefetch_pool.submit(lambda: None).result(timeout=5)
+        # 被取消的预取没有发出请求
+        assert mock_get.call_count == 3
+
+    @patch("app.services.anime_garden_service.requests.get")
+    def test_teams_survive_search_eviction(self, mock_get):
+        teams = MagicMock()
+        teams.json.return_value = _make_teams_response()
+        mock_get.return_value = teams
+        svc = AnimeGardenService()
+        svc.get_teams()
+
+        mock_get.return_value = _resources_response([1])
+        for i in range(_SEARCH_CACHE_ENTRIES + 1):
+            svc.search(f"动画{i}")
+        calls = mock_get.call_count
+        assert len(svc.get_teams()) == 2
+        assert mock_get.call_count == calls
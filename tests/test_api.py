@@ -1,7 +1,8 @@
 """
 API 冒烟测试
-覆盖：健康检查、登录、Refresh Token、Logout、Cookie 认证、任务列表、通知、系统配置
+覆盖：健康检查、登录、Refresh Token、Logout、Cookie 认证、任务列表与搜索、通知、系统配置、Bangumi 周历 ETag、搜索补全会话取代
 """
+from app.core import db
 from app.core.security import create_access_token
 
 
@@ -248,9 +249,94 @@ def test_notifications_list(client, token):
     assert "total" in data["data"]
 
 
+def test_notifications_cursor_pagination(client, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    resp = client.get("/api/v1/notifications/", params={"page_size": 1, "with_total": False}, headers=headers)
+    data = resp.json()["data"]
+    assert data["total"] is None
+    assert "next_cursor" in data
+    if data["next_cursor"]:
+        resp = client.get(
+            "/api/v1/notifications/", params={"page_size": 1, "cursor": data["next_cursor"]}, headers=headers
+        )
+        assert resp.json()["code"] == 200
+
+
+def test_tasks_list_invalid_cursor(client, token):
+    resp = client.get(
+        "/api/v1/tasks/list", params={"cursor": "bogus"}, headers={"Authorization": f"Bearer {token}"}
+    )
+    assert resp.status_code == 200
+    assert resp.json()["code"] == 40000
+
+
+def test_tasks_search(client, token):
+    db.insert_download_task("进击的巨人 最终季", "", "subtitle:search", "/dl", "/nas", "completed")
+    resp = client.get(
+        "/api/v1/tasks/search", params={"q": "巨人"}, headers={"Authorization": f"Bearer {token}"}
+    )
+    data = resp.json()
+    assert data["code"] == 200
+    assert data["data"]["total"] >= 1
+    assert any(t["taskName"] == "进击的巨人 最终季" for t in data["data"]["items"])
+
+
 def test_system_paths(client, token):
     resp = client.get("/api/v1/system/paths", headers={"Authorization": f"Bearer {token}"})
     assert resp.status_code == 200
     data = resp.json()
     assert data["code"] == 200
     assert "data" in data
+
+
+# ---------------------------------------------------------------------------
+# Bangumi 周历（预序列化响应 + ETag）
+# ---------------------------------------------------------------------------
+
+def test_bangumi_calendar_etag(client, token):
+    from unittest.mock import patch
+
+    from app.services.bangumi_service import CalendarSnapshot
+
+    body = b'{"code":200,"message":"success","data":[]}'
+    snapshot = CalendarSnapshot([], body, '"v1"', None)
+    headers = {"Authorization": f"Bearer {token}"}
+    with patch("app.services.bangumi_service.bangumi_service.get_calendar_snapshot", return_value=snapshot):
+        resp = client.get("/api/v1/bangumi/calendar", headers=headers)
+        assert resp.status_code == 200
+        assert resp.content == body
+        assert resp.headers["ETag"] == '"v1"'
+        resp = client.get("/api/v1/bangumi/calendar", headers={**headers, "If-None-Match": '"v1"'})
+        assert resp.status_code == 304
+
+
+def test_bangumi_calendar_refresh_validated(client, token):
+    from unittest.mock import patch
+
+    from app.services.bangumi_service import CalendarSnapshot
+
+    day = {"weekday": {"id": 1, "cn": "星期一", "en": "Mon", "ja": "月曜日"}, "items": []}
+    snapshot = CalendarSnapshot([day], b"{}", '"v2"', None)
+    with patch("app.services.bangumi_service.bangumi_service.refresh_calendar", return_value=snapshot):
+        resp = client.post("/api/v1/bangumi/calendar/refresh", headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 200
+    # 经 response_model 校验与序列化，而不是原样返回快照字节
+    assert resp.json()["data"][0]["weekday"]["cn"] == "星期一"
+    assert resp.headers["ETag"] == '"v2"'
+
+
+# ---------------------------------------------------------------------------
+# 搜索补全：只按输入框会话 ID 取代旧请求
+# ---------------------------------------------------------------------------
+
+def test_suggestions_supersede_by_session(client, token):
+    from unittest.mock import patch
+
+    headers = {"Authorization": f"Bearer {token}"}
+    with patch("app.api.v1.tmdb.suggestion_service.suggest", return_value=["Dune"]) as suggest:
+        resp = client.get("/api/v1/tmdb/suggestions", params={"query": "du"}, headers=headers)
+        assert resp.json()["data"]["suggestions"] == ["Dune"]
+        # 未带会话 ID：不做取代（共用出口地址的用户互不影响）
+        assert suggest.call_args.args[3] == ""
+        client.get("/api/v1/tmdb/suggestions", params={"query": "du", "session": "tab-1"}, headers=headers)
+        assert suggest.call_args.args[3].endswith(":tab-1")
@@ -1,12 +1,36 @@
 """
 Bangumi 服务单元测试（mock HTTP）
-覆盖：get_calendar、get_season、get_subject、_pick_image、_weekday_from_date
+覆盖：get_calendar（零点后刷新、预序列化响应、上游 ETag 未变时沿用）、get_season（月份/分页并发、历史季度持久化、当季短期缓存、不挤掉周历缓存）、get_subject（缓存）、get_subjects（批量：缓存命中、并发上限、单条失败）、_pick_image、_weekday_from_date
 """
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
 import pytest
+import requests
 from unittest.mock import MagicMock, patch
 
-from app.services.bangumi_service import BangumiService, _api_base
+from app.core.db import Database
+from app.services.bangumi_service import (
+    _SEASON_CACHE_ENTRIES,
+    MAX_BATCH_SUBJECTS,
+    BangumiService,
+    _api_base,
+    _calendar_ttl,
+    _season_finished,
+)
+
+
+@pytest.fixture(autouse=True)
+def season_db(tmp_path):
+    """每个用例独立的季度缓存库，避免用例之间共用已保存的季度"""
+    database = Database(str(tmp_path / "bangumi.db"), pool_size=1)
+    database.init_db()
+    with patch("app.services.bangumi_service.db", database):
+        yield database
+    database.close()
 
 
 # ---------------------------------------------------------------------------
@@ -62,6 +86,13 @@ def _make_season_page(total: int, offset: int, items: list):
     }
 
 
+def _page_response(data):
+    resp = MagicMock()
+    resp.raise_for_status = MagicMock()
+    resp.json.return_value = data
+    return resp
+
+
 def _make_season_item(sid: int, name: str, date: str, platform: str = "TV"):
     return {
         "id": sid,
@@ -213,6 +244,64 @@ class TestGetCalendar:
         with pytest.raises(req_lib.RequestException):
             svc.get_calendar()
 
+    @patch("app.services.bangumi_service.requests.get")
+    def test_cached_between_requests(self, mock_get):
+        mock_resp = MagicMock()
+        mock_resp.json.return_value = _make_calendar_response()
+        mock_get.return_value = mock_resp
+
+        svc = BangumiService()
+        assert svc.get_calendar() == svc.get_calendar()
+        assert mock_get.call_count == 1
+        # 已新鲜的缓存不重复预热
+        assert svc.prewarm(horizon=60) == 0
+        assert svc.prewarm(horizon=25 * 3600) == 1
+        assert mock_get.call_count == 2
+
+    @pytest.mark.parametrize("now, expected", [
+        (datetime(2024, 5, 1, 12, 0), 12 * 3600 + 600),
+        (datetime(2024, 5, 1, 23, 55), 15 * 60),
+        (datetime(2024, 5, 1, 0, 5), 5 * 60),
+        (datetime(2024, 12, 31, 0, 10), 24 * 3600),
+    ])
+    def test_ttl_until_after_midnight(self, now, expected):
+        assert _calendar_ttl(now) == expected
+
+    @patch("app.services.bangumi_service.requests.get")
+    def test_snapshot_preserialized(self, mock_get):
+        mock_resp = MagicMock()
+        mock_resp.headers = {}
+        mock_resp.json.return_value = _make_calendar_response()
+        mock_get.return_value = mock_resp
+
+        snapshot = BangumiService().get_calendar_snapshot()
+        body = json.loads(snapshot.body)
+        assert body["code"] == 200
+        assert body["data"][0]["items"][0]["id"] == 1001
+        assert snapshot.etag.startswith('"') and snapshot.etag.endswith('"')
+
+    @patch("app.services.bangumi_service.requests.get")
+    def test_unchanged_upstream_reuses_snapshot(self, mock_get):
+        mock_resp = MagicMock()
+        mock_resp.headers = {"ETag": 'W/"abc"'}
+        mock_resp.json.return_value = _make_calendar_response()
+        mock_get.return_value = mock_resp
+
+        svc = BangumiService()
+        first = svc.get_calendar_snapshot()
+        second = svc.refresh_calendar()
+        assert second is first
+        # 上游 ETag 未变时不再解析响应
+        assert mock_resp.json.call_count == 1
+
+        mock_resp.headers = {"ETag": 'W/"def"'}
+        calendar = _make_calendar_response()
+        calendar[1]["items"] = calendar[0]["items"][:1]
+        mock_resp.json.return_value = calendar
+        third = svc.refresh_calendar()
+        assert third.etag != first.etag
+        assert len(svc.get_calendar()[1]["items"]) == 1
+
 
 # ---------------------------------------------------------------------------
 # get_season（mock HTTP 分页）
@@ -242,24 +331,15 @@ class TestGetSeason:
 
     @patch("app.services.bangumi_service.requests.get")
     def test_pagination_across_pages(self, mock_get):
-        """单月的两页数据能正确合并（_fetch_subjects_month 内部分页）"""
-        page1 = [_make_season_item(i, f"Anime {i}", "2026-01-01") for i in range(1, 51)]
-        page2 = [_make_season_item(i, f"Anime {i}", "2026-01-01") for i in range(51, 81)]
-
-        resp1 = MagicMock()
-        resp1.raise_for_status = MagicMock()
-        resp1.json.return_value = _make_season_page(80, 0, page1)
-
-        resp2 = MagicMock()
-        resp2.raise_for_status = MagicMock()
-        resp2.json.return_value = _make_season_page(80, 50, page2)
-
-        # 三月的 mock（都返回空，只测单月分页）
-        empty_resp = MagicMock()
-        empty_resp.raise_for_status = MagicMock()
-        empty_resp.json.return_value = _make_season_page(0, 0, [])
-
-        mock_get.side_effect = [resp1, resp2, empty_resp, empty_resp]
+        """单月的多页数据能正确合并（首页得到总数后其余分页并发请求）"""
+        pages = {
+            (1, 0): _make_season_page(130, 0, [_make_season_item(i, f"Anime {i}", "2026-01-01") for i in range(1, 51)]),
+            (1, 50): _make_season_page(130, 50, [_make_season_item(i, f"Anime {i}", "2026-01-01") for i in range(51, 101)]),
+            (1, 100): _make_season_page(130, 100, [_make_season_item(i, f"Anime {i}", "2026-01-01") for i in range(101, 131)]),
+        }
+        mock_get.side_effect = lambda url, params=None, **kw: _page_response(
+            pages.get((params["month"], params["offset"]), _make_season_page(0, 0, []))
+        )
 
         svc = BangumiService()
         result = svc.get_season(2026, "winter")
@@ -267,8 +347,69 @@ class TestGetSeason:
         all_items = []
         for day in result:
             all_items.extend(day["items"])
-        # 80 条来自月份 1
-        assert len(all_items) == 80
+        # 130 条来自月份 1 的三页
+        assert sorted(it["id"] for it in all_items) == list(range(1, 131))
+        # 3 个月的首页 + 月份 1 的 2 个后续分页
+        assert mock_get.call_count == 5
+
+    @patch("app.services.bangumi_service.requests.get")
+    def test_months_fetched_concurrently(self, mock_get):
+        """三个月的首页同时在途（串行请求时屏障会超时）"""
+        barrier = threading.Barrier(3, timeout=2)
+
+        def fake_get(url, params=None, **kw):
+            barrier.wait()
+            return _page_response(_make_season_page(1, 0, [
+                _make_season_item(params["month"], "A", f"2026-0{params['month']}-05")
+            ]))
+
+        mock_get.side_effect = fake_get
+        result = BangumiService().get_season(2026, "winter")
+        assert sum(len(day["items"]) for day in result) == 3
+
+    @patch("app.services.bangumi_service.requests.get")
+    def test_past_season_persisted(self, mock_get, season_db):
+        mock_get.return_value = _page_response(_make_season_page(1, 0, [_make_season_item(1, "A", "2025-01-06")]))
+        first = BangumiService().get_season(2025, "winter")
+        assert mock_get.call_count == 3
+        assert season_db.get_bangumi_season(2025, "winter") == first
+        # 新实例（如重启后）直接读库，不再请求
+        assert BangumiService().get_season(2025, "winter") == first
+        assert mock_get.call_count == 3
+
+    @patch("app.services.bangumi_service.requests.get")
+    def test_current_season_cached_in_memory_only(self, mock_get, season_db):
+        mock_get.return_value = _page_response(_make_season_page(0, 0, []))
+        with patch("app.services.bangumi_service._season_finished", return_value=False):
+            svc = BangumiService()
+            svc.get_season(2026, "autumn")
+            svc.get_season(2026, "autumn")
+        assert mock_get.call_count == 3
+        assert season_db.get_bangumi_season(2026, "autumn") is None
+
+    @patch("app.services.bangumi_service.requests.get")
+    def test_seasons_do_not_evict_calendar(self, mock_get):
+        mock_resp = MagicMock()
+        mock_resp.json.return_value = _make_calendar_response()
+        mock_get.return_value = mock_resp
+        svc = BangumiService()
+        svc.get_calendar()
+
+        seasons = [(year, season) for year in range(2000, 2030) for season in ("winter", "spring", "summer", "autumn")]
+        with patch("app.services.bangumi_service._season_finished", return_value=False), \
+                patch.object(BangumiService, "_fetch_season", return_value=[]):
+            for year, season in seasons[:_SEASON_CACHE_ENTRIES + 1]:
+                svc.get_season(year, season)
+        # 周历仍在缓存中，不因季度缓存淘汰而重新请求
+        assert svc.get_calendar()
+        assert mock_get.call_count == 1
+
+    def test_season_finished(self):
+        months = (7, 8, 9)
+        assert not _season_finished(2026, months, today=date(2026, 10, 19))
+        assert _season_finished(2026, months, today=date(2026, 10, 31))
+        assert _season_finished(2025, (10, 11, 12), today=date(2026, 1, 31))
+        assert not _season_finished(2025, (10, 11, 12), today=date(2026, 1, 30))
 
     @patch("app.services.bangumi_service.requests.get")
     def test_non_tv_web_filtered(self, mock_get):
@@ -396,6 +537,64 @@ class TestGetSubject:
         with pytest.raises(req_lib.RequestException):
             svc.get_subject(1001)
 
+    @patch("app.services.bangumi_service.requests.get")
+    def test_cached_between_requests(self, mock_get):
+        mock_get.return_value = _page_response(_make_subject_detail())
+        svc = BangumiService()
+        assert svc.get_subject(1001) == svc.get_subject(1001)
+        assert mock_get.call_count == 1
+
+
+class TestGetSubjects:
+    """get_subjects：批量条目详情"""
+
+    @staticmethod
+    def _detail_for(url, **kw):
+        sid = int(url.rsplit("/", 1)[1])
+        if sid == 404:
+            raise requests.RequestException("not found")
+        detail = _make_subject_detail()
+        detail["id"] = sid
+        return _page_response(detail)
+
+    @patch("app.services.bangumi_service.requests.get")
+    def test_order_cache_and_failures(self, mock_get):
+        mock_get.side_effect = self._detail_for
+        svc = BangumiService()
+        svc.get_subject(3)
+        assert mock_get.call_count == 1
+
+        items, failed = svc.get_subjects([5, 3, 404, 7, 5])
+        assert [it["id"] for it in items] == [5, 3, 7]
+        assert failed == [404]
+        # 已缓存的 3 不再请求，重复的 5 只请求一次
+        assert mock_get.call_count == 4
+
+    @patch("app.services.bangumi_service.requests.get")
+    def test_concurrency_limited(self, mock_get):
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        def slow_get(url, **kw):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.05)
+            with lock:
+                state["active"] -= 1
+            return self._detail_for(url)
+
+        mock_get.side_effect = slow_get
+        with patch("app.services.bangumi_service._api_pool", ThreadPoolExecutor(max_workers=2)) as pool:
+            items, failed = BangumiService().get_subjects(list(range(1, 9)))
+            pool.shutdown()
+        assert len(items) == 8 and failed == []
+        assert state["peak"] == 2
+
+    def test_too_many_ids(self):
+        with pytest.raises(ValueError):
+            BangumiService().get_subjects(list(range(MAX_BATCH_SUBJECTS + 1)))
+
 
 # ---------------------------------------------------------------------------
 # _api_base 配置
@@ -0,0 +1,55 @@
+"""
+首页缓存预热 CacheWarmer 测试（mock TMDB / Bangumi 服务）
+覆盖：按预热间隔传递刷新窗口、单个来源失败不影响其它来源、间隔为 0 时不启动
+"""
+from unittest.mock import patch
+
+from app.services.cache_warmer import CacheWarmer
+
+
+def _config(values):
+    return lambda key, default=None: values.get(key, default)
+
+
+class TestCacheWarmer:
+
+    @patch("app.services.cache_warmer.bangumi_service")
+    @patch("app.services.cache_warmer.tmdb_service")
+    @patch("app.services.cache_warmer.config")
+    def test_run_once(self, mock_config, mock_tmdb, mock_bangumi):
+        mock_config.get.side_effect = _config({"cache.prewarm_interval_minutes": 10})
+        mock_tmdb.prewarm.return_value = 9
+        mock_bangumi.prewarm.return_value = 1
+        assert CacheWarmer().run_once() == {"tmdb": 9, "bangumi": 1}
+        mock_tmdb.prewarm.assert_called_once_with(600)
+        mock_bangumi.prewarm.assert_called_once_with(600)
+
+    @patch("app.services.cache_warmer.bangumi_service")
+    @patch("app.services.cache_warmer.tmdb_service")
+    @patch("app.services.cache_warmer.config")
+    def test_failure_isolated(self, mock_config, mock_tmdb, mock_bangumi):
+        mock_config.get.side_effect = _config({})
+        mock_tmdb.prewarm.side_effect = RuntimeError("offline")
+        mock_bangumi.prewarm.return_value = 1
+        assert CacheWarmer().run_once() == {"tmdb": 0, "bangumi": 1}
+
+    @patch("app.services.cache_warmer.config")
+    def test_disabled_when_interval_zero(self, mock_config):
+        mock_config.get.side_effect = _config({"cache.prewarm_interval_minutes": 0})
+        warmer = CacheWarmer()
+        warmer.start()
+        assert not warmer.running and warmer.thread is None
+
+    @patch("app.services.cache_warmer.bangumi_service")
+    @patch("app.services.cache_warmer.tmdb_service")
+    @patch("app.services.cache_warmer.config")
+    def test_warms_on_start_and_stops(self, mock_config, mock_tmdb, mock_bangumi):
+        mock_config.get.side_effect = _config({"cache.prewarm_interval_minutes": 30})
+        mock_tmdb.prewarm.return_value = 0
+        mock_bangumi.prewarm.return_value = 0
+        warmer = CacheWarmer()
+        warmer.start()
+        thread = warmer.thread
+        warmer.stop()
+        assert not thread.is_alive()
+        mock_tmdb.prewarm.assert_called_once()
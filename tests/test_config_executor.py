@@ -0,0 +1,101 @@
+"""
+ConfigExecutor 单元测试
+覆盖：首次提交时按配置创建、并发数受配置限制、修改配置后换用新线程池且旧任务照常完成、
+旧线程池中执行中的任务计入新上限（调大/调小时都不超出）、配置无效时用默认值
+使用 mock config.get 模拟运行时修改配置
+"""
+import threading
+import time
+from unittest.mock import patch
+
+from app.core.config_executor import ConfigExecutor
+
+
+def _sizes(values):
+    """按 config_key 返回 values 中的当前值（values 可在测试中修改）"""
+    return lambda key, default=None: values.get(key, default)
+
+
+class TestConfigExecutor:
+
+    def test_lazy_and_limited(self):
+        values = {"x.concurrency": 2}
+        with patch("app.core.config_executor.config.get", side_effect=_sizes(values)):
+            executor = ConfigExecutor("x.concurrency", 4)
+            assert executor._pool is None
+            lock = threading.Lock()
+            state = {"active": 0, "peak": 0}
+
+            def work(_):
+                with lock:
+                    state["active"] += 1
+                    state["peak"] = max(state["peak"], state["active"])
+                time.sleep(0.05)
+                with lock:
+                    state["active"] -= 1
+
+            list(executor.map(work, range(6)))
+        assert state["peak"] == 2
+        assert executor.max_workers == 2
+
+    def test_rebuilt_when_config_changes(self):
+        values = {"x.concurrency": 1}
+        release = threading.Event()
+        with patch("app.core.config_executor.config.get", side_effect=_sizes(values)):
+            executor = ConfigExecutor("x.concurrency", 4)
+            running = executor.submit(release.wait, 2)
+            values["x.concurrency"] = 3
+            # 旧任务占 1 个名额，上限调为 3 后新任务在新线程池中立即执行
+            assert executor.submit(lambda: "new").result(timeout=1) == "new"
+            assert executor.max_workers == 3
+            release.set()
+            assert running.result(timeout=2) is True
+
+    def test_old_tasks_count_toward_raised_limit(self):
+        values = {"x.concurrency": 2}
+        release = threading.Event()
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        def work():
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            release.wait(2)
+            with lock:
+                state["active"] -= 1
+
+        with patch("app.core.config_executor.config.get", side_effect=_sizes(values)):
+            executor = ConfigExecutor("x.concurrency", 4)
+            futures = [executor.submit(work) for _ in range(2)]
+            values["x.concurrency"] = 3
+            futures += [executor.submit(work) for _ in range(2)]
+            time.sleep(0.2)
+            # 旧线程池的 2 个任务仍在执行，新线程池只能再开始 1 个
+            assert state["peak"] == 3
+            release.set()
+            for f in futures:
+                f.result(timeout=2)
+        assert state["peak"] == 3
+
+    def test_lowered_limit_waits_for_old_tasks(self):
+        values = {"x.concurrency": 3}
+        release = threading.Event()
+        with patch("app.core.config_executor.config.get", side_effect=_sizes(values)):
+            executor = ConfigExecutor("x.concurrency", 4)
+            running = [executor.submit(release.wait, 2) for _ in range(3)]
+            time.sleep(0.05)
+            values["x.concurrency"] = 1
+            started = threading.Event()
+            pending = executor.submit(started.set)
+            # 旧任务结束前已超出新上限，新任务不得开始
+            assert not started.wait(0.2)
+            release.set()
+            pending.result(timeout=2)
+            assert all(f.result(timeout=2) for f in running)
+
+    def test_invalid_config_uses_default(self):
+        with patch("app.core.config_executor.config.get", return_value="abc"):
+            assert ConfigExecutor("x.concurrency", 3).configured_size() == 3
+        with patch("app.core.config_executor.config.get", return_value=0):
+            assert ConfigExecutor("x.concurrency", 3).configured_size() == 1
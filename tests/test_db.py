@@ -0,0 +1,777 @@
+"""
+数据库层测试（临时 SQLite 文件，不依赖 conftest 的共享库）
+覆盖：建表与索引补建、WAL 模式下读写并发、热点查询执行计划均命中索引、infoHash 列回填与查重、通知折叠与清理、任务全文搜索、任务归档、TMDB 英文标题映射、Bangumi 历史季度、游标分页、旧库版本化迁移
+"""
+import base64
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from app.core import migrations
+from app.core.db import Database, decode_cursor, encode_cursor, notification_key
+
+
+@pytest.fixture
+def database(tmp_path):
+    """每个用例独立的临时数据库"""
+    # 池大小为 1：同一用例内的读取总在同一条连接上，便于挂 trace 回调
+    database = Database(str(tmp_path / "test.db"), pool_size=1)
+    database.init_db()
+    yield database
+    database.close()
+
+
+def _seed(database: Database) -> int:
+    """写入少量任务、文件任务与通知，返回任务 id"""
+    task_id = database.insert_download_task(
+        taskName="a" * 40,
+        taskInfo="",
+        sourceUrl="magnet:?xt=urn:btih:" + "a" * 40,
+        sourcePath="/dl",
+        targetPath="/nas",
+        taskStatus="downloading",
+    )
+    database.insert_file_task(task_id, "a.mkv", "Movie", "Movie.mkv")
+    database.insert_notification(title="hello")
+    return task_id
+
+
+def _capture_sql(database: Database, fn) -> list:
+    """执行 fn 并收集期间执行的 SQL（已展开绑定参数）"""
+    statements = []
+    # 写操作在写线程的连接上执行，同样挂上回调
+    database.run_write(lambda c: c.set_trace_callback(statements.append))
+    with database.read_conn() as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            fn()
+        finally:
+            conn.set_trace_callback(None)
+            database.run_write(lambda c: c.set_trace_callback(None))
+    return [s for s in statements if s.lstrip().upper().startswith(("SELECT", "UPDATE"))]
+
+
+def _query(database: Database, sql: str) -> list:
+    """在读连接上执行查询并返回全部行"""
+    with database.read_conn() as conn:
+        return conn.execute(sql).fetchall()
+
+
+def _full_scans(database: Database, sql: str) -> list:
+    """返回执行计划中未使用索引的全表扫描步骤"""
+    plan = _query(database, f"EXPLAIN QUERY PLAN {sql}")
+    # SCAN (subquery-N) 是对已带 LIMIT 的子查询结果的遍历，不是表扫描
+    return [
+        row[3] for row in plan
+        if row[3].startswith("SCAN") and "INDEX" not in row[3] and not row[3].startswith("SCAN (subquery")
+    ]
+
+
+class TestInitDb:
+    """init_db：建表并补建索引，旧库也能拿到新索引"""
+
+    def test_indexes_created(self, database):
+        names = {r[0] for r in _query(database, "SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {"idx_task_active", "idx_task_list", "idx_fileTask_downloadTaskId",
+                "idx_notif_list", "idx_notif_read_list"} <= names
+        assert "idx_notif_isRead" not in names
+
+    def test_existing_database_gets_indexes(self, tmp_path):
+        path = str(tmp_path / "old.db")
+        conn = sqlite3.connect(path)
+        conn.executescript(
+            "CREATE TABLE download_task (id INTEGER PRIMARY KEY AUTOINCREMENT, taskName TEXT NOT NULL, taskInfo TEXT,"
+            " sourceUrl TEXT, sourcePath TEXT, targetPath TEXT, taskStatus TEXT, createTime DATETIME,"
+            " updateTime DATETIME, isDelete INTEGER NOT NULL DEFAULT 0);"
+            "CREATE TABLE file_task (id INTEGER PRIMARY KEY AUTOINCREMENT, downloadTaskId INTEGER, file_rename TEXT,"
+            " file_status TEXT);"
+            "CREATE TABLE notification (id INTEGER PRIMARY KEY AUTOINCREMENT, isRead INTEGER, createTime DATETIME,"
+            " isDelete INTEGER NOT NULL DEFAULT 0);"
+            "CREATE INDEX idx_notif_isRead ON notification(isRead);"
+        )
+        conn.close()
+
+        database = Database(path)
+        database.init_db()
+        names = {r[0] for r in _query(database, "SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert "idx_task_active" in names
+        assert "idx_fileTask_downloadTaskId" in names
+        assert "idx_notif_isRead" not in names
+
+    def test_init_db_is_idempotent(self, database):
+        database.init_db()
+        database.init_db()
+        assert database.get_active_tasks() == []
+
+
+class TestWal:
+    """WAL 日志模式：读事务进行中写线程照常提交"""
+
+    @pytest.mark.parametrize("schema_file", ["main.sql", "create_table.sql"])
+    def test_fresh_database_uses_wal(self, tmp_path, schema_file):
+        database = Database(str(tmp_path / "fresh.db"))
+        database.schema_path = str(Path(database.schema_path).with_name(schema_file))
+        database.init_db()
+        assert _query(database, "PRAGMA journal_mode")[0][0] == "wal"
+        database.close()
+
+    def test_legacy_database_switched_to_wal(self, tmp_path):
+        database = Database(_legacy_database(tmp_path))
+        database.init_db()
+        assert _query(database, "PRAGMA journal_mode")[0][0] == "wal"
+        database.close()
+
+    def test_writer_commits_during_open_read(self, tmp_path):
+        database = Database(str(tmp_path / "wal.db"), pool_size=2)
+        database.init_db()
+        try:
+            task_id = _seed(database)
+            with database.read_conn() as reader:
+                reader.execute("BEGIN")
+                before = reader.execute("SELECT COUNT(*) FROM download_task").fetchone()[0]
+                # 回滚日志模式下读事务的 SHARED 锁会让提交等满 busy_timeout 后失败
+                database.run_write(
+                    lambda c: c.execute("UPDATE download_task SET taskStatus = 'completed' WHERE id = ?", (task_id,)),
+                    timeout=2,
+                )
+                database.insert_notification(title="during read")
+                # 读事务仍看到开始时的快照
+                assert reader.execute("SELECT COUNT(*) FROM download_task").fetchone()[0] == before
+                reader.rollback()
+            assert database.get_download_task_by_id(task_id)["taskStatus"] == "completed"
+        finally:
+            database.close()
+
+
+class TestHotQueryPlans:
+    """热点查询：EXPLAIN QUERY PLAN 中不应出现全表扫描"""
+
+    @pytest.mark.parametrize("call", [
+        lambda d, tid: d.get_active_tasks(),
+        lambda d, tid: d.get_download_tasks(1, 10),
+        lambda d, tid: d.get_file_tasks(tid),
+        lambda d, tid: d.update_file_tasks_by_download_task_id(tid, "cancelled"),
+        lambda d, tid: d.get_notifications(1, 20),
+        lambda d, tid: d.get_notifications(1, 20, is_read=False),
+        lambda d, tid: d.get_unread_count(),
+        lambda d, tid: d.get_task_status_counts(),
+        lambda d, tid: d.mark_all_notifications_read(),
+        lambda d, tid: d.get_tasks_by_hash("a" * 40),
+        lambda d, tid: d.get_download_tasks_by_cursor(encode_cursor({"createTime": "2099-01-01 00:00:00", "id": 1}), 10),
+        lambda d, tid: d.get_notifications_by_cursor(encode_cursor({"createTime": "2099-01-01 00:00:00", "id": 1}), 20),
+        lambda d, tid: d.get_notifications_by_cursor(
+            encode_cursor({"createTime": "2099-01-01 00:00:00", "id": 1}), 20, is_read=False
+        ),
+        lambda d, tid: d.get_download_tasks(2, 10, include_history=True),
+        lambda d, tid: d.get_download_tasks_by_cursor(
+            encode_cursor({"createTime": "2099-01-01 00:00:00", "id": 1}), 10, include_history=True
+        ),
+    ], ids=[
+        "get_active_tasks",
+        "get_download_tasks",
+        "get_file_tasks",
+        "update_file_tasks_by_download_task_id",
+        "get_notifications",
+        "get_notifications_unread",
+        "get_unread_count",
+        "get_task_status_counts",
+        "mark_all_notifications_read",
+        "get_tasks_by_hash",
+        "get_download_tasks_by_cursor",
+        "get_notifications_by_cursor",
+        "get_notifications_by_cursor_unread",
+        "get_download_tasks_history",
+        "get_download_tasks_by_cursor_history",
+    ])
+    def test_uses_index(self, database, call):
+        task_id = _seed(database)
+        statements = _capture_sql(database, lambda: call(database, task_id))
+        assert statements
+        for sql in statements:
+            assert _full_scans(database, sql) == [], sql
+
+    def test_active_tasks_use_partial_index(self, database):
+        _seed(database)
+        statements = _capture_sql(database, database.get_active_tasks)
+        plan = _query(database, f"EXPLAIN QUERY PLAN {statements[0]}")
+        assert any("idx_task_active" in row[3] for row in plan)
+
+    def test_active_tasks_filter_terminal_status(self, database):
+        task_id = _seed(database)
+        database.update_task_status(task_id, "completed")
+        assert database.get_active_tasks() == []
+
+
+class TestTaskStatusBatch:
+    """update_task_statuses：单事务批量写入，状态已被他处改变的行不覆盖"""
+
+    def test_batch_updates(self, database):
+        first = _seed(database)
+        second = database.insert_download_task("b" * 40, "", "", "/dl", "/nas", "downloading")
+        assert database.update_task_statuses([
+            (first, "downloading", 12.345, "downloading"),
+            (second, "seeding", 100, "downloading"),
+        ]) == 2
+        rows = {t["id"]: t for t in (database.get_download_task_by_id(first), database.get_download_task_by_id(second))}
+        assert rows[first]["taskInfo"] == "12.3%"
+        assert rows[second]["taskStatus"] == "seeding"
+
+    def test_skips_rows_changed_elsewhere(self, database):
+        task_id = _seed(database)
+        database.update_task_status(task_id, "cancelled")
+        assert database.update_task_statuses([(task_id, "downloading", 50, "downloading")]) == 0
+        assert database.get_download_task_by_id(task_id)["taskStatus"] == "cancelled"
+
+
+class TestCounters:
+    """stat_counter：触发器维护的计数与 COUNT(*) 始终一致"""
+
+    @staticmethod
+    def _actual(database: Database) -> dict:
+        with database.read_conn() as conn:
+            statuses = dict(conn.execute(
+                "SELECT taskStatus, COUNT(*) FROM download_task WHERE isDelete = 0 GROUP BY taskStatus"
+            ).fetchall())
+            return {
+                "tasks": conn.execute("SELECT COUNT(*) FROM download_task WHERE isDelete = 0").fetchone()[0],
+                "statuses": statuses,
+                "notifications": conn.execute("SELECT COUNT(*) FROM notification WHERE isDelete = 0").fetchone()[0],
+                "unread": conn.execute(
+                    "SELECT COUNT(*) FROM notification WHERE isDelete = 0 AND isRead = 0"
+                ).fetchone()[0],
+            }
+
+    @staticmethod
+    def _counted(database: Database) -> dict:
+        return {
+            "tasks": database.count_download_tasks(),
+            "statuses": database.get_task_status_counts(),
+            "notifications": database.count_notifications(),
+            "unread": database.get_unread_count(),
+        }
+
+    def test_counts_follow_writes(self, database):
+        ids = [
+            database.insert_download_task(f"t{i}", "", f"subtitle:{i}", "/dl", "/nas", "downloading")
+            for i in range(4)
+        ]
+        database.update_task_status(ids[0], "seeding", 100)
+        database.update_task_statuses([(ids[1], "downloading", 30, "downloading"), (ids[2], "moving", 100, "downloading")])
+        database.update_download_task_status(ids[3], "cancelled")
+        database.run_write(lambda conn: conn.execute("UPDATE download_task SET isDelete = 1 WHERE id = ?", (ids[2],)))
+        database.run_write(lambda conn: conn.execute("DELETE FROM download_task WHERE id = ?", (ids[3],)))
+
+        notification_ids = [database.insert_notification(title=f"n{i}") for i in range(5)]
+        database.mark_notification_read(notification_ids[0])
+        database.delete_notification(notification_ids[1])
+        database.delete_notification(notification_ids[0])
+        database.run_write(lambda conn: conn.execute("DELETE FROM notification WHERE id = ?", (notification_ids[2],)))
+
+        assert self._counted(database) == self._actual(database)
+        assert database.get_task_status_counts() == {"seeding": 1, "downloading": 1}
+        assert database.get_unread_count() == 2
+        database.mark_all_notifications_read()
+        assert database.get_unread_count() == 0
+        assert database.count_notifications(is_read=True) == 2
+
+    def test_rebuild_matches_triggers(self, database):
+        _seed(database)
+        database.insert_notification(title="x")
+        before = self._counted(database)
+        database.run_write(migrations.rebuild_counters)
+        assert self._counted(database) == before
+
+
+class TestNotificationRetention:
+    """通知折叠键、过期清理与增量 VACUUM"""
+
+    @staticmethod
+    def _age(database: Database, notification_id: int, days: int) -> None:
+        create_time = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+        database.run_write(
+            lambda conn: conn.execute("UPDATE notification SET createTime = ? WHERE id = ?", (create_time, notification_id))
+        )
+
+    def test_repeat_updates_existing_row(self, database):
+        key = notification_key(7, "retry")
+        first = database.insert_notification(title="任务待重试", content="第一次", collapse_key=key)
+        database.mark_notification_read(first)
+        second = database.insert_notification(title="任务待重试", content="第二次", collapse_key=key)
+        assert second == first
+        row = _query(database, f"SELECT content, isRead, repeatCount FROM notification WHERE id = {first}")[0]
+        assert tuple(row) == ("第二次", 0, 2)
+        assert database.count_notifications() == 1
+        assert database.get_unread_count() == 1
+
+    def test_different_keys_and_deleted_rows_not_collapsed(self, database):
+        retry = database.insert_notification(title="a", collapse_key=notification_key(7, "retry"))
+        other_task = database.insert_notification(title="b", collapse_key=notification_key(8, "retry"))
+        database.delete_notification(retry)
+        again = database.insert_notification(title="c", collapse_key=notification_key(7, "retry"))
+        assert len({retry, other_task, again}) == 3
+        assert database.insert_notification(title="d") != database.insert_notification(title="d")
+
+    def test_purge_removes_only_old_read_or_deleted(self, database):
+        ids = {name: database.insert_notification(title=name) for name in ("old_read", "old_deleted", "old_unread", "new_read")}
+        database.mark_notification_read(ids["old_read"])
+        database.mark_notification_read(ids["new_read"])
+        database.delete_notification(ids["old_deleted"])
+        for name in ("old_read", "old_deleted", "old_unread"):
+            self._age(database, ids[name], 40)
+
+        assert database.purge_notifications(30, batch_size=1) == 2
+        remaining = {r[0] for r in _query(database, "SELECT title FROM notification")}
+        assert remaining == {"old_unread", "new_read"}
+        assert TestCounters._counted(database) == TestCounters._actual(database)
+        assert database.purge_notifications(0) == 0
+
+    def test_incremental_vacuum_releases_pages(self, database):
+        database.run_write(lambda conn: conn.executemany(
+            "INSERT INTO notification (title, content, isRead, createTime) VALUES ('x', ?, 1, '2000-01-01 00:00:00')",
+            [("x" * 2000,)] * 200,
+        ))
+        database.purge_notifications(1)
+        free_pages = _query(database, "PRAGMA freelist_count")[0][0]
+        assert free_pages > 10
+        assert database.incremental_vacuum(10) == 10
+        assert database.incremental_vacuum() == free_pages - 10
+        assert _query(database, "PRAGMA freelist_count")[0][0] == 0
+
+
+class TestTaskSearch:
+    """task_fts：触发器同步、中英文子串、短词回退 LIKE、相关度排序"""
+
+    @staticmethod
+    def _names(result) -> list:
+        return [t["taskName"] for t in result[0]]
+
+    def test_matches_name_info_and_file_names(self, database):
+        first = database.insert_download_task("[Sub] Shingeki no Kyojin 01", "进击的巨人 第一集", "subtitle:1", "/dl", "/nas", "completed")
+        database.insert_file_task(first, "a.mkv", "Attack", "Attack on Titan S01E01.mkv")
+        database.insert_download_task("孤独摇滚 BOCCHI", "", "subtitle:2", "/dl", "/nas", "completed")
+
+        assert self._names(database.search_tasks("kyojin")) == ["[Sub] Shingeki no Kyojin 01"]
+        assert self._names(database.search_tasks("巨人")) == ["[Sub] Shingeki no Kyojin 01"]
+        assert self._names(database.search_tasks("titan s01")) == ["[Sub] Shingeki no Kyojin 01"]
+        assert self._names(database.search_tasks("孤独摇")) == ["孤独摇滚 BOCCHI"]
+        assert database.search_tasks("no-such-title") == ([], 0)
+        assert database.search_tasks('"   ') == ([], 0)
+
+    def test_follows_renames_progress_and_deletes(self, database):
+        task_id = database.insert_download_task("a" * 40, "周刊 描述", "magnet:?xt=urn:btih:" + "a" * 40, "/dl", "/nas", "fetching_metadata")
+        database.update_download_task_name_and_status(task_id, "Frieren 01", "downloading")
+        database.update_task_status(task_id, "downloading", 42.0)
+        database.insert_file_task(task_id, "x.mkv", "Frieren", "Sousou no Frieren 01.mkv")
+        database.run_write(lambda conn: conn.execute("UPDATE file_task SET file_rename = 'Renamed.mkv'"))
+
+        assert self._names(database.search_tasks("frieren")) == ["Frieren 01"]
+        # 进度写入 taskInfo 不覆盖索引中的描述
+        assert database.search_tasks("描述")[1] == 1
+        assert database.search_tasks("42.0")[1] == 0
+        assert database.search_tasks("renamed")[1] == 1
+        assert database.search_tasks("sousou")[1] == 0
+
+        database.run_write(lambda conn: conn.execute("UPDATE download_task SET isDelete = 1 WHERE id = ?", (task_id,)))
+        assert database.search_tasks("frieren")[1] == 0
+        database.run_write(lambda conn: conn.execute("UPDATE download_task SET isDelete = 0 WHERE id = ?", (task_id,)))
+        assert database.search_tasks("frieren")[1] == 1
+        database.run_write(lambda conn: conn.execute("DELETE FROM download_task WHERE id = ?", (task_id,)))
+        assert database.search_tasks("frieren")[1] == 0
+
+    def test_name_hits_rank_first_and_paginate(self, database):
+        database.insert_download_task("Other show", "mentions Frieren", "subtitle:1", "/dl", "/nas", "completed")
+        database.insert_download_task("Frieren 02", "", "subtitle:2", "/dl", "/nas", "completed")
+        database.insert_download_task("Frieren 03", "", "subtitle:3", "/dl", "/nas", "completed")
+        tasks, total = database.search_tasks("frieren", page=1, page_size=2)
+        assert total == 3
+        assert {t["taskName"] for t in tasks} == {"Frieren 02", "Frieren 03"}
+        assert self._names(database.search_tasks("frieren", page=2, page_size=2)) == ["Other show"]
+
+    def test_uses_fts_index(self, database):
+        database.insert_download_task("Frieren 01", "", "subtitle:1", "/dl", "/nas", "completed")
+        statements = _capture_sql(database, lambda: database.search_tasks("frieren"))
+        for sql in statements:
+            # task_fts_config 是 FTS5 内部的单行配置表，不计
+            assert [s for s in _full_scans(database, sql) if "task_fts_config" not in s] == []
+
+    def test_rebuild_matches_triggers(self, database):
+        task_id = _seed(database)
+        before = database.search_tasks("movie")
+        database.run_write(migrations.rebuild_task_fts)
+        assert database.search_tasks("movie") == before
+        assert before[0][0]["id"] == task_id
+
+
+class TestArchive:
+    """archive_finished_tasks：已结束的旧任务整体搬入归档表，含历史的列表/搜索/计数保持完整"""
+
+    @staticmethod
+    def _make_tasks(database: Database) -> dict:
+        ids = {}
+        for i, (status, days) in enumerate([("completed", 40), ("cancelled", 40), ("completed", 1), ("seeding", 40)]):
+            task_id = database.insert_download_task(f"Show {status} {days}", "", f"subtitle:{i}", "/dl", "/nas", status)
+            database.insert_file_task(task_id, f"{i}.mkv", "Show", f"Show {i}.mkv")
+            old = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+            database.run_write(lambda conn: conn.execute(
+                "UPDATE download_task SET createTime = ?, updateTime = ? WHERE id = ?", (old, old, task_id)
+            ))
+            ids[(status, days)] = task_id
+        return ids
+
+    def test_moves_only_old_finished_tasks(self, database):
+        ids = self._make_tasks(database)
+        assert database.archive_finished_tasks(30, batch_size=1) == 2
+
+        hot = {r[0] for r in _query(database, "SELECT id FROM download_task")}
+        archived = {r[0] for r in _query(database, "SELECT id FROM download_task_archive")}
+        assert hot == {ids[("completed", 1)], ids[("seeding", 40)]}
+        assert archived == {ids[("completed", 40)], ids[("cancelled", 40)]}
+        assert _query(database, "SELECT COUNT(*) FROM file_task")[0][0] == 2
+        assert _query(database, "SELECT COUNT(*) FROM file_task_archive")[0][0] == 2
+        assert database.count_download_tasks() == 2
+        assert database.count_download_tasks(include_history=True) == 4
+        assert database.get_task_status_counts() == {"completed": 1, "seeding": 1}
+        assert database.archive_finished_tasks(30) == 0
+        assert database.archive_finished_tasks(0) == 0
+
+    def test_history_list_and_search(self, database):
+        ids = self._make_tasks(database)
+        database.archive_finished_tasks(30)
+
+        tasks, total = database.get_download_tasks(1, 10)
+        assert total == 2 and not any(t.get("archived") for t in tasks)
+
+        walked, cursor = [], None
+        while True:
+            page, cursor = database.get_download_tasks_by_cursor(cursor, 1, include_history=True)
+            walked.extend(page)
+            if not cursor:
+                break
+        offset_tasks, total = database.get_download_tasks(1, 10, include_history=True)
+        assert total == 4
+        assert [t["id"] for t in walked] == [t["id"] for t in offset_tasks]
+        assert [t["id"] for t in database.get_download_tasks(2, 3, include_history=True)[0]] == [offset_tasks[3]["id"]]
+        by_id = {t["id"]: t for t in walked}
+        archived_task = by_id[ids[("cancelled", 40)]]
+        assert archived_task["archived"] == 1
+        assert [f["file_rename"] for f in archived_task["file_tasks"]] == ["Show 1.mkv"]
+
+        found, count = database.search_tasks("cancelled")
+        assert count == 1 and found[0]["archived"] == 1 and found[0]["file_tasks"]
+        assert database.search_tasks("show")[1] == 4
+
+    def test_batch_query_uses_partial_index(self, database):
+        plan = " ".join(database.explain_query_plan(
+            f"SELECT id FROM download_task WHERE {migrations.ARCHIVE_TASK_FILTER} "
+            f"AND updateTime < '2026-01-01 00:00:00' ORDER BY updateTime LIMIT 200"
+        ))
+        assert "idx_task_archivable" in plan
+        assert "SCAN download_task" not in plan and "TEMP B-TREE" not in plan
+
+    def test_rebuild_counters_and_fts_include_archive(self, database):
+        self._make_tasks(database)
+        database.archive_finished_tasks(30)
+        before = (database.count_download_tasks(include_history=True), database.search_tasks("show"))
+        database.run_write(migrations.rebuild_counters)
+        database.run_write(migrations.rebuild_task_fts)
+        assert (database.count_download_tasks(include_history=True), database.search_tasks("show")) == before
+
+
+class TestTmdbTitle:
+    """TMDB 英文标题映射：主键读取、覆盖写入与只补缺写入"""
+
+    def test_upsert_and_get(self, database):
+        assert database.get_tmdb_title("movie", 550) is None
+        assert database.upsert_tmdb_titles([("movie", 550, "Fight Club", ["Fight Club (1999)"])]) == 1
+        assert database.get_tmdb_title("movie", 550) == {"englishTitle": "Fight Club", "altTitles": ["Fight Club (1999)"]}
+        # 同一 id 的电影与剧集互不影响
+        assert database.get_tmdb_title("tv", 550) is None
+
+    def test_overwrite_flag(self, database):
+        database.upsert_tmdb_titles([("tv", 1, "Old", [])])
+        assert database.upsert_tmdb_titles([("tv", 1, "Bulk", []), ("tv", 2, "New", [])], overwrite=False) == 1
+        assert database.get_tmdb_title("tv", 1)["englishTitle"] == "Old"
+        database.upsert_tmdb_titles([("tv", 1, "Detail", ["Alias"])])
+        assert database.get_tmdb_title("tv", 1) == {"englishTitle": "Detail", "altTitles": ["Alias"]}
+
+    def test_lookup_uses_primary_key(self, database):
+        plan = " ".join(database.explain_query_plan(
+            "SELECT englishTitle, altTitles FROM tmdb_title WHERE mediaType = 'movie' AND tmdbId = 1"
+        ))
+        assert "PRIMARY KEY" in plan
+
+
+class TestBangumiSeason:
+
+    def test_save_and_get(self, database):
+        assert database.get_bangumi_season(2025, "winter") is None
+        data = [{"weekday": {"id": 1, "cn": "星期一"}, "items": [{"id": 1, "name_cn": "测试"}]}]
+        database.save_bangumi_season(2025, "winter", data)
+        database.save_bangumi_season(2025, "winter", data)
+        assert database.get_bangumi_season(2025, "winter") == data
+        assert database.get_bangumi_season(2025, "spring") is None
+
+
+class TestCursorPagination:
+    """游标分页：与 OFFSET 分页顺序一致，同一秒创建的记录不重不漏"""
+
+    @staticmethod
+    def _insert_notifications(database: Database, create_times: list) -> None:
+        database.run_write(lambda conn: conn.executemany(
+            "INSERT INTO notification (title, type, isRead, createTime, isDelete) VALUES (?, 'info', ?, ?, 0)",
+            [(f"n{i}", i % 2, t) for i, t in enumerate(create_times)],
+        ))
+
+    def _walk(self, fetch) -> list:
+        items, cursor = [], None
+        while True:
+            page, cursor = fetch(cursor)
+            items.extend(page)
+            if cursor is None:
+                return items
+
+    def test_walk_matches_offset_order(self, database):
+        # 大量记录共用同一 createTime，验证 id 作为次级排序键
+        self._insert_notifications(database, ["2025-01-01 00:00:00"] * 7 + ["2025-01-02 00:00:00"] * 6)
+        walked = self._walk(lambda c: database.get_notifications_by_cursor(c, 3))
+        expected, total = database.get_notifications(1, 100)
+        assert [n["id"] for n in walked] == [n["id"] for n in expected]
+        assert total == 13
+
+    def test_walk_with_read_filter(self, database):
+        self._insert_notifications(database, ["2025-01-01 00:00:00"] * 9)
+        walked = self._walk(lambda c: database.get_notifications_by_cursor(c, 2, is_read=False))
+        assert [n["isRead"] for n in walked] == [0] * 5
+        assert database.count_notifications(is_read=False) == 5
+
+    def test_task_walk(self, database):
+        for i in range(5):
+            database.insert_download_task(f"t{i}", "", f"subtitle:{i}", "/dl", "/nas", "completed")
+        tasks, cursor = database.get_download_tasks_by_cursor(None, 2)
+        assert [t["taskName"] for t in tasks] == ["t4", "t3"]
+        assert all("file_tasks" in t for t in tasks)
+        walked = tasks + self._walk(lambda c: database.get_download_tasks_by_cursor(c or cursor, 2))
+        assert [t["taskName"] for t in walked] == ["t4", "t3", "t2", "t1", "t0"]
+        assert database.count_download_tasks() == 5
+
+    def test_exact_page_has_no_next_cursor(self, database):
+        self._insert_notifications(database, ["2025-01-01 00:00:00"] * 4)
+        items, cursor = database.get_notifications_by_cursor(None, 4)
+        assert len(items) == 4
+        assert cursor is None
+
+    def test_cursor_roundtrip(self):
+        cursor = encode_cursor({"createTime": "2025-01-01 00:00:00", "id": 42})
+        assert decode_cursor(cursor) == ("2025-01-01 00:00:00", 42)
+
+    @pytest.mark.parametrize("cursor", ["not-a-cursor", "W10", encode_cursor({"createTime": None, "id": 1})])
+    def test_invalid_cursor(self, database, cursor):
+        with pytest.raises(ValueError):
+            database.get_notifications_by_cursor(cursor, 10)
+
+
+class TestInfoHash:
+    """infoHash 列：入库时规范化、旧库回填、活跃任务唯一"""
+
+    def test_populated_on_insert_from_base32_magnet(self, database):
+        hex_hash = "b" * 40
+        b32 = base64.b32encode(bytes.fromhex(hex_hash)).decode()
+        task_id = database.insert_download_task(
+            "Some Movie", "", f"magnet:?xt=urn:btih:{b32}&dn=x", "/dl", "/nas", "downloading"
+        )
+        assert database.get_download_task_by_id(task_id)["infoHash"] == hex_hash
+        assert [t["id"] for t in database.get_tasks_by_hash(hex_hash)] == [task_id]
+
+    def test_non_torrent_task_has_no_hash(self, database):
+        task_id = database.insert_download_task("字幕", "", "subtitle:1", "/dl", "/nas", "moving")
+        assert database.get_download_task_by_id(task_id)["infoHash"] is None
+
+    def test_unique_among_active_tasks(self, database):
+        _seed(database)
+        with pytest.raises(sqlite3.IntegrityError):
+            _seed(database)
+
+    def test_finished_task_can_be_downloaded_again(self, database):
+        first = _seed(database)
+        database.update_task_status(first, "completed")
+        second = _seed(database)
+        assert {t["id"] for t in database.get_tasks_by_hash("a" * 40)} == {first, second}
+
+    def test_backfill_legacy_rows(self, tmp_path):
+        path = str(tmp_path / "legacy.db")
+        conn = sqlite3.connect(path)
+        conn.executescript(
+            "CREATE TABLE download_task (id INTEGER PRIMARY KEY AUTOINCREMENT, taskName TEXT NOT NULL, taskInfo TEXT,"
+            " sourceUrl TEXT, sourcePath TEXT, targetPath TEXT, taskStatus TEXT, createTime DATETIME,"
+            " updateTime DATETIME, isDelete INTEGER NOT NULL DEFAULT 0);"
+            "CREATE TABLE file_task (id INTEGER PRIMARY KEY AUTOINCREMENT, downloadTaskId INTEGER, file_rename TEXT,"
+            " file_status TEXT);"
+            "CREATE TABLE notification (id INTEGER PRIMARY KEY AUTOINCREMENT, isRead INTEGER, createTime DATETIME,"
+            " isDelete INTEGER NOT NULL DEFAULT 0);"
+        )
+        conn.execute(
+            "INSERT INTO download_task (taskName, sourceUrl, taskStatus) VALUES (?, ?, 'completed')",
+            ("Movie", "magnet:?xt=urn:btih:" + "C" * 40),
+        )
+        conn.execute(
+            "INSERT INTO download_task (taskName, sourceUrl, taskStatus) VALUES (?, ?, 'downloading')",
+            ("d" * 40, ""),
+        )
+        conn.execute("INSERT INTO download_task (taskName, sourceUrl, taskStatus) VALUES ('sub', 'subtitle:1', 'moving')")
+        conn.commit()
+        conn.close()
+
+        database = Database(path)
+        database.init_db()
+        rows = _query(database, "SELECT taskName, infoHash FROM download_task ORDER BY id")
+        assert [r[1] for r in rows] == ["c" * 40, "d" * 40, None]
+        assert len(database.get_tasks_by_hash("c" * 40)) == 1
+
+
+FIXTURE_LEGACY_V0 = Path(__file__).parent / "fixtures" / "legacy_v0.sql"
+
+
+def _legacy_database(tmp_path) -> str:
+    """把旧版结构与示例数据（fixtures/legacy_v0.sql）复制为临时库，返回路径"""
+    path = str(tmp_path / "legacy_v0.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(FIXTURE_LEGACY_V0.read_text(encoding="utf-8"))
+    conn.close()
+    return path
+
+
+def _schema(conn: sqlite3.Connection) -> dict:
+    """表 -> 列名列表，以及索引名集合（忽略 sqlite 内部对象）"""
+    tables = [r[0] for r in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    )]
+    columns = {t: [r[1] for r in conn.execute(f"PRAGMA table_info({t})")] for t in tables}
+    indexes = {r[0] for r in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND name NOT LIKE 'sqlite_%'"
+    )}
+    triggers = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    return {"columns": columns, "indexes": indexes, "triggers": triggers, "auto_vacuum": auto_vacuum}
+
+
+class TestMigrations:
+    """版本化迁移：旧库按顺序升级到与新库一致的结构，重复执行无副作用"""
+
+    def test_fresh_database_stamped_latest(self, database):
+        with database.read_conn() as conn:
+            assert migrations.get_schema_version(conn) == migrations.LATEST_VERSION
+
+    def test_versions_strictly_increasing(self):
+        versions = [m.version for m in migrations.MIGRATIONS]
+        assert versions == sorted(set(versions))
+        assert versions[0] == 1
+
+    @pytest.mark.parametrize("schema_file", ["main.sql", "create_table.sql"])
+    def test_upgraded_schema_matches_fresh(self, tmp_path, schema_file):
+        fresh = Database(str(tmp_path / "fresh.db"))
+        fresh.schema_path = str(Path(fresh.schema_path).with_name(schema_file))
+        fresh.init_db()
+
+        upgraded = Database(_legacy_database(tmp_path))
+        upgraded.init_db()
+
+        with upgraded.read_conn() as upgraded_conn, fresh.read_conn() as fresh_conn:
+            assert migrations.get_schema_version(upgraded_conn) == migrations.LATEST_VERSION
+            assert _schema(upgraded_conn) == _schema(fresh_conn)
+
+    def test_legacy_data_backfilled(self, tmp_path):
+        database = Database(_legacy_database(tmp_path))
+        database.init_db()
+        rows = _query(database, "SELECT id, infoHash FROM download_task ORDER BY id")
+        hashes = dict((r[0], r[1]) for r in rows)
+        assert hashes[1] == "a" * 40
+        # 重复的活跃任务保留最早一条，其余标记为 error，仍可按 Hash 查到
+        assert hashes[2] == "a" * 40
+        assert hashes[3] == "a" * 40
+        assert {t["id"]: t["taskStatus"] for t in database.get_tasks_by_hash("a" * 40)} == {
+            1: "completed", 2: "downloading", 3: "error",
+        }
+        assert hashes[4] == base64.b32decode("XPNGZ5BDGZY2NUBOPFWE3ZVZ6RZSYIB6").hex()
+        assert hashes[5] is None
+        assert database.get_unread_count() == 1
+        assert database.count_notifications() == 2
+        assert database.get_task_status_counts() == {"completed": 2, "downloading": 1, "error": 1, "seeding": 1}
+        assert len(database.get_file_tasks(1)) == 1
+
+    def test_null_create_time_backfilled_for_cursor(self, tmp_path):
+        """旧数据中 createTime 为 NULL 的行升级后能通过游标翻页取到"""
+        path = _legacy_database(tmp_path)
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "INSERT INTO download_task (taskName, taskStatus, createTime, updateTime, isDelete) "
+            "VALUES ('no-time', 'completed', NULL, '2020-01-01 00:00:00', 0)"
+        )
+        conn.execute("INSERT INTO notification (title, createTime, isDelete) VALUES ('no-time', NULL, 0)")
+        conn.commit()
+        conn.close()
+
+        database = Database(path)
+        database.init_db()
+        try:
+            for fetch, total in (
+                (database.get_download_tasks_by_cursor, database.count_download_tasks),
+                (database.get_notifications_by_cursor, database.count_notifications),
+            ):
+                seen, cursor = [], None
+                while True:
+                    rows, cursor = fetch(cursor=cursor, page_size=1)
+                    seen.extend(r["id"] for r in rows)
+                    if cursor is None:
+                        break
+                assert len(seen) == len(set(seen)) == total()
+            assert not _query(database, "SELECT id FROM download_task WHERE createTime IS NULL")
+        finally:
+            database.close()
+
+    def test_rerun_is_noop(self, tmp_path):
+        path = _legacy_database(tmp_path)
+        Database(path).init_db()
+        conn = sqlite3.connect(path)
+        before = _schema(conn)
+        assert migrations.migrate(conn) == migrations.LATEST_VERSION
+        assert _schema(conn) == before
+        conn.close()
+
+    def test_resume_from_intermediate_version(self, tmp_path):
+        """中途停在 v1（例如升级时进程被杀）：下次启动从 v2 继续"""
+        path = _legacy_database(tmp_path)
+        conn = sqlite3.connect(path)
+        migrations.set_schema_version(conn, 1)
+        conn.commit()
+        conn.close()
+
+        applied = []
+        conn = sqlite3.connect(path)
+        conn.set_trace_callback(lambda sql: applied.append(sql) if sql.startswith("PRAGMA user_version =") else None)
+        migrations.migrate(conn)
+        conn.set_trace_callback(None)
+
+        assert applied == [f"PRAGMA user_version = {m.version}" for m in migrations.MIGRATIONS if m.version > 1]
+        assert "uq_task_infoHash_active" in _schema(conn)["indexes"]
+        conn.close()
+
+    def test_failed_migration_rolls_back(self, tmp_path, monkeypatch):
+        path = _legacy_database(tmp_path)
+
+        def broken(conn):
+            conn.execute("ALTER TABLE download_task ADD COLUMN infoHash TEXT")
+            raise RuntimeError("boom")
+
+        patched = tuple(
+            migrations.Migration(m.version, m.description, broken) if m.version == 3 else m
+            for m in migrations.MIGRATIONS
+        )
+        monkeypatch.setattr(migrations, "MIGRATIONS", patched)
+        conn = sqlite3.connect(path)
+        with pytest.raises(RuntimeError):
+            migrations.migrate(conn)
+        assert migrations.get_schema_version(conn) == 2
+        assert "infoHash" not in _schema(conn)["columns"]["download_task"]
+        conn.close()
@@ -0,0 +1,96 @@
+"""
+数据库在线备份测试（临时 SQLite 文件）
+覆盖：分步备份期间写入不受阻、备份文件完整可读、按份数轮换、并发备份互斥、管理接口
+"""
+import sqlite3
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from app.core import db_backup
+from app.core.db import Database
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = Database(str(tmp_path / "live.db"), pool_size=1)
+    database.init_db()
+    for i in range(200):
+        database.insert_notification(title=f"n{i}", content="x" * 500)
+    yield database
+    database.close()
+
+
+class TestCreateBackup:
+
+    def test_backup_while_writing(self, database, tmp_path):
+        stop = threading.Event()
+        written = []
+
+        def writer():
+            while not stop.is_set():
+                written.append(database.insert_notification(title="during backup"))
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            info = db_backup.create_backup(database.db_path, str(tmp_path / "bak"), pages=4, sleep=0.001)
+        finally:
+            stop.set()
+            thread.join()
+
+        assert written, "备份期间写线程应能继续提交"
+        assert info["pages"] > 4 and info["size"] > 0
+        conn = sqlite3.connect(info["path"])
+        try:
+            assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+            assert conn.execute("SELECT COUNT(*) FROM notification").fetchone()[0] >= 200
+        finally:
+            conn.close()
+        assert not list((tmp_path / "bak").glob("*.part"))
+
+    def test_restarts_fall_back_to_single_step(self, database, tmp_path):
+        # 每复制一步都由写线程提交一次写入，分步复制会不断重启
+        class WritingConnection(sqlite3.Connection):
+            def backup(self, target, *, progress=None, **kwargs):
+                def interleaved(status, remaining, total):
+                    progress(status, remaining, total)
+                    database.insert_notification(title="restart")
+                return super().backup(target, progress=interleaved if progress else None, **kwargs)
+
+        real_connect = sqlite3.connect
+        with patch.object(db_backup.sqlite3, "connect", lambda path: real_connect(path, factory=WritingConnection)):
+            info = db_backup.create_backup(database.db_path, str(tmp_path / "bak"), pages=2, sleep=0, max_restarts=1)
+        assert info["restarts"] == 2
+        conn = sqlite3.connect(info["path"])
+        try:
+            assert conn.execute("PRAGMA quick_check").fetchone()[0] == "ok"
+        finally:
+            conn.close()
+
+    def test_rotation_keeps_latest(self, database, tmp_path):
+        backup_dir = str(tmp_path / "bak")
+        names = [db_backup.create_backup(database.db_path, backup_dir, keep=2)["name"] for _ in range(3)]
+        remaining = [b["name"] for b in db_backup.list_backups(database.db_path, backup_dir)]
+        assert len(set(names)) == 3
+        assert remaining == names[:0:-1]
+
+    def test_concurrent_backup_rejected(self, database, tmp_path):
+        with db_backup._backup_lock:
+            with pytest.raises(db_backup.BackupInProgressError):
+                db_backup.create_backup(database.db_path, str(tmp_path / "bak"))
+        assert db_backup.list_backups(database.db_path, str(tmp_path / "bak")) == []
+
+    def test_default_dir_next_to_database(self, database, tmp_path):
+        info = database.backup(keep=0)
+        assert info["path"].startswith(str(tmp_path / db_backup.BACKUP_DIR_NAME))
+        assert [b["name"] for b in database.list_backups()] == [info["name"]]
+
+
+def test_backup_endpoints(client, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/v1/database/backups", headers=headers).json()["code"] == 200
+    with db_backup._backup_lock:
+        resp = client.post("/api/v1/database/backup", headers=headers).json()
+    assert resp["code"] == 50001
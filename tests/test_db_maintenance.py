@@ -0,0 +1,75 @@
+"""
+数据库定时维护 DbMaintenance 测试（mock 数据库层）
+覆盖：按配置归档任务、清理通知与增量 VACUUM、间隔为 0 时不启动、定时备份
+"""
+import time
+from unittest.mock import patch
+
+from app.services.db_maintenance import DbMaintenance
+
+
+def _config(values):
+    return lambda key, default=None: values.get(key, default)
+
+
+class TestDbMaintenance:
+
+    @patch("app.services.db_maintenance.db")
+    @patch("app.services.db_maintenance.config")
+    def test_run_once_uses_config(self, mock_config, mock_db):
+        mock_config.get.side_effect = _config({
+            "sqlite.archive_after_days": 14, "sqlite.notification_retention_days": 7, "sqlite.vacuum_pages": 50,
+        })
+        mock_db.archive_finished_tasks.return_value = 2
+        mock_db.purge_notifications.return_value = 3
+        mock_db.incremental_vacuum.return_value = 12
+        assert DbMaintenance().run_once() == {"archived_tasks": 2, "purged_notifications": 3, "vacuumed_pages": 12}
+        mock_db.archive_finished_tasks.assert_called_once_with(14)
+        mock_db.purge_notifications.assert_called_once_with(7)
+        mock_db.incremental_vacuum.assert_called_once_with(50)
+
+    @patch("app.services.db_maintenance.config")
+    def test_disabled_when_interval_zero(self, mock_config):
+        mock_config.get.side_effect = _config({
+            "sqlite.maintenance_interval_hours": 0, "sqlite.backup_interval_hours": 0,
+        })
+        maintenance = DbMaintenance()
+        maintenance.start()
+        assert not maintenance.running and maintenance.thread is None
+
+    @patch("app.services.db_maintenance.db")
+    @patch("app.services.db_maintenance.config")
+    def test_stop_wakes_thread(self, mock_config, mock_db):
+        mock_config.get.side_effect = _config({"sqlite.maintenance_interval_hours": 1})
+        maintenance = DbMaintenance()
+        maintenance.start()
+        assert maintenance.thread.is_alive()
+        thread = maintenance.thread
+        maintenance.stop()
+        assert not thread.is_alive()
+        mock_db.purge_notifications.assert_not_called()
+
+    @patch("app.services.db_maintenance.db")
+    @patch("app.services.db_maintenance.config")
+    def test_backup_only_schedule(self, mock_config, mock_db):
+        mock_config.get.side_effect = _config({
+            "sqlite.maintenance_interval_hours": 0, "sqlite.backup_interval_hours": 0.1 / 3600,
+        })
+        mock_db.backup.return_value = {"name": "x.db"}
+        maintenance = DbMaintenance()
+        maintenance.start()
+        try:
+            assert maintenance.running
+            for _ in range(50):
+                if mock_db.backup.called:
+                    break
+                time.sleep(0.05)
+        finally:
+            maintenance.stop()
+        mock_db.backup.assert_called()
+        mock_db.archive_finished_tasks.assert_not_called()
+
+    @patch("app.services.db_maintenance.db")
+    def test_backup_failure_logged(self, mock_db):
+        mock_db.backup.side_effect = OSError("disk full")
+        assert DbMaintenance().run_backup() is None
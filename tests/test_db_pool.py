@@ -0,0 +1,106 @@
+"""
+只读连接池 ConnectionPool 测试（临时 SQLite 文件）
+覆盖：连接数上限、只读、同线程嵌套复用、健康检查重建、池满超时、关闭
+"""
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from app.core.db_pool import ConnectionPool, PoolClosedError
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "pool.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (v INTEGER)")
+    conn.execute("INSERT INTO t VALUES (1)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _pool(db_path, **kwargs) -> ConnectionPool:
+    return ConnectionPool(lambda: sqlite3.connect(db_path, check_same_thread=False), **kwargs)
+
+
+class TestConnectionPool:
+
+    def test_open_connections_bounded(self, db_path):
+        pool = _pool(db_path, size=2)
+        peak = []
+        barrier = threading.Barrier(8)
+
+        def worker():
+            barrier.wait()
+            with pool.connection() as conn:
+                conn.execute("SELECT v FROM t").fetchall()
+                peak.append(pool.stats()["open"])
+                time.sleep(0.01)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert max(peak) <= 2
+        assert pool.stats() == {"size": 2, "open": 2, "idle": 2}
+        pool.close()
+
+    def test_connections_are_read_only(self, db_path):
+        pool = _pool(db_path)
+        with pool.connection() as conn:
+            with pytest.raises(sqlite3.OperationalError):
+                conn.execute("INSERT INTO t VALUES (2)")
+        pool.close()
+
+    def test_nested_use_reuses_connection(self, db_path):
+        pool = _pool(db_path, size=1, timeout=0.1)
+        with pool.connection() as outer:
+            with pool.connection() as inner:
+                assert inner is outer
+        assert pool.stats()["open"] == 1
+        pool.close()
+
+    def test_broken_connection_replaced(self, db_path):
+        pool = _pool(db_path, size=1, health_check_interval=0)
+        with pool.connection() as conn:
+            first = conn
+        first.close()
+        with pool.connection() as conn:
+            assert conn is not first
+            assert conn.execute("SELECT v FROM t").fetchone()[0] == 1
+        assert pool.stats()["open"] == 1
+        pool.close()
+
+    def test_timeout_when_exhausted(self, db_path):
+        pool = _pool(db_path, size=1, timeout=0.05)
+        held = threading.Event()
+        release = threading.Event()
+
+        def holder():
+            with pool.connection():
+                held.set()
+                release.wait()
+
+        t = threading.Thread(target=holder)
+        t.start()
+        held.wait()
+        with pytest.raises(TimeoutError):
+            with pool.connection():
+                pass
+        release.set()
+        t.join()
+        pool.close()
+
+    def test_close(self, db_path):
+        pool = _pool(db_path)
+        with pool.connection():
+            pass
+        pool.close()
+        assert pool.stats()["open"] == 0
+        with pytest.raises(PoolClosedError):
+            with pool.connection():
+                pass
@@ -0,0 +1,85 @@
+"""
+慢查询分析 QueryProfiler 测试（临时 SQLite 文件）
+覆盖：按方法名统计耗时直方图、慢查询记录 SQL 与执行计划（含写线程上的写入）、关闭时不统计、管理接口
+"""
+import pytest
+
+from app.core.db import Database
+from app.core.db_profiler import QueryProfiler, _QueryStats, profiler
+
+
+@pytest.fixture
+def profiled_database(tmp_path):
+    database = Database(str(tmp_path / "profiled.db"), pool_size=1)
+    database.init_db()
+    # 在首次借出连接前开启，新建的连接才会挂上 trace 回调
+    profiler.reset()
+    profiler.enabled, profiler.slow_ms = True, 10_000
+    yield database
+    profiler.enabled = False
+    profiler.reset()
+    database.close()
+
+
+class TestQueryProfiler:
+
+    def test_records_named_queries(self, profiled_database):
+        for _ in range(3):
+            profiled_database.get_download_tasks(1, 10)
+        profiled_database.get_unread_count()
+        queries = profiler.snapshot()["queries"]
+        assert queries["get_download_tasks"]["count"] == 3
+        # 嵌套调用各自计时
+        assert queries["count_download_tasks"]["count"] == 3
+        assert queries["get_unread_count"]["count"] == 1
+        assert sum(queries["get_download_tasks"]["histogram"].values()) == 3
+        assert profiler.snapshot()["slow_queries"] == []
+
+    def test_slow_query_logged_with_plan(self, profiled_database, caplog):
+        profiler.slow_ms = 0
+        profiled_database.get_download_tasks_by_cursor(None, 10)
+        slow = profiler.snapshot()["slow_queries"]
+        assert [entry["name"] for entry in slow] == ["get_download_tasks_by_cursor"]
+        statement = slow[0]["statements"][0]
+        assert statement["sql"].startswith("SELECT * FROM download_task")
+        assert any("idx_task_list" in step for step in statement["plan"])
+        assert "慢查询 get_download_tasks_by_cursor" in caplog.text
+
+    def test_write_statements_attributed_to_caller(self, profiled_database):
+        profiler.slow_ms = 0
+        profiled_database.insert_notification(title="x")
+        slow = profiler.snapshot()["slow_queries"]
+        assert slow[-1]["name"] == "insert_notification"
+        assert any(s["sql"].startswith("INSERT INTO notification") for s in slow[-1]["statements"])
+
+    def test_disabled_records_nothing(self, profiled_database):
+        profiler.enabled = False
+        profiled_database.get_download_tasks(1, 10)
+        assert profiler.snapshot()["queries"] == {}
+
+
+class TestQueryStats:
+
+    def test_percentiles_from_buckets(self):
+        stats = _QueryStats()
+        for ms in [0.5] * 90 + [40] * 9 + [3000]:
+            stats.add(ms)
+        data = stats.to_dict()
+        assert data["p50_ms"] == 1
+        assert data["p95_ms"] == 50
+        assert data["max_ms"] == 3000
+        assert data["histogram"] == {"<=1ms": 90, "<=50ms": 9, ">2500ms": 1}
+
+    def test_slow_query_buffer_bounded(self):
+        local = QueryProfiler(max_slow_queries=2)
+        local.slow_ms = 0
+        for _ in range(3):
+            local.call("q", lambda: None, lambda sql: [])
+        assert len(local.snapshot()["slow_queries"]) == 2
+
+
+def test_stats_endpoint(client, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    data = client.get("/api/v1/database/stats", headers=headers).json()["data"]
+    assert {"enabled", "queries", "slow_queries", "pool"} <= set(data)
+    assert client.post("/api/v1/database/stats/reset", headers=headers).json()["code"] == 200
@@ -0,0 +1,154 @@
+"""
+单写线程 DbWriter 测试（临时 SQLite 文件）
+覆盖：批量合并提交、单操作失败只回滚自身、嵌套写不死锁、停止前落盘、提交后读可见、数据库被锁定时整批重试、打开连接失败时等待中的操作全部失败
+"""
+import sqlite3
+import threading
+
+import pytest
+
+from app.core.db_writer import DbWriter
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "writer.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY AUTOINCREMENT, v TEXT UNIQUE)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def writer(db_path):
+    writer = DbWriter(lambda: sqlite3.connect(db_path, check_same_thread=False), batch_window=0.05)
+    yield writer
+    writer.stop()
+
+
+def _insert(value):
+    return lambda conn: conn.execute("INSERT INTO t (v) VALUES (?)", (value,)).lastrowid
+
+
+def _values(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return sorted(r[0] for r in conn.execute("SELECT v FROM t"))
+    finally:
+        conn.close()
+
+
+class TestDbWriter:
+
+    def test_concurrent_writes_share_one_commit(self, writer, db_path):
+        commits = []
+        writer.run(lambda conn: conn.set_trace_callback(lambda sql: commits.append(sql) if sql == "COMMIT" else None))
+        commits.clear()
+
+        barrier = threading.Barrier(20)
+        results = []
+
+        def worker(i):
+            barrier.wait()
+            results.append(writer.run(_insert(f"v{i:02d}")))
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert sorted(results) == list(range(1, 21))
+        assert _values(db_path) == [f"v{i:02d}" for i in range(20)]
+        assert 1 <= len(commits) < 20
+
+    def test_failed_op_only_rolls_back_itself(self, writer, db_path):
+        def bad(conn):
+            conn.execute("INSERT INTO t (v) VALUES ('partial')")
+            conn.execute("INSERT INTO t (v) VALUES ('a')")
+
+        futures = [writer.submit(_insert("a")), writer.submit(bad), writer.submit(_insert("b"))]
+        assert futures[0].result() and futures[2].result()
+        with pytest.raises(sqlite3.IntegrityError):
+            futures[1].result()
+        assert _values(db_path) == ["a", "b"]
+
+    def test_nested_write_runs_inline(self, writer, db_path):
+        def outer(conn):
+            writer.run(_insert("inner"))
+            return _insert("outer")(conn)
+
+        assert writer.run(outer, timeout=5)
+        assert _values(db_path) == ["inner", "outer"]
+
+    def test_result_visible_to_other_connections(self, writer, db_path):
+        writer.run(_insert("x"))
+        assert _values(db_path) == ["x"]
+
+    def test_stop_flushes_queue(self, writer, db_path):
+        futures = [writer.submit(_insert(f"q{i}")) for i in range(5)]
+        writer.stop()
+        assert all(f.done() for f in futures)
+        assert len(_values(db_path)) == 5
+
+    def test_restarts_after_stop(self, writer, db_path):
+        writer.run(_insert("before"))
+        writer.stop()
+        writer.run(_insert("after"))
+        assert _values(db_path) == ["after", "before"]
+
+    def test_busy_batch_retried(self, db_path):
+        writer = DbWriter(
+            lambda: sqlite3.connect(db_path, timeout=0.05, check_same_thread=False), busy_backoff=0.1
+        )
+        locker = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        locker.execute("BEGIN IMMEDIATE")
+        threading.Timer(0.2, locker.rollback).start()
+        try:
+            futures = [writer.submit(_insert(f"r{i}")) for i in range(3)]
+            assert all(f.result(timeout=5) for f in futures)
+            assert _values(db_path) == ["r0", "r1", "r2"]
+        finally:
+            writer.stop()
+            locker.close()
+
+    def test_busy_retries_exhausted(self, db_path):
+        writer = DbWriter(
+            lambda: sqlite3.connect(db_path, timeout=0.01, check_same_thread=False),
+            busy_retries=1, busy_backoff=0.01,
+        )
+        locker = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        locker.execute("BEGIN IMMEDIATE")
+        try:
+            with pytest.raises(sqlite3.OperationalError):
+                writer.run(_insert("x"), timeout=5)
+        finally:
+            locker.rollback()
+            locker.close()
+        # 锁释放后恢复正常
+        writer.run(_insert("y"), timeout=5)
+        writer.stop()
+        assert _values(db_path) == ["y"]
+
+    def test_connect_failure_fails_pending(self, db_path):
+        release = threading.Event()
+        attempts = []
+
+        def connect():
+            attempts.append(1)
+            if len(attempts) == 1:
+                release.wait(5)
+                raise sqlite3.OperationalError("unable to open database file")
+            return sqlite3.connect(db_path, check_same_thread=False)
+
+        writer = DbWriter(connect)
+        futures = [writer.submit(_insert(f"f{i}")) for i in range(3)]
+        release.set()
+        for f in futures:
+            with pytest.raises(sqlite3.OperationalError):
+                f.result(timeout=5)
+        # 下次提交重新启动写线程并重新连接
+        writer.run(_insert("ok"), timeout=5)
+        writer.stop()
+        assert _values(db_path) == ["ok"]
@@ -0,0 +1,191 @@
+"""
+HTTP 持久缓存测试（临时 SQLite 文件 + 本地 HTTP 服务）
+覆盖：max-age 内不请求、ETag/Last-Modified 条件请求与 304 复用、no-store 不缓存、LRU 容量淘汰、
+重启后仍有效、缓存键不含明文 URL、缓存文件读写失败时直接请求上游、CachedSession / cached_get 接入
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from app.core import http_cache
+from app.core.http_cache import CachedSession, HttpCache, cache_key, cached_get
+
+
+def _response(status=200, body=b'{"ok": 1}', headers=None):
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = body
+    resp.headers = requests.structures.CaseInsensitiveDict(headers or {})
+    return resp
+
+
+class _FakeUpstream:
+    """记录请求头并按队列返回响应"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def __call__(self, url, params=None, headers=None, **kwargs):
+        self.calls.append(dict(headers or {}))
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = HttpCache(str(tmp_path / "http_cache.db"), max_bytes=1024 * 1024)
+    yield cache
+    cache.close()
+
+
+class TestHttpCache:
+
+    def test_revalidates_with_etag(self, cache):
+        upstream = _FakeUpstream(
+            _response(headers={"ETag": '"v1"', "Content-Type": "application/json"}),
+            _response(status=304, body=b""),
+        )
+        first = cache.fetch(upstream, "https://api.example/list", params={"page": 1})
+        second = cache.fetch(upstream, "https://api.example/list", params={"page": 1})
+        assert first.json() == second.json() == {"ok": 1}
+        assert upstream.calls[1]["If-None-Match"] == '"v1"'
+        assert getattr(second, "from_cache", False)
+        assert cache.stats()["revalidated"] == 1
+
+    def test_last_modified_validator(self, cache):
+        stamp = "Wed, 21 Oct 2026 07:28:00 GMT"
+        upstream = _FakeUpstream(_response(headers={"Last-Modified": stamp}), _response(status=304, body=b""))
+        cache.fetch(upstream, "https://api.example/a")
+        cache.fetch(upstream, "https://api.example/a")
+        assert upstream.calls[1]["If-Modified-Since"] == stamp
+
+    def test_fresh_within_max_age(self, cache):
+        upstream = _FakeUpstream(_response(headers={"Cache-Control": "public, max-age=600"}))
+        cache.fetch(upstream, "https://api.example/a")
+        resp = cache.fetch(upstream, "https://api.example/a")
+        assert resp.json() == {"ok": 1}
+        assert len(upstream.calls) == 1
+
+    def test_changed_resource_replaced(self, cache):
+        upstream = _FakeUpstream(
+            _response(headers={"ETag": '"v1"'}),
+            _response(body=b'{"ok": 2}', headers={"ETag": '"v2"'}),
+            _response(status=304, body=b""),
+        )
+        for _ in range(3):
+            resp = cache.fetch(upstream, "https://api.example/a")
+        assert resp.json() == {"ok": 2}
+        assert upstream.calls[2]["If-None-Match"] == '"v2"'
+
+    def test_no_store_and_unvalidated_not_cached(self, cache):
+        upstream = _FakeUpstream(
+            _response(headers={"ETag": '"v1"', "Cache-Control": "no-store"}),
+            _response(),
+        )
+        cache.fetch(upstream, "https://api.example/a")
+        cache.fetch(upstream, "https://api.example/b")
+        assert cache.stats()["entries"] == 0
+
+    def test_errors_not_cached(self, cache):
+        upstream = _FakeUpstream(_response(status=500, headers={"ETag": '"x"'}))
+        cache.fetch(upstream, "https://api.example/a")
+        assert cache.stats()["entries"] == 0
+
+    def test_broken_cache_falls_back_to_upstream(self, tmp_path):
+        cache = HttpCache(str(tmp_path / "broken.db"), max_bytes=1024 * 1024)
+        cache._conn.close()
+        upstream = _FakeUpstream(_response(headers={"ETag": '"v1"'}), _response(headers={"ETag": '"v1"'}))
+        assert cache.fetch(upstream, "https://api.example/list").json() == {"ok": 1}
+        assert cache.fetch(upstream, "https://api.example/list").json() == {"ok": 1}
+        # 读取失败时不带条件请求头，直接请求上游
+        assert upstream.calls == [{}, {}]
+
+    def test_touch_failure_still_serves_cached(self, cache):
+        upstream = _FakeUpstream(_response(headers={"Cache-Control": "max-age=60"}))
+        cache.fetch(upstream, "https://api.example/fresh")
+        with patch.object(cache, "touch", side_effect=http_cache.sqlite3.OperationalError("database is locked")):
+            assert cache.fetch(upstream, "https://api.example/fresh").json() == {"ok": 1}
+        assert len(upstream.calls) == 1
+
+    def test_lru_eviction_by_size(self, tmp_path):
+        cache = HttpCache(str(tmp_path / "small.db"), max_bytes=10_000)
+        body = b"x" * 900
+        try:
+            for name in "abcdefghijk":
+                cache.store(cache_key(name), {}, body, '"e"', None, 0)
+            # a 最近被访问过，超出容量时先淘汰 b
+            cache.touch(cache_key("a"))
+            cache.store(cache_key("l"), {}, body, '"e"', None, 0)
+            assert cache.stats()["bytes"] <= 10_000
+            assert cache.lookup(cache_key("b")) is None
+            assert cache.lookup(cache_key("a")) is not None
+            # 单条超过容量 10% 的响应不缓存
+            assert not cache.store(cache_key("big"), {}, b"x" * 2000, '"e"', None, 0)
+        finally:
+            cache.close()
+
+    def test_survives_restart_without_plain_url(self, tmp_path):
+        path = str(tmp_path / "persist.db")
+        url = "https://api.example/a?api_key=secret"
+        cache = HttpCache(path, max_bytes=1024 * 1024)
+        cache.fetch(_FakeUpstream(_response(headers={"Cache-Control": "max-age=600"})), url)
+        cache.close()
+        reopened = HttpCache(path, max_bytes=1024 * 1024)
+        try:
+            upstream = _FakeUpstream()
+            assert reopened.fetch(upstream, url).json() == {"ok": 1}
+            assert upstream.calls == []
+        finally:
+            reopened.close()
+        with open(path, "rb") as f:
+            assert b"secret" not in f.read()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    hits = []
+
+    def do_GET(self):
+        _Handler.hits.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = b'{"results": [1, 2]}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.hits = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_session_and_cached_get_use_cache(cache, server):
+    with patch.object(http_cache, "get_http_cache", return_value=cache):
+        session = CachedSession()
+        assert session.get(f"{server}/trending").json() == {"results": [1, 2]}
+        assert session.get(f"{server}/trending").json() == {"results": [1, 2]}
+        assert cached_get(f"{server}/trending", timeout=5).json() == {"results": [1, 2]}
+    assert _Handler.hits == [None, '"v1"', '"v1"']
+
+
+def test_disabled_cache_passes_through(server):
+    with patch.object(http_cache, "get_http_cache", return_value=None):
+        assert cached_get(f"{server}/x", timeout=5).status_code == 200
+    assert _Handler.hits == [None]
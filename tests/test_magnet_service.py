@@ -5,7 +5,8 @@
 import pytest
 from unittest.mock import patch
 
-from app.services.magnet_service import normalize_info_hash, MagnetService
+from app.core.info_hash import normalize_info_hash
+from app.services.magnet_service import MagnetService
 
 
 class TestNormalizeInfoHash:
@@ -4,6 +4,7 @@ TaskService：tracker 追加、路径解析、add_task 流程、push_to_qb（moc
 TaskMonitor：qb 状态映射、qB 中无任务时的状态同步（mock client）
 """
 import os
+import sqlite3
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -80,7 +81,7 @@ class TestTaskServicePathResolution:
     @patch("app.services.task_service.config")
     def test_tv_type_uses_tv_paths(self, mock_config, mock_db, mock_config_paths):
         mock_config.get.side_effect = mock_config_paths
-        mock_db.get_conn.return_value = MagicMock()
+        mock_db.run_write.side_effect = lambda op: op(MagicMock())
         mock_db.insert_download_task.return_value = 1
         mock_db.insert_file_task.return_value = None
         mock_db.insert_notification.return_value = None
@@ -106,7 +107,7 @@ class TestTaskServicePathResolution:
     @patch("app.services.task_service.config")
     def test_movie_type_uses_movie_paths(self, mock_config, mock_db, mock_config_paths):
         mock_config.get.side_effect = mock_config_paths
-        mock_db.get_conn.return_value = MagicMock()
+        mock_db.run_write.side_effect = lambda op: op(MagicMock())
         mock_db.insert_download_task.return_value = 1
         mock_db.insert_file_task.return_value = None
         mock_db.insert_notification.return_value = None
@@ -132,7 +133,7 @@ class TestTaskServicePathResolution:
     @patch("app.services.task_service.config")
     def test_relative_source_and_target_appended(self, mock_config, mock_db, mock_config_paths):
         mock_config.get.side_effect = mock_config_paths
-        mock_db.get_conn.return_value = MagicMock()
+        mock_db.run_write.side_effect = lambda op: op(MagicMock())
         mock_db.insert_download_task.return_value = 1
         mock_db.insert_file_task.return_value = None
         mock_db.insert_notification.return_value = None
@@ -157,6 +158,30 @@ class TestTaskServicePathResolution:
         assert "movies" in call_kw["targetPath"] or "MyMovie" in call_kw["targetPath"]
 
 
+    @patch("app.services.task_service.db")
+    @patch("app.services.task_service.config")
+    def test_concurrent_duplicate_without_magnet_reuses_task(self, mock_config, mock_db, mock_config_paths):
+        """任务名即 Hash（非磁链）时同样按 Hash 去重：唯一索引冲突后复用已存在的活跃任务"""
+        mock_config.get.side_effect = mock_config_paths
+
+        def write(op):
+            op(MagicMock())
+            raise sqlite3.IntegrityError("UNIQUE constraint failed: download_task.infoHash")
+
+        mock_db.run_write.side_effect = write
+        # 首次检查时另一请求尚未写入，冲突后再查即可找到
+        mock_db.get_tasks_by_hash.side_effect = [[], [{"id": 7, "taskStatus": "fetching_metadata"}]]
+
+        ts = TaskService()
+        ts.qb_client = MagicMock()
+        ts.qb_client.get_torrent_info.return_value = None
+
+        req = AddTaskRequest(taskName="A" * 40, sourceUrl="https://example.com/a.torrent", type="movie")
+        assert ts.add_task(req) == 7
+        assert mock_db.insert_download_task.call_args[1]["infoHash"] == "a" * 40
+        mock_db.get_tasks_by_hash.assert_called_with("a" * 40)
+
+
 # ---------------------------------------------------------------------------
 # TaskService：路径规范化 _norm_path
 # ---------------------------------------------------------------------------
@@ -422,4 +447,46 @@ class TestTaskMonitorQbSimulation:
         monitor = TaskMonitor()
         monitor._check_tasks()
 
-        mock_db.update_task_status.assert_called_with(3, "downloading", 50.0)
+        mock_db.update_task_statuses.assert_called_once_with([(3, "downloading", 50.0, "downloading")])
+        mock_db.update_task_status.assert_not_called()
+
+    @patch("app.services.task_monitor.db")
+    @patch("app.services.task_monitor.magnet_service")
+    def test_unchanged_progress_not_written(self, mock_magnet, mock_db):
+        """状态与进度都未变化的任务本轮不写库"""
+        mock_client = MagicMock()
+        mock_client.get_torrent_info.side_effect = lambda h: {"hash": h, "state": "downloading", "progress": 0.5}
+        mock_magnet._get_client.return_value = mock_client
+
+        unchanged = {
+            "id": 4,
+            "taskName": "d" * 40,
+            "sourceUrl": "magnet:?xt=urn:btih:" + "d" * 40,
+            "taskStatus": "downloading",
+            "taskInfo": "50.0%",
+        }
+        changed = dict(unchanged, id=5, taskName="e" * 40, sourceUrl="magnet:?xt=urn:btih:" + "e" * 40, taskInfo="49.0%")
+        mock_db.get_active_tasks.return_value = [unchanged, changed]
+
+        monitor = TaskMonitor()
+        monitor._check_tasks()
+
+        mock_db.update_task_statuses.assert_called_once_with([(5, "downloading", 50.0, "downloading")])
+
+    @patch("app.services.task_monitor.db")
+    @patch("app.services.task_monitor.magnet_service")
+    def test_no_changes_skip_write(self, mock_magnet, mock_db):
+        mock_client = MagicMock()
+        mock_client.get_torrent_info.return_value = {"hash": "f" * 40, "state": "downloading", "progress": 0.25}
+        mock_magnet._get_client.return_value = mock_client
+        mock_db.get_active_tasks.return_value = [{
+            "id": 6,
+            "taskName": "f" * 40,
+            "sourceUrl": "magnet:?xt=urn:btih:" + "f" * 40,
+            "taskStatus": "downloading",
+            "taskInfo": "25.0%",
+        }]
+
+        TaskMonitor()._check_tasks()
+
+        mock_db.update_task_statuses.assert_not_called()
@@ -0,0 +1,160 @@
+"""
+搜索补全测试（mock TMDB 服务）
+覆盖：前缀索引规范化/权重/类型过滤/容量上限、本地命中不请求上游、未命中时电影/剧集并发搜索、
+相同查询共用上游请求、同一客户端新输入取代旧请求、远端结果缓存、历史搜索加权
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core.prefix_index import PrefixIndex, normalize_title
+from app.services.suggestion_service import SuggestionService
+
+
+class TestPrefixIndex:
+
+    def test_normalize(self):
+        assert normalize_title("  ＡＢＣ   Def ") == "abc def"
+
+    def test_prefix_match_and_weight(self):
+        index = PrefixIndex()
+        index.add("Avatar", "movie")
+        index.add("Avengers", "movie", weight=2)
+        index.add("Breaking Bad", "tv")
+        assert index.search("av", 10, "movie") == ["Avengers", "Avatar"]
+        index.add("avatar", "movie", weight=2)
+        # 重复出现累加权重，保留首次出现的写法
+        assert index.search("AV", 10, "movie") == ["Avatar", "Avengers"]
+        assert index.search("av", 1) == ["Avatar"]
+        assert index.search("x", 10) == []
+        assert index.search("", 10) == []
+
+    def test_kind_filter(self):
+        index = PrefixIndex()
+        index.add("进击的巨人", "tv")
+        index.add("进击的巨人 剧场版", "movie")
+        assert index.search("进击", 10, "tv") == ["进击的巨人"]
+        assert index.search("进击", 10) == ["进击的巨人", "进击的巨人 剧场版"]
+
+    def test_capacity(self):
+        index = PrefixIndex(max_titles=2)
+        assert index.add("a1", "movie") and index.add("a2", "movie")
+        assert not index.add("a3", "movie")
+        # 已有标题仍可加权
+        assert index.add("a2", "movie", weight=5)
+        assert len(index) == 2
+        assert index.search("a", 10) == ["a2", "a1"]
+
+
+def _service(movies=None, tvs=None):
+    """mock 掉 tmdb_service 的补全服务（独立索引），返回 (service, mock_tmdb)"""
+    mock_tmdb = MagicMock()
+    mock_tmdb.client.language = "zh-CN"
+    mock_tmdb.search_movies.side_effect = lambda q: list(movies or [])
+    mock_tmdb.search_tv_shows.side_effect = lambda q: list(tvs or [])
+    return SuggestionService(index=PrefixIndex()), mock_tmdb
+
+
+class TestSuggestionService:
+
+    def test_local_hits_skip_upstream(self):
+        svc, mock_tmdb = _service()
+        svc.index.add_many(["Dune", "Dune: Part Two", "Dunkirk"], "movie")
+        with patch("app.services.suggestion_service.tmdb_service", mock_tmdb):
+            start = time.perf_counter()
+            assert svc.suggest("dun", limit=3, media_type="movie") == ["Dune", "Dunkirk", "Dune: Part Two"]
+            assert time.perf_counter() - start < 0.02
+        mock_tmdb.search_movies.assert_not_called()
+
+    def test_miss_fans_out_to_movie_and_tv(self):
+        svc, mock_tmdb = _service(
+            movies=[{"title": "Dune", "popularity": 50}],
+            tvs=[{"name": "Dune: Prophecy", "popularity": 80}],
+        )
+        with patch("app.services.suggestion_service.tmdb_service", mock_tmdb):
+            assert svc.suggest("dune", limit=5) == ["Dune: Prophecy", "Dune"]
+            # 远端结果已缓存
+            assert svc.suggest("Dune ", limit=5) == ["Dune: Prophecy", "Dune"]
+        mock_tmdb.search_movies.assert_called_once_with("dune")
+        mock_tmdb.search_tv_shows.assert_called_once_with("dune")
+
+    def test_typed_search_uses_single_endpoint(self):
+        svc, mock_tmdb = _service(tvs=[{"name": "Frieren"}])
+        svc.index.add("Fringe", "tv")
+        with patch("app.services.suggestion_service.tmdb_service", mock_tmdb):
+            assert svc.suggest("fr", limit=5, media_type="tv") == ["Fringe", "Frieren"]
+        mock_tmdb.search_movies.assert_not_called()
+
+    def test_concurrent_identical_queries_share_upstream(self):
+        release = threading.Event()
+        svc, mock_tmdb = _service()
+
+        def slow_search(q):
+            release.wait(2)
+            return [{"title": "Interstellar"}]
+
+        mock_tmdb.search_movies.side_effect = slow_search
+        with patch("app.services.suggestion_service.tmdb_service", mock_tmdb):
+            with ThreadPoolExecutor(max_workers=5) as pool:
+                futures = [pool.submit(svc.suggest, "inter", 5, "movie") for _ in range(5)]
+                time.sleep(0.1)
+                release.set()
+                results = [f.result(timeout=5) for f in futures]
+        assert results == [["Interstellar"]] * 5
+        assert mock_tmdb.search_movies.call_count == 1
+
+    def test_new_keystroke_supersedes_old(self):
+        release = threading.Event()
+        svc, mock_tmdb = _service()
+
+        def search(q):
+            if q == "a":
+                release.wait(2)
+            return [{"title": f"{q.upper()} result"}]
+
+        mock_tmdb.search_movies.side_effect = search
+        with patch("app.services.suggestion_service.tmdb_service", mock_tmdb):
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                stale = pool.submit(svc.suggest, "a", 5, "movie", "10.0.0.1")
+                time.sleep(0.1)
+                fresh = pool.submit(svc.suggest, "ab", 5, "movie", "10.0.0.1")
+                assert fresh.result(timeout=5) == ["AB result"]
+                # 旧请求不再等待上游，立即返回本地结果
+                assert stale.result(timeout=1) == []
+                release.set()
+
+    def test_superseded_queued_request_cancelled(self):
+        svc, mock_tmdb = _service()
+        svc._pool = ThreadPoolExecutor(max_workers=1)
+        blocker = threading.Event()
+        svc._pool.submit(blocker.wait, 2)
+        with patch("app.services.suggestion_service.tmdb_service", mock_tmdb):
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                stale = pool.submit(svc.suggest, "zz", 5, "movie", "c")
+                time.sleep(0.1)
+                svc._supersede("c")
+                assert stale.result(timeout=1) == []
+            blocker.set()
+            svc._pool.shutdown(wait=True)
+        mock_tmdb.search_movies.assert_not_called()
+
+    def test_upstream_failure_returns_local(self):
+        svc, mock_tmdb = _service()
+        mock_tmdb.search_movies.side_effect = Exception("offline")
+        svc.index.add("Alien", "movie")
+        with patch("app.services.suggestion_service.tmdb_service", mock_tmdb):
+            assert svc.suggest("al", limit=5, media_type="movie") == ["Alien"]
+
+    def test_record_search_ranks_first(self):
+        svc, _ = _service()
+        svc.index.add_many(["Solaris", "Solo"], "movie")
+        svc.record_search("Soul", "movie")
+        assert svc.index.search("so", 3, "movie")[0] == "Soul"
+
+    @pytest.mark.parametrize("query", ["", "   "])
+    def test_empty_query(self, query):
+        svc, _ = _service()
+        assert svc.suggest(query) == []
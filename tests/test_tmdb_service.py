@@ -1,19 +1,53 @@
 """
-TMDB 服务单元测试（mock tmdbv3api）
-覆盖：search_movies/search_tv_shows、详情、英文标题提取、趋势、热门、建议
+TMDB 服务单元测试（mock TMDBClient / HTTP Session）
+覆盖：TMDBClient 语言与总数、search_movies/search_tv_shows、详情、英文标题提取、趋势、热门、列表缓存与预热、英文标题映射表
 """
+import sqlite3
+import threading
+
 import pytest
-from unittest.mock import MagicMock, PropertyMock, patch
+import requests
+from unittest.mock import MagicMock, patch
+
+from app.core.db import Database
+from app.core.tmdb_client import TMDBClient, TMDBError
+from app.services.tmdb_service import TMDBService, _attr_or_key, _pick_english_title
+
+
+@pytest.fixture(autouse=True)
+def title_db(tmp_path):
+    """每个用例独立的英文标题映射库，避免用例之间共用已写入的标题"""
+    database = Database(str(tmp_path / "tmdb.db"), pool_size=1)
+    database.init_db()
+    with patch("app.services.tmdb_service.db", database):
+        yield database
+    database.close()
+
 
-from app.services.tmdb_service import TMDBService, _attr_or_key
+def _service(api_key: str = "key") -> TMDBService:
+    """client 换成 mock 的服务实例（保留真实的 language / api_key 属性）"""
+    svc = TMDBService()
+    svc.client = MagicMock()
+    svc.client.api_key = api_key
+    svc.client.language = "zh-CN"
+    return svc
+
+
+def _http_response(data, status=200):
+    resp = MagicMock()
+    resp.status_code = status
+    resp.json.return_value = data
+    if status >= 400:
+        resp.raise_for_status.side_effect = requests.HTTPError(f"{status}")
+    return resp
 
 
 # ---------------------------------------------------------------------------
-# _attr_or_key 工具函数
+# _attr_or_key / _pick_english_title 工具函数
 # ---------------------------------------------------------------------------
 
 class TestAttrOrKey:
-    """_attr_or_key：从 AsObj 或 dict 中取属性/键值"""
+    """_attr_or_key：从 dict 或对象中取键值/属性"""
 
     def test_from_object_attr(self):
         obj = MagicMock()
@@ -27,378 +61,433 @@ class TestAttrOrKey:
         assert _attr_or_key(None, "key") is None
 
     def test_none_value_returns_none(self):
-        obj = MagicMock()
-        obj.title = None
-        assert _attr_or_key(obj, "title") is None
-
-    def test_empty_string_value(self):
-        obj = MagicMock()
-        obj.title = ""
-        # 空字符串 strip 后为假值 → 返回 None
-        assert _attr_or_key(obj, "title") is None
+        assert _attr_or_key({"title": None}, "title") is None
 
+    def test_blank_value_returns_none(self):
+        assert _attr_or_key({"title": "  "}, "title") is None
 
-# ---------------------------------------------------------------------------
-# _extract_results / _extract_total
-# ---------------------------------------------------------------------------
-
-class TestExtractResults:
-    """_extract_results：安全提取 tmdbv3api 返回的结果列表"""
-
-    def test_list_direct(self):
-        svc = TMDBService()
-        assert svc._extract_results([1, 2, 3]) == [1, 2, 3]
-
-    def test_asobj_iterable(self):
-        """正常 AsObj 迭代出非字符串对象"""
-        mock_raw = MagicMock()
-        mock_raw.__iter__.return_value = iter([
-            MagicMock(title="Movie A"),
-            MagicMock(title="Movie B"),
-        ])
-        result = svc = TMDBService()._extract_results(mock_raw)
-        assert len(result) == 2
-
-    def test_asobj_degraded_to_string_keys(self):
-        """AsObj 降级为 dict keys（字符串迭代）"""
-        mock_raw = MagicMock()
-        mock_raw.__iter__.return_value = iter(["title", "overview"])
-        mock_raw.results = [MagicMock(title="Movie X")]
-        svc = TMDBService()
-        result = svc._extract_results(mock_raw)
-        assert len(result) == 1
 
-    def test_exception_returns_empty(self):
-        mock_raw = MagicMock()
-        mock_raw.__iter__.side_effect = Exception("broken")
-        svc = TMDBService()
-        assert svc._extract_results(mock_raw) == []
+class TestPickEnglishTitle:
 
-    def test_none_input(self):
-        svc = TMDBService()
-        # 会变成 list 迭代 None → TypeError → 返回 []
-        result = svc._extract_results(None)
-        assert result == []
+    def test_country_priority(self):
+        titles = [
+            {"iso_3166_1": "JP", "title": "Japanese"},
+            {"iso_3166_1": "GB", "title": "British"},
+            {"iso_3166_1": "US", "title": "American"},
+        ]
+        assert _pick_english_title(titles) == "American"
 
+    def test_fallback_to_first_title(self):
+        assert _pick_english_title([{"iso_3166_1": "FR", "title": "Français"}]) == "Français"
 
-class TestExtractTotal:
-    """_extract_total：安全提取 total_results"""
+    def test_empty(self):
+        assert _pick_english_title([]) is None
 
-    def test_from_result(self):
-        mock_raw = MagicMock()
-        mock_raw.total_results = 42
-        assert TMDBService._extract_total(mock_raw) == 42
 
-    def test_from_fallback(self):
-        mock_raw = MagicMock()
-        mock_raw.total_results = None
-        mock_fallback = MagicMock()
-        mock_fallback.total_results = 99
-        assert TMDBService._extract_total(mock_raw, mock_fallback) == 99
+# ---------------------------------------------------------------------------
+# TMDBClient（mock Session）
+# ---------------------------------------------------------------------------
 
-    def test_none_returns_zero(self):
-        mock_raw = MagicMock()
-        mock_raw.total_results = None
-        assert TMDBService._extract_total(mock_raw) == 0
+class TestTMDBClient:
+    """TMDBClient：按请求传语言、显式返回总数、错误处理"""
+
+    def _client(self):
+        client = TMDBClient(api_key="k", base_url="https://api.example/3/", language="zh-CN")
+        client.session = MagicMock()
+        return client
+
+    def test_default_and_per_request_language(self):
+        client = self._client()
+        client.session.get.return_value = _http_response({"id": 1})
+        client.get("/movie/1")
+        client.get("/movie/1", language="en-US")
+        calls = client.session.get.call_args_list
+        assert calls[0].args[0] == "https://api.example/3/movie/1"
+        assert calls[0].kwargs["params"] == {"api_key": "k", "language": "zh-CN"}
+        assert calls[1].kwargs["params"]["language"] == "en-US"
+        assert client.language == "zh-CN"
+
+    def test_get_page_returns_total(self):
+        client = self._client()
+        client.session.get.return_value = _http_response({"results": [{"id": 1}], "total_results": 321})
+        results, total = client.get_page("/movie/popular", page=3, params={"region": "CN"})
+        assert results == [{"id": 1}] and total == 321
+        assert client.session.get.call_args.kwargs["params"]["page"] == 3
+        assert client.session.get.call_args.kwargs["params"]["region"] == "CN"
+
+    def test_get_page_without_results(self):
+        client = self._client()
+        client.session.get.return_value = _http_response({"status_code": 34})
+        assert client.get_page("/movie/popular") == ([], 0)
+
+    def test_business_error_raises(self):
+        client = self._client()
+        client.session.get.return_value = _http_response({"success": False, "status_message": "Invalid API key"})
+        with pytest.raises(TMDBError, match="Invalid API key"):
+            client.get("/movie/1")
+
+    def test_http_error_raises(self):
+        client = self._client()
+        client.session.get.return_value = _http_response({}, status=401)
+        with pytest.raises(requests.HTTPError):
+            client.get("/movie/1")
+
+    def test_missing_api_key(self):
+        client = TMDBClient(api_key="")
+        with pytest.raises(TMDBError):
+            client.get("/movie/1")
+
+    def test_concurrent_languages_isolated(self):
+        """不同线程的请求语言互不影响（不修改共享状态）"""
+        client = self._client()
+        seen = []
+        lock = threading.Lock()
+
+        def fake_get(url, params=None, timeout=None):
+            with lock:
+                seen.append((params["language"], url))
+            return _http_response({})
+
+        client.session.get.side_effect = fake_get
+        threads = [
+            threading.Thread(target=client.get, args=(f"/movie/{i}",), kwargs={"language": lang})
+            for i, lang in enumerate(["en-US", "ja-JP"] * 10)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for lang, url in seen:
+            i = int(url.rsplit("/", 1)[1])
+            assert lang == ("en-US" if i % 2 == 0 else "ja-JP")
 
 
 # ---------------------------------------------------------------------------
-# search_movies / search_tv_shows（mock Movie/TV）
+# search_movies / search_tv_shows
 # ---------------------------------------------------------------------------
 
 class TestSearch:
     """搜索电影/剧集"""
 
     def test_search_movies(self):
-        svc = TMDBService()
-        svc.movie = MagicMock()
-        mock_result = MagicMock()
-        mock_iter = iter([MagicMock(title="Inception"), MagicMock(title="Interstellar")])
-        mock_result.__iter__.return_value = mock_iter
-        svc.movie.search.return_value = mock_result
-
+        svc = _service()
+        svc.client.get_page.return_value = ([{"title": "Inception"}, {"title": "Interstellar"}], 2)
         results = svc.search_movies("Inception")
         assert len(results) == 2
+        svc.client.get_page.assert_called_once_with("/search/movie", 1, {"query": "Inception"})
 
     def test_search_movies_empty_query(self):
-        svc = TMDBService()
-        results = svc.search_movies("")
-        assert results == []
-
-    def test_search_movies_whitespace_query(self):
-        svc = TMDBService()
-        results = svc.search_movies("   ")
-        assert results == []
+        svc = _service()
+        assert svc.search_movies("") == []
+        assert svc.search_movies("   ") == []
+        svc.client.get_page.assert_not_called()
 
     def test_search_tv_shows(self):
-        svc = TMDBService()
-        svc.tv = MagicMock()
-        mock_result = MagicMock()
-        mock_result.__iter__.return_value = iter([MagicMock(name="Breaking Bad")])
-        svc.tv.search.return_value = mock_result
-
-        results = svc.search_tv_shows("Breaking Bad")
-        assert len(results) == 1
+        svc = _service()
+        svc.client.get_page.return_value = ([{"name": "Breaking Bad"}], 1)
+        assert len(svc.search_tv_shows("Breaking Bad")) == 1
 
     def test_search_movies_with_total(self):
-        svc = TMDBService()
-        svc.movie = MagicMock()
-        mock_result = MagicMock()
-        mock_result.__iter__.return_value = iter([MagicMock()])
-        mock_result.total_results = None
-        svc.movie.total_results = 100
-        svc.movie.search.return_value = mock_result
-
-        results, total = svc.search_movies_with_total("test")
-        assert len(results) == 1
-        # total 来自 movie.total_results fallback
-        assert total > 0
+        svc = _service()
+        svc.client.get_page.return_value = ([{"id": 1}], 100)
+        results, total = svc.search_movies_with_total("test", page=2)
+        assert len(results) == 1 and total == 100
+        svc.client.get_page.assert_called_once_with("/search/movie", 2, {"query": "test"})
 
     def test_search_tv_with_total(self):
-        svc = TMDBService()
-        svc.tv = MagicMock()
-        mock_result = MagicMock()
-        mock_result.__iter__.return_value = iter([MagicMock()])
-        mock_result.total_results = None
-        svc.tv.total_results = 200
-        svc.tv.search.return_value = mock_result
-
-        results, total = svc.search_tv_shows_with_total("test")
-        assert total > 0
+        svc = _service()
+        svc.client.get_page.return_value = ([{"id": 1}], 200)
+        assert svc.search_tv_shows_with_total("test") == ([{"id": 1}], 200)
 
 
 # ---------------------------------------------------------------------------
-# get_movie_details / get_tv_details（mock Movie/TV）
+# get_movie_details / get_tv_details
 # ---------------------------------------------------------------------------
 
-class TestDetails:
-    """电影/剧集详情"""
+def _movie_payload(**overrides):
+    """append_to_response=credits,alternative_titles,translations 的详情响应"""
+    data = {
+        "id": 550,
+        "title": "搏击俱乐部",
+        "original_title": "Fight Club",
+        "original_language": "en",
+        "credits": {"cast": [
+            {"id": 287, "name": "Brad Pitt", "character": "Tyler Durden", "profile_path": "/path.jpg"},
+            {"id": 1, "name": ""},
+        ]},
+        "alternative_titles": {"titles": []},
+        "translations": {"translations": []},
+    }
+    data.update(overrides)
+    return data
 
-    def test_movie_details(self):
-        svc = TMDBService()
-        svc.movie = MagicMock()
-        detail_obj = MagicMock()
-        detail_obj._json = {"id": 550, "title": "Fight Club", "overview": "..."}
-        svc.movie.details.return_value = detail_obj
-
-        # mock credits
-        cast_member = MagicMock()
-        cast_member.name = "Brad Pitt"
-        cast_member.character = "Tyler Durden"
-        cast_member.profile_path = "/path.jpg"
-        credits_obj = MagicMock()
-        credits_obj.cast = [cast_member]
-        svc.movie.credits.return_value = credits_obj
 
+class TestDetails:
+    """电影/剧集详情：一次请求附带 credits 等子资源，按 (id, 语言) 缓存"""
+
+    def test_movie_details_single_request(self):
+        svc = _service()
+        svc.client.get.return_value = _movie_payload()
         result = svc.get_movie_details(550)
         assert result["id"] == 550
-        assert result["title"] == "Fight Club"
-        assert len(result["cast"]) == 1
-        assert result["cast"][0]["name"] == "Brad Pitt"
-
-    def test_tv_details(self):
-        svc = TMDBService()
-        svc.tv = MagicMock()
-        detail_obj = MagicMock()
-        detail_obj._json = {"id": 1399, "name": "GoT", "overview": "..."}
-        svc.tv.details.return_value = detail_obj
-        credits_obj = MagicMock()
-        credits_obj.cast = []
-        svc.tv.credits.return_value = credits_obj
-
+        assert result["title"] == "搏击俱乐部"
+        assert result["cast"] == [
+            {"id": 287, "name": "Brad Pitt", "character": "Tyler Durden", "profile_path": "/path.jpg"}
+        ]
+        assert "credits" not in result and "translations" not in result
+        svc.client.get.assert_called_once_with(
+            "/movie/550", {"append_to_response": "credits,alternative_titles,translations"}
+        )
+
+    def test_tv_details_without_credits(self):
+        svc = _service()
+        svc.client.get.return_value = {"id": 1399, "name": "GoT"}
         result = svc.get_tv_details(1399)
-        assert result["id"] == 1399
         assert result["name"] == "GoT"
+        assert result["cast"] == []
+        assert svc.client.get.call_args.args[0] == "/tv/1399"
+
+    def test_details_cached_per_language(self):
+        svc = _service()
+        svc.client.get.return_value = _movie_payload()
+        svc.get_movie_details(550)
+        svc.get_movie_details(550)["cast"].clear()
+        assert len(svc.get_movie_details(550)["cast"]) == 1
+        assert svc.client.get.call_count == 1
+        svc.client.language = "en-US"
+        svc.get_movie_details(550)
+        assert svc.client.get.call_count == 2
+
+    def test_details_error_not_cached(self):
+        svc = _service()
+        svc.client.get.side_effect = requests.RequestException("offline")
+        with pytest.raises(requests.RequestException):
+            svc.get_movie_details(550)
+        svc.client.get.side_effect = None
+        svc.client.get.return_value = _movie_payload()
+        assert svc.get_movie_details(550)["id"] == 550
 
 
 # ---------------------------------------------------------------------------
-# get_movie_english_title / get_tv_english_title（mock Movie/TV）
+# get_movie_english_title / get_tv_english_title
 # ---------------------------------------------------------------------------
 
 class TestEnglishTitle:
-    """英文标题提取"""
-
-    def test_movie_english_title_from_detail(self):
-        svc = TMDBService()
-        svc.movie = MagicMock()
-        detail = MagicMock()
-        detail.title = "Inception"
-        svc.movie.details.return_value = detail
-
-        title = svc.get_movie_english_title(550)
-        assert title == "Inception"
-
-    def test_movie_english_title_fallback_to_alternative(self):
-        svc = TMDBService()
-        svc.movie = MagicMock()
-        # 第一次 detail 返回空 title
-        detail1 = MagicMock()
-        detail1.title = None
-        # alternative_titles 返回英文标题
-        alt = MagicMock()
-        alt.iso_3166_1 = "US"
-        alt.title = "English Title"
-        svc.movie.details.return_value = detail1
-        svc.movie.alternative_titles.return_value = [alt]
-
-        title = svc.get_movie_english_title(550)
-        assert title == "English Title"
-
-    def test_tv_english_title_from_detail(self):
-        svc = TMDBService()
-        svc.tv = MagicMock()
-        detail = MagicMock()
-        detail.name = "Breaking Bad"
-        svc.tv.details.return_value = detail
-
-        title = svc.get_tv_english_title(1399)
-        assert title == "Breaking Bad"
+    """英文标题：由详情中的 translations / alternative_titles 推导，与详情共用一次请求"""
+
+    def test_detail_then_english_title_one_request(self):
+        svc = _service()
+        svc.client.get.return_value = _movie_payload(translations={"translations": [
+            {"iso_3166_1": "US", "iso_639_1": "en", "data": {"title": "Fight Club"}},
+        ]})
+        svc.get_movie_details(550)
+        assert svc.get_movie_english_title(550) == "Fight Club"
+        assert svc.client.get.call_count == 1
+
+    def test_translation_country_priority(self):
+        svc = _service()
+        svc.client.get.return_value = _movie_payload(
+            original_title="千と千尋の神隠し",
+            original_language="ja",
+            translations={"translations": [
+                {"iso_3166_1": "GB", "iso_639_1": "en", "data": {"title": "UK Title"}},
+                {"iso_3166_1": "US", "iso_639_1": "en", "data": {"title": "Spirited Away"}},
+                {"iso_3166_1": "CN", "iso_639_1": "zh", "data": {"title": "千与千寻"}},
+            ]},
+        )
+        assert svc.get_movie_english_title(129) == "Spirited Away"
+
+    def test_english_original_title(self):
+        svc = _service()
+        svc.client.get.return_value = _movie_payload()
+        assert svc.get_movie_english_title(550) == "Fight Club"
+
+    def test_fallback_to_alternative_titles(self):
+        svc = _service()
+        svc.client.get.return_value = _movie_payload(
+            original_title="君の名は。",
+            original_language="ja",
+            translations={"translations": [{"iso_3166_1": "US", "iso_639_1": "en", "data": {"title": ""}}]},
+            alternative_titles={"titles": [{"iso_3166_1": "US", "title": "Your Name."}]},
+        )
+        assert svc.get_movie_english_title(372058) == "Your Name."
+
+    def test_tv_uses_name_and_results(self):
+        svc = _service()
+        svc.client.get.return_value = {
+            "name": "进击的巨人",
+            "original_name": "進撃の巨人",
+            "original_language": "ja",
+            "alternative_titles": {"results": [{"iso_3166_1": "GB", "title": "UK Title"}]},
+            "translations": {"translations": []},
+        }
+        assert svc.get_tv_english_title(1429) == "UK Title"
+        svc.client.get.return_value = {
+            "translations": {"translations": [
+                {"iso_3166_1": "US", "iso_639_1": "en", "data": {"name": "Stranger Things"}},
+            ]},
+        }
+        assert svc.get_tv_english_title(66732) == "Stranger Things"
+
+    def test_fallback_to_original_title(self):
+        svc = _service()
+        svc.client.get.return_value = _movie_payload(original_title="Amélie", original_language="fr")
+        assert svc.get_movie_english_title(194) == "Amélie"
 
     def test_tv_english_title_exception_returns_none(self):
-        svc = TMDBService()
-        svc.tv = MagicMock()
-        svc.tv.details.side_effect = Exception("API error")
-        svc.tv.alternative_titles.side_effect = Exception("also failed")
-
-        title = svc.get_tv_english_title(1399)
-        assert title is None
+        svc = _service()
+        svc.client.get.side_effect = Exception("API error")
+        assert svc.get_tv_english_title(1399) is None
+
+
+class TestEnglishTitleStore:
+    """英文标题映射表：详情推导后持久化，列表结果批量回填，之后按主键读取不再请求"""
+
+    def test_detail_result_persisted(self, title_db):
+        svc = _service()
+        svc.client.get.return_value = _movie_payload(
+            original_title="君の名は。",
+            original_language="ja",
+            alternative_titles={"titles": [
+                {"iso_3166_1": "US", "title": "Your Name."},
+                {"iso_3166_1": "GB", "title": "Your Name."},
+                {"iso_3166_1": "JP", "title": "Kimi no Na wa."},
+            ]},
+        )
+        assert svc.get_movie_english_title(372058) == "Your Name."
+        assert title_db.get_tmdb_title("movie", 372058) == {
+            "englishTitle": "Your Name.", "altTitles": ["Your Name.", "Kimi no Na wa."]
+        }
+        # 新实例（如重启后）直接读表
+        fresh = _service()
+        assert fresh.get_movie_english_title(372058) == "Your Name."
+        fresh.client.get.assert_not_called()
+
+    def test_list_results_backfill(self, title_db):
+        svc = _service()
+        svc.client.get_page.return_value = ([
+            {"id": 1, "original_name": "Severance", "original_language": "en", "name": "人生切割术"},
+            {"id": 2, "original_name": "進撃の巨人", "original_language": "ja", "name": "进击的巨人"},
+        ], 2)
+        svc.get_trending_tv()
+        assert svc.get_tv_english_title(1) == "Severance"
+        svc.client.get.assert_not_called()
+        assert title_db.get_tmdb_title("tv", 2) is None
+
+    def test_backfill_keeps_detail_titles(self, title_db):
+        title_db.upsert_tmdb_titles([("movie", 1, "Detail Title", ["Alias"])])
+        svc = _service()
+        svc.client.get_page.return_value = ([{"id": 1, "original_title": "Original", "original_language": "en"}], 1)
+        svc.get_popular_movies()
+        assert title_db.get_tmdb_title("movie", 1) == {"englishTitle": "Detail Title", "altTitles": ["Alias"]}
+
+    def test_store_failure_still_returns_title(self):
+        svc = _service()
+        svc.client.get.return_value = _movie_payload()
+        with patch("app.services.tmdb_service.db") as broken:
+            broken.get_tmdb_title.side_effect = sqlite3.OperationalError("no such table")
+            broken.upsert_tmdb_titles.side_effect = sqlite3.OperationalError("no such table")
+            assert svc.get_movie_english_title(550) == "Fight Club"
 
 
 # ---------------------------------------------------------------------------
-# 趋势/热门/高分（mock Trending/Discover/Movie/TV）
+# 趋势/热门/高分
 # ---------------------------------------------------------------------------
 
 class TestTrendingAndPopular:
     """趋势、热门、高分"""
 
-    def test_trending_movies(self):
-        svc = TMDBService()
-        svc.trending = MagicMock()
-        mock_result = MagicMock()
-        mock_result.__iter__.return_value = iter([MagicMock(title="A")])
-        mock_result.total_results = 1
-        svc.trending.movie_week.return_value = mock_result
-
-        results, total = svc.get_trending_movies()
-        assert len(results) == 1
-        assert total == 1
-
-    def test_trending_tv(self):
-        svc = TMDBService()
-        svc.trending = MagicMock()
-        mock_result = MagicMock()
-        mock_result.__iter__.return_value = iter([MagicMock(name="B")])
-        mock_result.total_results = 2
-        svc.trending.tv_week.return_value = mock_result
-
-        results, total = svc.get_trending_tv()
-        assert len(results) == 1
-        assert total == 2
-
-    def test_popular_movies(self):
-        svc = TMDBService()
-        svc.movie = MagicMock()
-        mock_result = MagicMock()
-        mock_result.__iter__.return_value = iter([MagicMock()])
-        mock_result.total_results = 10
-        svc.movie.popular.return_value = mock_result
-
-        results, total = svc.get_popular_movies()
-        assert len(results) == 1
-        assert total == 10
-
-    def test_top_rated_movies(self):
-        svc = TMDBService()
-        svc.movie = MagicMock()
-        mock_result = MagicMock()
-        mock_result.__iter__.return_value = iter([MagicMock(), MagicMock()])
-        mock_result.total_results = 20
-        svc.movie.top_rated.return_value = mock_result
-
-        results, total = svc.get_top_rated_movies()
-        assert len(results) == 2
-        assert total == 20
+    @pytest.mark.parametrize("method, args, path", [
+        ("get_trending_movies", (1, "week"), "/trending/movie/week"),
+        ("get_trending_movies", (1, "day"), "/trending/movie/day"),
+        ("get_trending_tv", (2, "week"), "/trending/tv/week"),
+        ("get_popular_movies", (1,), "/movie/popular"),
+        ("get_popular_tv", (1,), "/tv/popular"),
+        ("get_top_rated_movies", (1,), "/movie/top_rated"),
+        ("get_top_rated_tv", (1,), "/tv/top_rated"),
+    ])
+    def test_list_endpoints(self, method, args, path):
+        svc = _service()
+        svc.client.get_page.return_value = ([{"id": 1}], 10)
+        assert getattr(svc, method)(*args) == ([{"id": 1}], 10)
+        assert svc.client.get_page.call_args.args[:2] == (path, args[0])
 
     def test_top_rated_anime(self):
-        svc = TMDBService()
-        svc.discover = MagicMock()
-        mock_result = MagicMock()
-        mock_result.__iter__.return_value = iter([MagicMock(), MagicMock(), MagicMock()])
-        mock_result.total_results = 3
-        svc.discover.discover_tv_shows.return_value = mock_result
-
+        svc = _service()
+        svc.client.get_page.return_value = ([{}, {}, {}], 3)
         results, total = svc.get_top_rated_anime()
-        assert len(results) == 3
-        assert total == 3
+        assert len(results) == 3 and total == 3
+        path, page, params = svc.client.get_page.call_args.args
+        assert path == "/discover/tv" and params["with_genres"] == "16"
 
     def test_request_exception_returns_empty(self):
-        import requests as req_lib
-        svc = TMDBService()
-        svc.movie = MagicMock()
-        svc.movie.popular.side_effect = req_lib.RequestException("offline")
-
-        results, total = svc.get_popular_movies()
-        assert results == []
-        assert total == 0
-
-
-# ---------------------------------------------------------------------------
-# get_search_suggestions（mock Movie/TV/Search）
-# ---------------------------------------------------------------------------
-
-class TestSearchSuggestions:
-    """搜索建议/补全"""
-
-    def test_movie_suggestions(self):
+        svc = _service()
+        svc.client.get_page.side_effect = requests.RequestException("offline")
+        assert svc.get_popular_movies() == ([], 0)
+
+
+class TestListCache:
+    """列表接口缓存：按 (接口, 页码, 窗口, 语言) 命中，失败结果不缓存"""
+
+    def test_repeat_served_from_cache(self):
+        svc = _service()
+        svc.client.get_page.return_value = ([{"title": "A"}], 1)
+        assert svc.get_popular_movies(1) == svc.get_popular_movies(1)
+        assert svc.client.get_page.call_count == 1
+        svc.get_popular_movies(2)
+        assert svc.client.get_page.call_count == 2
+
+    def test_key_includes_language_and_window(self):
+        svc = _service()
+        svc.client.get_page.return_value = ([{"id": 1}], 1)
+        svc.get_trending_movies(1, "week")
+        svc.get_trending_movies(1, "day")
+        svc.client.language = "en-US"
+        svc.get_trending_movies(1, "week")
+        svc.get_trending_movies(1, "week")
+        assert svc.client.get_page.call_count == 3
+
+    def test_failure_not_cached(self):
+        svc = _service()
+        svc.client.get_page.side_effect = requests.RequestException("offline")
+        assert svc.get_popular_movies() == ([], 0)
+        svc.client.get_page.side_effect = None
+        svc.client.get_page.return_value = ([{"id": 1}], 1)
+        assert svc.get_popular_movies() == ([{"id": 1}], 1)
+
+    def test_reload_config_clears_cache_on_key_change(self):
         svc = TMDBService()
-        svc.movie = MagicMock()
-        mock_result = MagicMock()
-        items = [MagicMock(title="Avatar"), MagicMock(title="Avengers")]
-        mock_result.__iter__.return_value = iter(items)
-        svc.movie.search.return_value = mock_result
+        svc.client.get_page = MagicMock(return_value=([{"id": 1}], 1))
+        svc.get_popular_movies()
+        # 配置未变（如保存其它设置）时保留缓存
+        svc.reload_config()
+        svc.get_popular_movies()
+        assert svc.client.get_page.call_count == 1
+        with patch("app.services.tmdb_service.config") as mock_cfg:
+            mock_cfg.get.side_effect = lambda key, default=None: {"tmdb.api_key": "another"}.get(key, default)
+            svc.reload_config()
+        svc.get_popular_movies()
+        assert svc.client.get_page.call_count == 2
 
-        suggestions = svc.get_search_suggestions("Av", media_type="movie")
-        assert len(suggestions) == 2
-        assert "Avatar" in suggestions
 
-    def test_tv_suggestions(self):
-        svc = TMDBService()
-        svc.tv = MagicMock()
-        mock_result = MagicMock()
-        mock_item = MagicMock()
-        mock_item.name = "Stranger Things"
-        mock_result.__iter__.return_value = iter([mock_item])
-        svc.tv.search.return_value = mock_result
+class TestPrewarm:
+    """prewarm：只刷新缺失或即将过期的第 1 页，未配置 api_key 时不请求"""
 
-        suggestions = svc.get_search_suggestions("Stranger", media_type="tv")
-        assert "Stranger Things" in suggestions
+    def test_prewarm_then_served_from_cache(self):
+        svc = _service()
+        svc.client.get_page.return_value = ([{"id": 1}], 1)
+        assert svc.prewarm() == 9
+        svc.get_popular_movies(1)
+        svc.get_trending_tv(1, "day")
+        assert svc.client.get_page.call_count == 9
+        # 仍新鲜的条目不重复请求；预热窗口超过 TTL 时重新请求
+        assert svc.prewarm(horizon=60) == 0
+        assert svc.prewarm(horizon=24 * 3600) == 9
 
-    def test_empty_query(self):
-        svc = TMDBService()
-        assert svc.get_search_suggestions("") == []
-        assert svc.get_search_suggestions("   ") == []
-
-    def test_duplicates_removed(self):
-        svc = TMDBService()
-        svc.search = MagicMock()
-        # multi search 返回重复标题
-        r1 = MagicMock(spec=[])
-        r1.title = "Test"
-        r2 = MagicMock(spec=[])
-        r2.title = "Test"
-        mock_multi = MagicMock()
-        mock_multi.__iter__.return_value = iter([r1, r2])
-        svc.search.multi.return_value = mock_multi
-
-        suggestions = svc.get_search_suggestions("Test")
-        assert suggestions == ["Test"]
-
-    def test_exception_returns_empty(self):
-        svc = TMDBService()
-        svc.search = MagicMock()
-        svc.search.multi.side_effect = Exception("broken")
-
-        assert svc.get_search_suggestions("test") == []
+    def test_prewarm_skipped_without_api_key(self):
+        svc = _service(api_key="")
+        assert svc.prewarm() == 0
+        svc.client.get_page.assert_not_called()
 
 
 # ---------------------------------------------------------------------------
@@ -413,12 +502,13 @@ class TestReloadConfig:
         with patch("app.services.tmdb_service.config") as mock_cfg:
             mock_cfg.get.side_effect = lambda key, default=None: {
                 "tmdb.api_key": "test_key",
-                "tmdb.language": "zh-CN",
+                "tmdb.language": "ja-JP",
                 "tmdb.api_domain": "https://custom.api.org/",
             }.get(key, default)
             svc.reload_config()
-            # _base 应被设置
-            assert "custom.api.org" in svc.tmdb._base
+        assert svc.client.base_url == "https://custom.api.org/3"
+        assert svc.client.api_key == "test_key"
+        assert svc.client.language == "ja-JP"
 
     def test_default_domain(self):
         svc = TMDBService()
@@ -429,5 +519,4 @@ class TestReloadConfig:
                 "tmdb.api_domain": None,
             }.get(key, default)
             svc.reload_config()
-            # 默认域名
-            assert "api.themoviedb.org" in svc.tmdb._base
+        assert svc.client.base_url == "https://api.themoviedb.org/3"
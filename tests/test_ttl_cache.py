@@ -0,0 +1,127 @@
+"""
+TTLCache 单元测试
+覆盖：过期淘汰、LRU 淘汰、get_or_load 跳过不可缓存结果、容量为 0 时不缓存、stale-while-revalidate
+使用 mock time.monotonic 控制时间推进
+"""
+import threading
+import time
+from unittest.mock import patch
+
+from app.core.ttl_cache import TTLCache
+
+
+class TestTTLCache:
+
+    def test_expires_after_ttl(self):
+        cache = TTLCache()
+        with patch("app.core.ttl_cache.time.monotonic", return_value=100.0):
+            cache.set("k", 1, ttl=10)
+        with patch("app.core.ttl_cache.time.monotonic", return_value=109.0):
+            assert cache.get("k") == 1
+        with patch("app.core.ttl_cache.time.monotonic", return_value=110.0):
+            assert cache.get("k") is None
+        assert len(cache) == 0
+
+    def test_lru_eviction(self):
+        cache = TTLCache(max_entries=2)
+        cache.set("a", 1, ttl=60)
+        cache.set("b", 2, ttl=60)
+        cache.get("a")
+        cache.set("c", 3, ttl=60)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+
+    def test_get_or_load(self):
+        cache = TTLCache()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return len(calls)
+
+        assert cache.get_or_load("k", loader, ttl=60) == 1
+        assert cache.get_or_load("k", loader, ttl=60) == 1
+        assert calls == [1]
+        assert cache.stats()["hits"] == 1
+
+    def test_uncacheable_result_not_stored(self):
+        cache = TTLCache()
+        cache.get_or_load("k", lambda: [], ttl=60, cacheable=bool)
+        assert len(cache) == 0
+
+    def test_zero_capacity_disables(self):
+        cache = TTLCache(max_entries=0)
+        cache.set("k", 1, ttl=60)
+        assert cache.get("k") is None
+
+    def test_resize_evicts_oldest(self):
+        cache = TTLCache()
+        for i in range(5):
+            cache.set(i, i, ttl=60)
+        cache.resize(2)
+        assert [cache.get(i) for i in range(5)] == [None, None, None, 3, 4]
+
+
+class TestStaleWhileRevalidate:
+    """get_or_refresh：过期后宽限期内返回旧值并只发起一次后台刷新"""
+
+    def test_fresh_hit_does_not_load(self):
+        cache = TTLCache()
+        cache.set("k", "v1", ttl=60, stale_ttl=60)
+        assert cache.get_or_refresh("k", lambda: "v2", ttl=60, stale_ttl=60) == "v1"
+
+    def test_stale_served_and_refreshed_once(self):
+        cache = TTLCache()
+        with patch("app.core.ttl_cache.time.monotonic", return_value=100.0):
+            cache.set("k", "old", ttl=10, stale_ttl=100)
+        release = threading.Event()
+        calls = []
+
+        def slow_loader():
+            calls.append(1)
+            release.wait(5)
+            return "new"
+
+        with patch("app.core.ttl_cache.time.monotonic", return_value=150.0):
+            assert cache.get_or_refresh("k", slow_loader, ttl=10, stale_ttl=100) == "old"
+            assert cache.get_or_refresh("k", slow_loader, ttl=10, stale_ttl=100) == "old"
+        release.set()
+        for _ in range(100):
+            if cache.get("k") == "new":
+                break
+            time.sleep(0.01)
+        assert cache.get("k") == "new"
+        assert calls == [1]
+        assert cache.stats()["stale_hits"] == 2
+
+    def test_failed_refresh_keeps_stale(self):
+        cache = TTLCache()
+        with patch("app.core.ttl_cache.time.monotonic", return_value=100.0):
+            cache.set("k", "old", ttl=10, stale_ttl=100)
+
+        def broken():
+            raise RuntimeError("upstream down")
+
+        with patch("app.core.ttl_cache.time.monotonic", return_value=150.0):
+            assert cache.get_or_refresh("k", broken, ttl=10, stale_ttl=100) == "old"
+        for _ in range(100):
+            if not cache._refreshing:
+                break
+            time.sleep(0.01)
+        with patch("app.core.ttl_cache.time.monotonic", return_value=150.0):
+            assert cache.get_or_refresh("k", broken, ttl=10, stale_ttl=100) == "old"
+
+    def test_beyond_stale_window_loads_synchronously(self):
+        cache = TTLCache()
+        with patch("app.core.ttl_cache.time.monotonic", return_value=100.0):
+            cache.set("k", "old", ttl=10, stale_ttl=10)
+        with patch("app.core.ttl_cache.time.monotonic", return_value=200.0):
+            assert cache.get_or_refresh("k", lambda: "new", ttl=10, stale_ttl=10) == "new"
+
+    def test_fresh_seconds(self):
+        cache = TTLCache()
+        with patch("app.core.ttl_cache.time.monotonic", return_value=100.0):
+            cache.set("k", 1, ttl=30)
+        with patch("app.core.ttl_cache.time.monotonic", return_value=110.0):
+            assert cache.fresh_seconds("k") == 20
+            assert cache.fresh_seconds("missing") == 0